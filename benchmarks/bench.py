@@ -0,0 +1,291 @@
+"""Engine and rendering benchmarks: python -m benchmarks.bench --output results.json --baseline baseline.json
+
+Every benchmark starts from the same seeded board state (the agent plays a
+fixed number of pieces), is run `repeat` times and reported as the best and
+the median time per call. The Qt benchmarks use the offscreen platform and
+are skipped if PyQt5 (or QtMultimedia) cannot be imported.
+
+With --baseline, every result is compared with the baseline's median and the
+run fails if one got slower by more than --threshold.
+"""
+import argparse
+import copy
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from pyTetris.agent import AgentPolicy
+from pyTetris.engine import Action, Engine, EngineListener, RotationType, Tetromino, TetrominoType
+from pyTetris.field import FIELD_BACKENDS
+from pyTetris.simulate import play
+
+SEED = 2020
+PIECES = 40
+HEIGHT = 23
+WIDTH = 12
+
+# the QApplication must outlive the Qt benchmarks
+qt_application = None
+
+
+class DiffListener(EngineListener):
+    """Pulls the changed cells on every field change, like the Qt Game does."""
+
+    def __init__(self):
+        self.changed_cells = []
+
+    def on_field_changed(self, engine):
+        self.changed_cells = engine.changed_cells()
+
+
+def seeded_engine(backend, listener=None):
+    engine = Engine(HEIGHT, WIDTH, backend=backend, seed=SEED, listener=listener)
+    play(engine, AgentPolicy(SEED), PIECES)
+
+    if not engine.is_running:
+        raise RuntimeError("SEEDED GAME ENDED BEFORE THE BENCHMARK STATE")
+
+    engine.changed_cells()
+
+    return engine
+
+
+def line_clear_engine(backend):
+    """Two bottom rows that the current O brick completes (the O's cells are at (1..2, 1..2) of its matrix)."""
+
+    engine = Engine(HEIGHT, WIDTH, backend=backend, seed=SEED)
+
+    for w in range(0, WIDTH - 4, 2):
+        engine.field.stamp(HEIGHT - 4, w, TetrominoType.O_BRICK, 0)
+
+    engine.current_tetromino = Tetromino(TetrominoType.O_BRICK)
+    engine.playing_cursor = (HEIGHT - 4, WIDTH - 4)
+    engine.field_changed()
+    engine.stamp_tetromino()
+
+    return engine
+
+
+def timed(run, number, prepare=None):
+    """Seconds for number calls of run(state); prepare(number) builds the states outside of the timing."""
+
+    states = prepare(number) if prepare else [None] * number
+
+    started = time.perf_counter()
+
+    for state in states:
+        run(state)
+
+    return time.perf_counter() - started
+
+
+def engine_benchmarks(backend):
+    engine = seeded_engine(backend)
+    tetromino = engine.current_tetromino
+    cursor = engine.playing_cursor
+
+    def rotate(state):
+        engine._rotate(RotationType.CLOCKWISE)
+        engine._rotate(RotationType.COUNTER_CLOCKWISE)
+
+    def drop(state):
+        # a new field: the shadow cache is cold, as after every stamp
+        engine.field_changed()
+        engine.move(Action.DROP)
+        engine.playing_cursor = cursor
+
+    stamped = seeded_engine(backend)
+    stamped.move(Action.DROP)
+    stamped.stamp_tetromino()
+
+    if stamped.field.complete_lines():
+        raise RuntimeError("SEEDED STATE COMPLETES A LINE")
+
+    clear_template = line_clear_engine(backend)
+
+    def copies(number):
+        return [copy.deepcopy(clear_template) for i in range(number)]
+
+    diff_engine = seeded_engine(backend, DiffListener())
+    moves = [Action.LEFT, Action.RIGHT]
+
+    def update_field(state):
+        moves.reverse()
+        diff_engine.move(moves[0])
+
+    return {
+        "is_possible": (lambda state: engine.is_possible(cursor, tetromino), 20000, None),
+        "rotate_clockwise_and_back": (rotate, 10000, None),
+        "move_drop_cold_shadow": (drop, 10000, None),
+        "shadow_cursor": (lambda state: engine.shadow_cursor(), 10000, None),
+        "check_complete_lines_none": (lambda state: stamped.check_complete_lines(), 10000, None),
+        "check_complete_lines_double": (lambda state: state.check_complete_lines(), 500, copies),
+        "update_field_changed_cells": (update_field, 5000, None),
+    }
+
+
+def qt_benchmarks():
+    global qt_application
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+    try:
+        from PyQt5.QtWidgets import QApplication
+        from pyTetris.main_window import MainWindow
+    except ImportError as e:
+        print(f"skipping Qt benchmarks: {e}", file=sys.stderr)
+        return {}
+
+    qt_application = QApplication.instance() or QApplication(sys.argv[:1])
+    window = MainWindow(HEIGHT, WIDTH, animations_enabled=False)
+
+    # the field diffs of a piece moving left and right, and a whole frame
+    engine = seeded_engine("bitboard", DiffListener())
+    full_frame = [(h, w, engine.field.value(h, w)) for h in range(HEIGHT) for w in range(WIDTH)]
+    diffs = []
+
+    for i in range(64):
+        engine.move(Action.LEFT if i % 2 else Action.RIGHT)
+        diffs.append(engine.listener.changed_cells)
+
+    window.on_field_update(full_frame)
+
+    def diff_states(number):
+        return [diffs[i % len(diffs)] for i in range(number)]
+
+    button = window.next_tetromino_buttons[0][0]
+    values = [0, TetrominoType.T_BRICK.value]
+
+    def update_button_changed(state):
+        values.reverse()
+        window.update_button(button, values[0])
+
+    return {
+        "main_window.on_field_update_move": (window.on_field_update, 5000, diff_states),
+        "main_window.on_field_update_full": (lambda state: window.on_field_update(full_frame), 500, None),
+        "board_widget.full_paint": (lambda state: window.board.grab(), 200, None),
+        "main_window.update_button_changed": (update_button_changed, 2000, None),
+        "main_window.update_button_unchanged": (lambda state: window.update_button(button, 0), 20000, None),
+    }
+
+
+def run_benchmarks(repeat=5, name_filter=None, qt=True):
+    results = {}
+
+    for backend in sorted(FIELD_BACKENDS):
+        try:
+            benchmarks = engine_benchmarks(backend)
+        except ImportError as e:
+            print(f"skipping the {backend} backend: {e}", file=sys.stderr)
+            continue
+
+        results.update(measure(f"engine[{backend}]", benchmarks, repeat, name_filter))
+
+    if qt:
+        results.update(measure("qt", qt_benchmarks(), repeat, name_filter))
+
+    return results
+
+
+def measure(group, benchmarks, repeat, name_filter):
+    results = {}
+
+    for name, (run, number, prepare) in benchmarks.items():
+        full_name = f"{group}.{name}"
+
+        if name_filter and name_filter not in full_name:
+            continue
+
+        per_call = [timed(run, number, prepare) / number * 1e6 for i in range(repeat)]
+        results[full_name] = {
+            "best_us": round(min(per_call), 3),
+            "median_us": round(statistics.median(per_call), 3),
+            "number": number,
+            "repeat": repeat,
+        }
+
+    return results
+
+
+def metadata():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).parent,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except OSError:
+        commit = ""
+
+    return {
+        "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+    }
+
+
+def compare(results, baseline, threshold):
+    """Prints current vs baseline per benchmark, returns the names that got slower than threshold allows."""
+
+    regressions = []
+
+    print(f"{'benchmark':58} {'baseline':>10} {'current':>10} {'ratio':>7}")
+
+    for name, result in results.items():
+        base = baseline.get(name)
+
+        if base is None:
+            print(f"{name:58} {'-':>10} {result['median_us']:>10.3f} {'new':>7}")
+            continue
+
+        ratio = result["median_us"] / base["median_us"] if base["median_us"] else 1.0
+        flag = ""
+
+        if ratio > 1 + threshold:
+            regressions.append(name)
+            flag = "  SLOWER"
+
+        print(f"{name:58} {base['median_us']:>10.3f} {result['median_us']:>10.3f} {ratio:>7.2f}{flag}")
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench", description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--baseline", help="JSON of an earlier run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.1, help="allowed slowdown vs baseline (default: 0.1 = 10%%)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--filter", help="only benchmarks whose name contains this")
+    parser.add_argument("--no-qt", action="store_true", help="skip the Qt benchmarks")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.repeat, args.filter, not args.no_qt)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({"meta": metadata(), "results": results}, indent=2))
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())["results"]
+        regressions = compare(results, baseline, args.threshold)
+
+        if regressions:
+            print(f"{len(regressions)} benchmark(s) slower than the baseline", file=sys.stderr)
+            return 1
+    else:
+        for name, result in results.items():
+            print(f"{name:58} {result['median_us']:>10.3f} us")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,335 @@
+"""Built-in AI player: beam search over the placements of the current and the next tetromino.
+
+The search works on a copy of the bitboard rows. A placement is stamped into
+the rows with OR, evaluated and taken out again with XOR, so enumerating and
+scoring a board allocates nothing but the result tuple.
+"""
+from collections import deque
+
+from pyTetris.engine import Action
+from pyTetris.field import shifted_row_mask_table
+from pyTetris.tetromino import ROTATION_TABLE
+
+# https://codemyroad.wordpress.com/2013/04/14/tetris-ai-the-near-perfect-player/
+DEFAULT_WEIGHTS = {
+    "height": -0.510066,
+    "lines": 0.760666,
+    "holes": -0.35663,
+    "bumpiness": -0.184483,
+}
+
+
+def _distinct_rotations(states):
+    """Per rotation index the first index with the same cells, rotations that look alike are searched once."""
+
+    first = {}
+    distinct = []
+
+    for rotation_index, (brick_matrix, cells) in enumerate(states):
+        distinct.append(first.setdefault(frozenset(cells), rotation_index))
+
+    return tuple(distinct)
+
+
+DISTINCT_ROTATIONS = {tetromino_type: _distinct_rotations(states) for tetromino_type, states in ROTATION_TABLE.items()}
+
+
+def fits(rows, row_masks, cursor_h):
+    if row_masks is None or cursor_h + row_masks[0][0] < 0 or cursor_h + row_masks[-1][0] >= len(rows):
+        return False
+
+    for h, mask in row_masks:
+        if rows[cursor_h + h] & mask:
+            return False
+
+    return True
+
+
+def landing_row(rows, row_masks, cursor_h):
+    # the ground row is full, so the loop ends at the latest above it
+    while True:
+        cursor_h += 1
+
+        for h, mask in row_masks:
+            if rows[cursor_h + h] & mask:
+                return cursor_h - 1
+
+
+class Agent:
+    """Finds the best placement of the current tetromino, looking one (next) tetromino ahead.
+
+        Every reachable placement of the current tetromino is scored with the
+        weighted heuristic, the beam_width best ones are expanded with every
+        placement of the next tetromino and the best sum wins. A placement is
+        reachable by rotating in place and then shifting at the current row.
+    """
+
+    def __init__(self, weights=None, beam_width=16):
+        weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+
+        self.height_weight = weights["height"]
+        self.lines_weight = weights["lines"]
+        self.holes_weight = weights["holes"]
+        self.bumpiness_weight = weights["bumpiness"]
+        self.beam_width = beam_width
+
+        # evaluated boards, for statistics
+        self.evaluated_boards = 0
+
+        self.width = None
+        self.heights = None
+        self.shifted_masks = None
+
+    def prepare(self, width):
+        if width != self.width:
+            self.width = width
+            self.heights = [0] * width
+            self.shifted_masks = shifted_row_mask_table(width)
+            self.full_row = (1 << width) - 1
+            self.interior = self.full_row ^ (1 | (1 << (width - 1)))
+
+    def plan(self, engine):
+        """Actions that bring the current tetromino to the best placement, ending with a hard drop."""
+
+        self.prepare(engine.width)
+
+        rows = self.board_rows(engine)
+        tetromino = engine.current_tetromino
+        h, w = engine.playing_cursor
+        next_type = engine.next_tetromino.tetromio_type
+        next_h, next_w = engine.tetromino_type_start_cursors[next_type]
+
+        candidates = []
+
+        for placement in self.placements(rows, tetromino.tetromio_type, h, w, tetromino.rotation_index):
+            row_masks, landing_h = placement[4], placement[5]
+            lines = self.place(rows, row_masks, landing_h)
+            candidates.append((self.evaluate(rows, lines), lines, placement))
+            self.take(rows, row_masks, landing_h)
+
+        if not candidates:
+            return [Action.DROP]
+
+        candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+
+        best_score = None
+        best_placement = candidates[0][2]
+
+        for score, lines, placement in candidates[:self.beam_width]:
+            row_masks, landing_h = placement[4], placement[5]
+            self.place(rows, row_masks, landing_h)
+            board = self.cleared_rows(rows) if lines else rows
+
+            next_score = None
+
+            for next_placement in self.placements(board, next_type, next_h, next_w, 0):
+                next_masks, next_landing_h = next_placement[4], next_placement[5]
+                next_lines = self.place(board, next_masks, next_landing_h)
+                board_score = self.evaluate(board, next_lines)
+                self.take(board, next_masks, next_landing_h)
+
+                if next_score is None or board_score > next_score:
+                    next_score = board_score
+
+            self.take(rows, row_masks, landing_h)
+
+            # no room for the next tetromino: game over, only better than nothing
+            if next_score is None:
+                total = score - 1000000
+            else:
+                total = next_score + self.lines_weight * lines
+
+            if best_score is None or total > best_score:
+                best_score = total
+                best_placement = placement
+
+        rotation_action, rotation_steps, shift = best_placement[:3]
+        actions = [rotation_action] * rotation_steps
+
+        if shift < 0:
+            actions += [Action.LEFT] * -shift
+        else:
+            actions += [Action.RIGHT] * shift
+
+        actions.append(Action.DROP)
+
+        return actions
+
+    def board_rows(self, engine):
+        rows = getattr(engine.field, "rows", None)
+
+        if rows is not None:
+            return list(rows)
+
+        return [sum(1 << w for w, value in enumerate(row) if value != 0) for row in engine.field.to_list()]
+
+    def placements(self, rows, tetromino_type, cursor_h, cursor_w, rotation_index):
+        """Yields (rotation action, rotation steps, shift, rotation index, row masks, landing row) per placement."""
+
+        shifted_masks = self.shifted_masks[tetromino_type]
+        distinct = DISTINCT_ROTATIONS[tetromino_type]
+        rotation_count = len(distinct)
+        seen = 0
+
+        for rotation_action, direction in ((Action.ROTATE_CLOCKWISE, 1), (Action.ROTATE_COUNTER_CLOCKWISE, -1)):
+            rotated = rotation_index
+
+            for rotation_steps in range(rotation_count):
+                if rotation_steps:
+                    rotated = (rotated + direction) % rotation_count
+
+                masks_by_column = shifted_masks[rotated]
+
+                if not fits(rows, masks_by_column.get(cursor_w), cursor_h):
+                    break
+
+                shape = 1 << distinct[rotated]
+
+                if seen & shape:
+                    continue
+
+                seen |= shape
+
+                for step in (-1, 1):
+                    shift = 0 if step < 0 else 1
+
+                    while True:
+                        row_masks = masks_by_column.get(cursor_w + shift)
+
+                        if not fits(rows, row_masks, cursor_h):
+                            break
+
+                        yield (
+                            rotation_action,
+                            rotation_steps,
+                            shift,
+                            rotated,
+                            row_masks,
+                            landing_row(rows, row_masks, cursor_h),
+                        )
+
+                        shift += step
+
+    def place(self, rows, row_masks, cursor_h) -> int:
+        """Stamps the row masks into rows, returns the number of completed lines."""
+
+        full_row = self.full_row
+        lines = 0
+
+        for h, mask in row_masks:
+            rows[cursor_h + h] |= mask
+
+            if rows[cursor_h + h] == full_row:
+                lines += 1
+
+        return lines
+
+    def take(self, rows, row_masks, cursor_h):
+        for h, mask in row_masks:
+            rows[cursor_h + h] ^= mask
+
+    def cleared_rows(self, rows):
+        full_row = self.full_row
+        remaining = [row for row in rows[:-1] if row != full_row]
+
+        return [full_row ^ self.interior] * (len(rows) - 1 - len(remaining)) + remaining + rows[-1:]
+
+    def evaluate(self, rows, lines):
+        """Weighted aggregate height, completed lines, holes and bumpiness; completed rows count as removed."""
+
+        self.evaluated_boards += 1
+
+        full_row = self.full_row
+        interior = self.interior
+        heights = self.heights
+
+        for w in range(self.width):
+            heights[w] = 0
+
+        unknown = interior
+        covered = 0
+        holes = 0
+        height = len(rows) - 1 - lines
+
+        for h in range(len(rows) - 1):
+            row = rows[h]
+
+            if row == full_row:
+                continue
+
+            found = row & unknown
+
+            while found:
+                bit = found & -found
+                heights[bit.bit_length() - 1] = height
+                found ^= bit
+
+            unknown &= ~row
+
+            hidden = covered & ~row
+
+            if hidden:
+                holes += bin(hidden).count("1")
+
+            covered |= row & interior
+            height -= 1
+
+        aggregate_height = 0
+        bumpiness = 0
+        previous = heights[1]
+
+        for w in range(1, self.width - 1):
+            aggregate_height += heights[w]
+            bumpiness += abs(heights[w] - previous)
+            previous = heights[w]
+
+        return (
+            self.height_weight * aggregate_height
+            + self.lines_weight * lines
+            + self.holes_weight * holes
+            + self.bumpiness_weight * bumpiness
+        )
+
+
+class AgentPolicy:
+    """Simulation policy: plans every new tetromino and places it at once."""
+
+    def __init__(self, seed, agent=None):
+        self.agent = agent or Agent()
+        self.piece = None
+
+    def __call__(self, engine):
+        if engine.pieces == self.piece:
+            return []
+
+        self.piece = engine.pieces
+
+        return self.agent.plan(engine)
+
+
+class AgentDriver:
+    """Real-time play: step(engine) once per frame applies the next planned input every frames_per_action frames."""
+
+    def __init__(self, agent=None, frames_per_action=1):
+        self.agent = agent or Agent()
+        self.frames_per_action = frames_per_action
+        self.actions = deque()
+        self.piece = None
+        self.frames = 0
+
+    def step(self, engine):
+        if engine.pieces != self.piece:
+            self.piece = engine.pieces
+            self.actions = deque(self.agent.plan(engine))
+
+        self.frames += 1
+
+        if self.frames < self.frames_per_action or not self.actions:
+            return
+
+        self.frames = 0
+        action = self.actions.popleft()
+
+        # gravity pulled the tetromino below the planned path: plan again from where it is
+        if not engine.apply_action(action) and engine.pieces == self.piece:
+            self.actions = deque(self.agent.plan(engine))
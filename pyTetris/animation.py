@@ -0,0 +1,76 @@
+from collections import deque
+
+from PyQt5 import QtCore
+from PyQt5.QtCore import QElapsedTimer, QObject, QTimer
+
+
+class AnimationQueue(QObject):
+    """Plays animations one after another on the Qt event loop.
+
+        An animation is a list of steps (callables) and the time in ms
+        between two steps. Every frame applies the steps that are due, so
+        nothing sleeps and input keeps being handled while it plays.
+        A disabled queue applies all steps at once.
+    """
+
+    frame_interval = 16
+
+    def __init__(self, enabled=True, parent=None):
+        super(AnimationQueue, self).__init__(parent)
+
+        self.enabled = enabled
+        self.animations = deque()
+        self.applied_steps = 0
+        self.elapsed = QElapsedTimer()
+
+        self.timer = QTimer(self)
+        self.timer.setTimerType(QtCore.Qt.PreciseTimer)
+        self.timer.setInterval(self.frame_interval)
+        self.timer.timeout.connect(self.on_frame)
+
+    def add(self, steps, step_interval, finished=None):
+        self.animations.append((deque(steps), step_interval, finished))
+
+        if not self.enabled:
+            self.finish()
+        elif not self.timer.isActive():
+            self.start_next()
+
+    def start_next(self):
+        if self.animations:
+            self.applied_steps = 0
+            self.elapsed.start()
+            self.timer.start()
+            self.on_frame()
+        else:
+            self.timer.stop()
+
+    def on_frame(self):
+        steps, step_interval, finished = self.animations[0]
+        due_steps = int(self.elapsed.elapsed() / step_interval) + 1
+
+        while steps and self.applied_steps < due_steps:
+            steps.popleft()()
+            self.applied_steps += 1
+
+        if not steps:
+            self.animations.popleft()
+
+            if finished:
+                finished()
+
+            self.start_next()
+
+    def finish(self):
+        """Applies every pending step immediately."""
+
+        self.timer.stop()
+
+        while self.animations:
+            steps, step_interval, finished = self.animations.popleft()
+
+            for step in steps:
+                step()
+
+            if finished:
+                finished()
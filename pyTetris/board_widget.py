@@ -0,0 +1,150 @@
+from functools import lru_cache
+
+from PyQt5 import QtCore
+from PyQt5.QtCore import QRect
+from PyQt5.QtGui import QColor, QFont, QLinearGradient, QPainter, QPixmap
+from PyQt5.QtWidgets import QWidget
+
+SHADOW = -3
+BLACK = -4
+
+# (light, dark) stops of the diagonal gradient per tetromino value
+TILE_GRADIENTS = {
+    1: ("red", "#750000"),
+    2: ("orange", "#755500"),
+    3: ("#5555ff", "#222285"),
+    4: ("#55ff55", "#228522"),
+    5: ("magenta", "#750075"),
+    6: ("yellow", "#757500"),
+    7: ("#00b6be", "#006d84"),
+    # garbage rows (versus mode)
+    8: ("#9a9a9a", "#4a4a4a"),
+}
+
+
+@lru_cache(maxsize=None)
+def tile_pixmap(value, size, draw_frame=True):
+    pixmap = QPixmap(size, size)
+    painter = QPainter(pixmap)
+
+    if value > 0:
+        light, dark = TILE_GRADIENTS[value]
+        gradient = QLinearGradient(0, 0, size, size)
+        gradient.setColorAt(0, QColor(light))
+        gradient.setColorAt(1, QColor(dark))
+        painter.fillRect(0, 0, size, size, gradient)
+    elif value == 0:
+        painter.fillRect(0, 0, size, size, QColor("white"))
+
+        if draw_frame:
+            painter.setPen(QColor("#ccc"))
+            painter.drawLine(0, 0, size - 1, 0)
+            painter.drawLine(0, 0, 0, size - 1)
+    elif value == SHADOW:
+        painter.fillRect(0, 0, size, size, QColor(220, 220, 220))
+        painter.setPen(QColor("#aaa"))
+        painter.drawRect(0, 0, size - 1, size - 1)
+    else:
+        # walls, ground and animations
+        painter.fillRect(0, 0, size, size, QColor("black"))
+
+    painter.end()
+
+    return pixmap
+
+
+class BoardWidget(QWidget):
+    """Paints a field of cell values with cached tile pixmaps.
+
+        Rows above first_row are kept but not displayed. Overlays replace
+        single cells with another tile and an optional text, they are used
+        by the animations and banners and never touch the cell values.
+    """
+
+    def __init__(self, height, width, cell_size=20, first_row=0, draw_frame=True, parent=None):
+        super(BoardWidget, self).__init__(parent)
+
+        self.height = height
+        self.width = width
+        self.cell_size = cell_size
+        self.first_row = first_row
+        self.draw_frame = draw_frame
+        self.cells = [[0] * width for h in range(height)]
+        self.overlays = {}
+
+        # an Instrumentation to time the paints, None if disabled
+        self.instrumentation = None
+
+        self.setFixedSize(width * cell_size, (height - first_row) * cell_size)
+        self.setAttribute(QtCore.Qt.WA_OpaquePaintEvent)
+        self.setFocusPolicy(QtCore.Qt.NoFocus)
+
+    def cell_rect(self, h, w):
+        size = self.cell_size
+
+        return QRect(w * size, (h - self.first_row) * size, size, size)
+
+    def set_cells(self, changed_cells):
+        for h, w, value in changed_cells:
+            self.cells[h][w] = value
+
+            if h >= self.first_row:
+                self.update(self.cell_rect(h, w))
+
+    def set_field(self, field):
+        self.cells = [list(row) for row in field]
+        self.update()
+
+    def set_overlay(self, h, w, value=BLACK, text="", colour="white", point_size=10):
+        self.overlays[h, w] = (value, text, colour, point_size)
+        self.update(self.cell_rect(h, w))
+
+    def clear_overlay(self, h, w):
+        if self.overlays.pop((h, w), None):
+            self.update(self.cell_rect(h, w))
+
+    def clear_overlays(self):
+        for h, w in list(self.overlays):
+            self.clear_overlay(h, w)
+
+    def paintEvent(self, event):
+        instrumentation = self.instrumentation
+
+        if instrumentation is not None:
+            started = instrumentation.now()
+
+        size = self.cell_size
+        rect = event.rect()
+
+        first_h = max(self.first_row, self.first_row + rect.top() // size)
+        last_h = min(self.height - 1, self.first_row + rect.bottom() // size)
+        first_w = max(0, rect.left() // size)
+        last_w = min(self.width - 1, rect.right() // size)
+
+        painter = QPainter(self)
+        font = QFont(self.font())
+        font.setBold(True)
+
+        for h in range(first_h, last_h + 1):
+            y = (h - self.first_row) * size
+
+            for w in range(first_w, last_w + 1):
+                overlay = self.overlays.get((h, w))
+
+                if overlay is None:
+                    painter.drawPixmap(w * size, y, tile_pixmap(self.cells[h][w], size, self.draw_frame))
+                    continue
+
+                value, text, colour, point_size = overlay
+                painter.drawPixmap(w * size, y, tile_pixmap(value, size, self.draw_frame))
+
+                if text:
+                    font.setPointSize(point_size)
+                    painter.setFont(font)
+                    painter.setPen(QColor(colour))
+                    painter.drawText(self.cell_rect(h, w), QtCore.Qt.AlignCenter, text)
+
+        painter.end()
+
+        if instrumentation is not None:
+            instrumentation.since("paint", started)
@@ -0,0 +1,161 @@
+from PyQt5.QtCore import QObject
+from PyQt5.QtNetwork import QAbstractSocket, QTcpSocket
+
+from pyTetris.diagnostics import ENGINE_LOGGER as logger
+from pyTetris.engine import Action, Tetromino, TetrominoType
+from pyTetris.game import Game
+from pyTetris.protocol import (
+    CELLS,
+    ERROR,
+    GAME_OVER,
+    INPUT,
+    JOIN,
+    RELEASE,
+    START,
+    STATS,
+    STATS_FORMAT,
+    WELCOME,
+    WELCOME_FORMAT,
+    WINNER,
+    FrameReader,
+    encode_frame,
+    unpack_cells,
+)
+
+
+class ClientGame(Game):
+    """A game in a room of a pyTetris.server, in place of the local Game of the MainWindow.
+
+        There is no local engine: the keys are sent to the server as inputs,
+        and the board, counters and next tetromino are taken from the
+        server's frames. A network game cannot be paused.
+    """
+
+    def __init__(self, height, width, main_window, host, port, room):
+        QObject.__init__(self)
+        self.attach(main_window)
+
+        self.height = height
+        self.width = width
+        self.host = host
+        self.port = port
+        self.room = room
+        self.pause = False
+        self.replay = None
+        self.agent = None
+        self.running = False
+        self.over = False
+
+        self.index = None
+        self.players = None
+        self.seed = None
+        self.next_type = None
+        self.reader = FrameReader()
+
+        self.socket = QTcpSocket(self)
+        self.socket.connected.connect(self.on_connected)
+        self.socket.readyRead.connect(self.on_ready_read)
+        self.socket.disconnected.connect(self.on_disconnected)
+        self.socket.errorOccurred.connect(self.on_socket_error)
+
+    @property
+    def is_running(self):
+        return self.running
+
+    @is_running.setter
+    def is_running(self, value):
+        self.running = value
+
+    def start(self):
+        logger.info("connecting to %s:%d, room %s", self.host, self.port, self.room)
+        self.socket.connectToHost(self.host, self.port)
+
+    def stop(self):
+        self.running = False
+        self.player.stop()
+
+        if self.socket.state() != QAbstractSocket.UnconnectedState:
+            self.socket.disconnectFromHost()
+
+    def send(self, kind, payload=b""):
+        if self.socket.state() == QAbstractSocket.ConnectedState:
+            self.socket.write(encode_frame(kind, payload))
+
+    def handle_input(self, key, auto_repeat=False):
+        action = self.key_actions.get(key)
+
+        if action is None or not self.running:
+            return
+
+        # a held soft drop runs on the server's frame clock, not on key repeat
+        if action == Action.DOWN and auto_repeat:
+            return
+
+        self.send(INPUT, bytes((action.value,)))
+
+    def handle_release(self, key, auto_repeat=False):
+        if not auto_repeat and self.key_actions.get(key) == Action.DOWN:
+            self.send(RELEASE)
+
+    def on_connected(self):
+        self.send(JOIN, self.room.encode("utf-8"))
+
+    def on_ready_read(self):
+        for kind, payload in self.reader.feed(bytes(self.socket.readAll())):
+            self.handle_frame(kind, payload)
+
+    def handle_frame(self, kind, payload):
+        if kind == WELCOME:
+            self.index, self.players, height, width, self.seed = WELCOME_FORMAT.unpack(payload)
+
+            if (height, width) != (self.height, self.width):
+                logger.error("the server plays a %dx%d field, this window has %dx%d", height, width, self.height, self.width)
+                self.stop()
+                return
+
+            logger.info("player %d of %d in room %s, seed %d", self.index + 1, self.players, self.room, self.seed)
+        elif kind == START:
+            self.running = True
+            self.player.play()
+        elif kind == CELLS:
+            if payload[0] == self.index:
+                self.field_updated.emit(unpack_cells(payload[1:]))
+        elif kind == STATS:
+            player, score, lines, level, pending, next_type = STATS_FORMAT.unpack(payload)
+
+            if player == self.index:
+                self.score_updated.emit(score)
+                self.lines_updated.emit(lines)
+                self.level_updated.emit(level)
+
+                if next_type != self.next_type:
+                    self.next_type = next_type
+                    self.next_tetromino_updated.emit(Tetromino(TetrominoType(next_type)))
+        elif kind == GAME_OVER:
+            if payload[0] == self.index:
+                self.on_game_over()
+            else:
+                logger.info("player %d is out", payload[0] + 1)
+        elif kind == WINNER:
+            if payload[0] == self.index:
+                logger.info("won room %s", self.room)
+                self.on_game_over()
+        elif kind == ERROR:
+            logger.error("server: %s", payload.decode("utf-8", "replace"))
+            self.on_game_over()
+
+    def on_game_over(self):
+        # the server's game over, a closed connection and a socket error may all end the game
+        if not self.over:
+            self.over = True
+            Game.on_game_over(self)
+
+    def on_disconnected(self):
+        if self.running:
+            logger.warning("disconnected from %s:%d", self.host, self.port)
+            self.on_game_over()
+
+    def on_socket_error(self, error):
+        logger.error("connection to %s:%d: %s", self.host, self.port, self.socket.errorString())
+
+        self.on_game_over()
@@ -0,0 +1,77 @@
+"""Logging of the game, one logger per subsystem.
+
+The modules log to ENGINE_LOGGER, RENDER_LOGGER, AUDIO_LOGGER and
+STATS_LOGGER with lazy %-style arguments. setup_logging() puts a
+QueueHandler in front of them: the calling (GUI) thread only enqueues the
+record, formatting and all I/O run on the thread of the returned
+QueueListener.
+"""
+import logging
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+LOGGER_NAME = "pyTetris"
+
+SUBSYSTEMS = ("engine", "render", "audio", "stats")
+
+ENGINE_LOGGER = logging.getLogger(f"{LOGGER_NAME}.engine")
+RENDER_LOGGER = logging.getLogger(f"{LOGGER_NAME}.render")
+AUDIO_LOGGER = logging.getLogger(f"{LOGGER_NAME}.audio")
+STATS_LOGGER = logging.getLogger(f"{LOGGER_NAME}.stats")
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+
+class DeferredQueueHandler(QueueHandler):
+    """Enqueues records unformatted, the listener thread formats them.
+
+        The queue never leaves the process, so the record (with its args)
+        does not have to be made picklable first.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+def parse_levels(levels):
+    """'engine=debug,audio=info' -> {'engine': 'DEBUG', 'audio': 'INFO'}"""
+
+    parsed = {}
+
+    for item in levels.split(","):
+        subsystem, _, level = item.partition("=")
+        subsystem = subsystem.strip().lower()
+
+        if subsystem not in SUBSYSTEMS or not level:
+            raise ValueError(f"UNKNOWN LOG SUBSYSTEM: {item}")
+
+        parsed[subsystem] = level.strip().upper()
+
+    return parsed
+
+
+def setup_logging(level="WARNING", path=None, subsystem_levels=None):
+    """Routes the pyTetris loggers to stderr or path through a queue, returns the started QueueListener."""
+
+    if path:
+        handler = logging.FileHandler(path, encoding="utf-8")
+    else:
+        handler = logging.StreamHandler(sys.stderr)
+
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, handler)
+
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.handlers = [DeferredQueueHandler(log_queue)]
+    logger.setLevel(level.upper())
+    logger.propagate = False
+
+    for subsystem, subsystem_level in (subsystem_levels or {}).items():
+        logging.getLogger(f"{LOGGER_NAME}.{subsystem}").setLevel(subsystem_level)
+
+    listener.start()
+
+    return listener
@@ -0,0 +1,568 @@
+from enum import IntEnum, auto
+
+from pyTetris.diagnostics import ENGINE_LOGGER as logger
+from pyTetris.field import FIELD_BACKENDS
+from pyTetris.randomizer import make_generator
+from pyTetris.tetromino import COLUMN_BOTTOM_TABLE, RotationType, Tetromino, TetrominoType
+
+# https://tetris.wiki/Tetris_(Game_Boy)
+FRAMES_PER_SECOND = 59.73
+
+# frames per gravity row, by level (the last entry applies to all higher levels)
+LEVEL_SPEED_FRAMES = [53, 49, 45, 41, 37, 33, 28, 22, 17, 11, 10, 9, 8, 7, 6, 6, 5, 5, 4, 4, 3]
+
+# frames per row of a held soft drop
+SOFT_DROP_FRAMES = 3
+
+
+class Action(IntEnum):
+    LEFT = auto()
+    RIGHT = auto()
+    DOWN = auto()
+    DROP = auto()
+    ROTATE_CLOCKWISE = auto()
+    ROTATE_COUNTER_CLOCKWISE = auto()
+
+
+class GameWindowAction(IntEnum):
+    STAMP = auto()
+    NONSENSE_ROTATION = auto()
+    ROTATION = auto()
+    PAUSE_ACTIVATED = auto()
+    PAUSE_INACTIVATED = auto()
+    GAME_OVER = auto()
+    SINGLE_LINE_CLEAR = auto()
+    DOUBLE_LINE_CLEAR = auto()
+    TRIPLE_LINE_CLEAR = auto()
+    TETRIS_LINE_CLEAR = auto()  # official name for four lines (full)
+    T_SPIN_DOUBLE = auto()
+    LEVEL_UP = auto()
+    HARD_DROP = auto()
+    CLOSE_GAME = auto()
+    DONATE_LINK = auto()
+
+
+class EngineListener:
+    """Receives the events of an Engine.
+
+        Every hook is a no-op, so a headless engine (simulation, bots, tests)
+        runs without any listener at all. The Qt Game overrides them and
+        forwards the events to its signals.
+    """
+
+    def on_field_changed(self, engine):
+        pass
+
+    def on_next_tetromino(self, tetromino):
+        pass
+
+    def on_score(self, score):
+        pass
+
+    def on_level(self, level):
+        pass
+
+    def on_lines(self, lines):
+        pass
+
+    def on_pre_clear(self, rows):
+        pass
+
+    def on_game_window_action(
+            self,
+            game_window_action,
+            current_tetromino=None,
+            count_rotations=0,
+            has_minimum_3_occupied_edges=False,
+    ):
+        pass
+
+    def on_game_over(self):
+        pass
+
+
+class Engine:
+    """Pure-Python tetris rules: field, spawn, moves, rotations, stamps, line clears, scoring and levels.
+
+        Time is counted in frames: advance_frame() is one frame of a fixed
+        timestep (gravity every LEVEL_SPEED_FRAMES[level] frames, lock delay)
+        and tick is the current frame. Player input is one call of
+        apply_action(action); a soft or hard drop restarts the gravity count.
+        Drivers without a clock (simulation, bots) call step() for one
+        gravity row instead.
+    """
+
+    def __init__(self, height, width, start_level=0, listener=None, backend="list", generator=None, seed=None):
+        self.listener = listener if listener is not None else EngineListener()
+        self.generator = make_generator(generator, seed)
+
+        self.tetromino_type_start_cursors = {
+            TetrominoType.I_BRICK: (0, 4),
+            TetrominoType.J_BRICK: (1, 4),
+            TetrominoType.L_BRICK: (1, 4),
+            TetrominoType.O_BRICK: (1, 4),
+            TetrominoType.S_BRICK: (1, 4),
+            TetrominoType.T_BRICK: (1, 4),
+            TetrominoType.Z_BRICK: (1, 4),
+        }
+
+        # https://tetris.wiki/Scoring
+        self.line_score_base = [40, 100, 300, 1200]
+        self.level_speed_frames = LEVEL_SPEED_FRAMES
+
+        self.is_running = True
+        self.height = height
+        self.width = width
+        self.playing_cursor = (0, 0)
+        self.current_tetromino = None
+        self.current_tetromino_spin_matrix = None
+        self.pieces = 0
+        self.total_removed_lines = 0
+        self.soft_drops = 0
+        self.start_level = start_level
+        self.level = start_level
+        self.score = 0
+        self.tick = 0
+        self.gravity_frames_elapsed = 0
+        self.soft_drop_frames = SOFT_DROP_FRAMES
+
+        # frames a landed tetromino may still be moved before it locks (0: lock on the next gravity row)
+        self.lock_delay_frames = 0
+        self.lock_frames_elapsed = None
+
+        self.recorder = None
+        self.field = FIELD_BACKENDS[backend](height, width)
+
+        # shadow landing row per (type, rotation, column), valid until the field changes
+        self.landing_rows = {}
+        self.column_tops = None
+
+        # last frame handed out by changed_cells(), None until the first (full) frame
+        self.frame = None
+        self.frame_overlay = {}
+        self.dirty_rows = set()
+
+        self.next_tetromino = Tetromino(tetromio_type=self.generator.next())
+        self.build_next_tetromino()
+
+    def update_field(self):
+        self.listener.on_field_changed(self)
+
+    def overlay_cells(self):
+        tetromino = self.current_tetromino
+        overlay = {}
+        layers = (
+            (-3, self.shadow_cursor()),
+            (tetromino.tetromio_type.value, self.playing_cursor),
+        )
+
+        # the tetromino is drawn over its shadow
+        for value, (cursor_h, cursor_w) in layers:
+            for h, w in tetromino.cells:
+                h += cursor_h
+                w += cursor_w
+
+                if 0 <= h < self.height and 0 <= w < self.width:
+                    overlay[h, w] = value
+
+        return overlay
+
+    def invalidate_frame(self, rows=None):
+        if rows is None:
+            self.frame = None
+        elif self.frame is not None:
+            for h in rows:
+                self.frame[h] = [None] * self.width
+
+            self.dirty_rows.update(rows)
+
+    def changed_cells(self):
+        """Returns the (h, w, value) cells that differ from the previous call.
+
+            Only the old and new tetromino, the old and new shadow and rows
+            touched by a line clear are compared. The first call returns the
+            whole field.
+        """
+
+        overlay = self.overlay_cells()
+
+        if self.frame is None:
+            self.frame = [[None] * self.width for h in range(self.height)]
+            dirty = [(h, w) for h in range(self.height) for w in range(self.width)]
+        else:
+            dirty = set(overlay)
+            dirty.update(self.frame_overlay)
+
+            for h in self.dirty_rows:
+                dirty.update((h, w) for w in range(self.width))
+
+        frame = self.frame
+        field_value = self.field.value
+        changed_cells = []
+
+        for h, w in dirty:
+            value = overlay.get((h, w))
+
+            if value is None:
+                value = field_value(h, w)
+
+            if frame[h][w] != value:
+                frame[h][w] = value
+                changed_cells.append((h, w, value))
+
+        self.frame_overlay = overlay
+        self.dirty_rows.clear()
+
+        return changed_cells
+
+    def field_changed(self):
+        self.landing_rows.clear()
+        self.column_tops = None
+
+    def shadow_cursor(self):
+        h, w = self.playing_cursor
+        tetromino = self.current_tetromino
+        key = (tetromino.tetromio_type, tetromino.rotation_index, w)
+
+        landing_row = self.landing_rows.get(key)
+
+        if landing_row is None:
+            if self.column_tops is None:
+                self.column_tops = self.field.column_tops()
+
+            tops = self.column_tops
+            landing_row = min(
+                tops[w + column] - 1 - bottom
+                for column, bottom in COLUMN_BOTTOM_TABLE[tetromino.tetromio_type][tetromino.rotation_index]
+            )
+            self.landing_rows[key] = landing_row
+
+        # above the landing row the way down is free, below it (under an overhang) probe
+        if h <= landing_row:
+            return landing_row, w
+
+        return self.field.drop_row(h, w, tetromino.tetromio_type, tetromino.rotation_index), w
+
+    def gravity_frames(self) -> int:
+        return self.level_speed_frames[min(self.level, len(self.level_speed_frames) - 1)]
+
+    def advance_frame(self):
+        """One frame of the fixed timestep. Returns False once the game is over."""
+
+        if not self.is_running:
+            return False
+
+        self.tick += 1
+
+        if self.lock_frames_elapsed is not None:
+            h, w = self.playing_cursor
+
+            # moved off the edge it landed on: gravity takes over again
+            if self.is_possible((h + 1, w), self.current_tetromino):
+                self.lock_frames_elapsed = None
+            else:
+                self.lock_frames_elapsed += 1
+
+                if self.lock_frames_elapsed >= self.lock_delay_frames:
+                    self.lock_tetromino()
+
+                return self.is_running
+
+        self.gravity_frames_elapsed += 1
+
+        if self.gravity_frames_elapsed >= self.gravity_frames():
+            self.gravity_frames_elapsed = 0
+            self.step()
+
+        return self.is_running
+
+    def run_to(self, tick):
+        """Advances frame by frame until tick is reached or the game is over."""
+
+        while self.is_running and self.tick < tick:
+            self.advance_frame()
+
+        return self.is_running
+
+    def step(self):
+        """One gravity row. Returns False once the game is over."""
+
+        if not self.is_running:
+            return False
+
+        if not self.move(Action.DOWN):
+            if self.lock_delay_frames:
+                if self.lock_frames_elapsed is None:
+                    self.lock_frames_elapsed = 0
+            else:
+                self.lock_tetromino()
+
+        return self.is_running
+
+    def apply_action(self, action):
+        if not self.is_running:
+            return False
+
+        if self.recorder:
+            self.recorder.record_action(self.tick, action)
+
+        if action == Action.LEFT or action == Action.RIGHT:
+            return self.move(action)
+
+        if action == Action.DOWN or action == Action.DROP:
+            self.gravity_frames_elapsed = 0
+
+        if action == Action.DOWN:
+            self.soft_drops += 1
+
+            if not self.move(Action.DOWN):
+                self.lock_tetromino()
+                return False
+
+            return True
+
+        if action == Action.DROP:
+            self.emit_game_window_action(GameWindowAction.HARD_DROP)
+            self.move(Action.DROP)
+            self.lock_tetromino(hard_drop=True)
+            return True
+
+        if self.current_tetromino.tetromio_type == TetrominoType.O_BRICK:
+            self.emit_game_window_action(GameWindowAction.NONSENSE_ROTATION)
+            return False
+
+        if action == Action.ROTATE_CLOCKWISE:
+            rotated = self.rotate_clockwise_tetromino()
+        else:
+            rotated = self.rotate_counter_clockwise_tetromino()
+
+        if rotated:
+            self.emit_game_window_action(GameWindowAction.ROTATION)
+            self.update_field()
+
+        return rotated
+
+    def emit_game_window_action(self, game_window_action):
+        self.listener.on_game_window_action(game_window_action)
+
+    def rotate_clockwise_tetromino(self):
+        return self._rotate(RotationType.CLOCKWISE)
+
+    def rotate_counter_clockwise_tetromino(self):
+        return self._rotate(RotationType.COUNTER_CLOCKWISE)
+
+    def _rotate(self, rotation_type):
+        tetromino = self.current_tetromino
+        rotation_index = tetromino.rotated_index(rotation_type)
+        h, w = self.playing_cursor
+
+        if self.field.fits(h, w, tetromino.tetromio_type, rotation_index):
+            tetromino.rotation_index = rotation_index
+            self.current_tetromino_spin_matrix[h] += 1
+            logger.debug("rotated to %d at row %d, spins %d", rotation_index, h, self.current_tetromino_spin_matrix[h])
+            return True
+
+        return False
+
+    def move(self, action=Action.DOWN):
+        h, w = self.playing_cursor
+
+        if action == Action.DOWN:
+            h += 1
+        elif action == Action.LEFT:
+            w -= 1
+        elif action == Action.RIGHT:
+            w += 1
+        elif action == Action.DROP:
+            self.playing_cursor = self.shadow_cursor()
+            return True
+
+        new_pos = (h, w)
+
+        if self.is_possible(new_pos, self.current_tetromino):
+            self.playing_cursor = new_pos
+            self.update_field()
+
+            return True
+
+        return False
+
+    def lock_tetromino(self, hard_drop=False):
+        logger.debug(
+            "locked %s at %s on frame %d",
+            self.current_tetromino.tetromio_type.name,
+            self.playing_cursor,
+            self.tick,
+        )
+
+        self.lock_frames_elapsed = None
+        self.stamp_tetromino(hard_drop)
+        self.check_complete_lines()
+
+        # spawn next tetomino
+        if not self.build_next_tetromino():
+            self.game_over()
+
+    def game_over(self):
+        self.is_running = False
+        logger.info(
+            "game over: score %d, lines %d, level %d, pieces %d",
+            self.score,
+            self.total_removed_lines,
+            self.level,
+            self.pieces,
+        )
+        self.listener.on_game_over()
+
+    def add_garbage(self, count, hole_column):
+        """Pushes the field up by count garbage rows with a hole in hole_column. Returns False once the game is over."""
+
+        if not self.is_running or count <= 0:
+            return self.is_running
+
+        count = min(count, self.height - 1)
+        fits = self.field.add_garbage(count, hole_column)
+        self.field_changed()
+        self.invalidate_frame(range(self.height))
+
+        # the falling tetromino is pushed up with the field
+        h, w = self.playing_cursor
+        tetromino = self.current_tetromino
+
+        while not self.is_possible((h, w), tetromino) and h > -len(tetromino.brick_matrix):
+            h -= 1
+
+        logger.debug("%d garbage rows, hole in column %d", count, hole_column)
+
+        if not fits or not self.is_possible((h, w), tetromino):
+            self.update_field()
+            self.game_over()
+            return False
+
+        self.playing_cursor = (h, w)
+        self.update_field()
+
+        return True
+
+    def build_next_tetromino(self):
+        next_tetromino = self.next_tetromino
+        self.next_tetromino = Tetromino(tetromio_type=self.generator.next())
+        spawned = self.spawn(next_tetromino)
+
+        # on game over the collided tetromino is drawn in spawn
+        self.update_field()
+
+        if spawned:
+            self.pieces += 1
+            self.listener.on_next_tetromino(self.next_tetromino)
+
+        return spawned
+
+    def spawn(self, tetromino, pos=None):
+        # https://tetris.fandom.com/wiki/Tetris_Guideline
+        # (last visit 2020-03-14)
+        self.current_tetromino = tetromino
+        self.current_tetromino_spin_matrix = {row: 0 for row in range(self.height)}
+
+        tetromino_type = tetromino.tetromio_type
+
+        if pos:
+            self.playing_cursor = pos
+        else:
+            try:
+                self.playing_cursor = self.tetromino_type_start_cursors[tetromino_type]
+            except KeyError:
+                raise ValueError("UNKNOWN TETROMINO")
+
+        return self.is_possible(self.playing_cursor, self.current_tetromino)
+
+    def has_minimum_required_t_spin_occupied_edges(self) -> bool:
+        """The requirement for a t-spin event is that minmum 3 fields of the T Brick edges are occupied.
+
+            If so, return true,
+            if not, retunr false.
+        """
+
+        h, w = self.playing_cursor
+        cnt_occupied_fields = [
+            bool(self.field.value(h, w)),
+            bool(self.field.value(h + 2, w)),
+            bool(self.field.value(h, w + 2)),
+            bool(self.field.value(h + 2, w + 2)),
+        ].count(True)
+
+        return cnt_occupied_fields >= 3
+
+    def is_possible(self, pos, tetromino):
+        return self.field.fits(pos[0], pos[1], tetromino.tetromio_type, tetromino.rotation_index)
+
+    def stamp_tetromino(self, hard_drop=False):
+        if not hard_drop:
+            self.emit_game_window_action(GameWindowAction.STAMP)
+
+        h, w = self.playing_cursor
+        self.field.stamp(h, w, self.current_tetromino.tetromio_type, self.current_tetromino.rotation_index)
+        self.field_changed()
+        self.set_score(self.score + self.soft_drops)
+        self.soft_drops = 0
+
+    def check_complete_lines(self):
+        # only the rows of the stamped tetromino can have been completed
+        cursor_h = self.playing_cursor[0]
+        complete_lines = self.field.complete_lines(
+            {cursor_h + h for h, w in self.current_tetromino.cells if cursor_h + h < self.height - 1}
+        )
+
+        cnt_complete_lines = len(complete_lines)
+        if cnt_complete_lines > 0:
+            if cnt_complete_lines == 1:
+                self.emit_game_window_action(GameWindowAction.SINGLE_LINE_CLEAR)
+            elif cnt_complete_lines == 2:
+
+                if self.current_tetromino.tetromio_type == TetrominoType.T_BRICK \
+                        and self.current_tetromino_spin_matrix[self.playing_cursor[0]] > 0 \
+                        and self.has_minimum_required_t_spin_occupied_edges():
+                    self.emit_game_window_action(GameWindowAction.T_SPIN_DOUBLE)
+                else:
+                    self.emit_game_window_action(GameWindowAction.DOUBLE_LINE_CLEAR)
+            elif cnt_complete_lines == 3:
+                self.emit_game_window_action(GameWindowAction.TRIPLE_LINE_CLEAR)
+            else:
+                self.emit_game_window_action(GameWindowAction.TETRIS_LINE_CLEAR)
+
+            self.remove_complete_lines(complete_lines)
+
+        return complete_lines
+
+    def remove_complete_lines(self, complete_lines):
+        logger.debug("clearing rows %s", complete_lines)
+        self.listener.on_pre_clear(complete_lines)
+
+        self.field.remove_lines(complete_lines)
+        self.field_changed()
+        self.dirty_rows.update(range(max(complete_lines) + 1))
+        calculated_score = self.line_score_base[len(complete_lines) - 1] * (
+                self.level + 1
+        )
+
+        self.set_score(self.score + calculated_score)
+        self.set_total_removed_lines(self.total_removed_lines + len(complete_lines))
+
+    def set_score(self, value):
+        self.score = value
+        self.listener.on_score(self.score)
+
+    def set_total_removed_lines(self, value):
+        self.total_removed_lines = value
+        self.listener.on_lines(self.total_removed_lines)
+        self.update_level()
+
+    def update_level(self):
+        old_level = self.level
+
+        self.level = self.total_removed_lines // 10
+
+        if old_level < self.level:
+            logger.info("level %d after %d lines", self.level, self.total_removed_lines)
+            self.emit_game_window_action(GameWindowAction.LEVEL_UP)
+            self.listener.on_level(self.level)
@@ -0,0 +1,386 @@
+from functools import lru_cache
+
+from pyTetris.tetromino import ROTATION_TABLE
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+WALL = -1
+GROUND = -2
+
+# cell value of the garbage rows of the versus mode
+GARBAGE = 8
+
+
+def _row_masks(cells):
+    rows = {}
+
+    for h, w in cells:
+        rows[h] = rows.get(h, 0) | (1 << w)
+
+    return (
+        tuple(sorted(rows.items())),
+        min(w for h, w in cells),
+        max(w for h, w in cells),
+        min(h for h, w in cells),
+        max(h for h, w in cells),
+    )
+
+
+# per rotation state: ((row offset, bit mask at column 0), ...), min/max column, min/max row
+ROW_MASK_TABLE = {
+    tetromino_type: tuple(_row_masks(cells) for brick_matrix, cells in states)
+    for tetromino_type, states in ROTATION_TABLE.items()
+}
+
+
+@lru_cache(maxsize=None)
+def shifted_row_mask_table(width):
+    """ROW_MASK_TABLE shifted to every cursor column that keeps all cells inside the field."""
+
+    table = {}
+
+    for tetromino_type, states in ROW_MASK_TABLE.items():
+        table[tetromino_type] = []
+
+        for row_masks, min_w, max_w, min_h, max_h in states:
+            shifted = {}
+
+            for cursor_w in range(-min_w, width - max_w):
+                if cursor_w >= 0:
+                    shifted[cursor_w] = tuple((h, mask << cursor_w) for h, mask in row_masks)
+                else:
+                    shifted[cursor_w] = tuple((h, mask >> -cursor_w) for h, mask in row_masks)
+
+            table[tetromino_type].append(shifted)
+
+    return table
+
+
+class ListField:
+    """The field as a list of rows of cell values, walls (-1) and ground (-2) included."""
+
+    def __init__(self, height, width):
+        self.height = height
+        self.width = width
+        self.cells = [[0] * self.width for i in range(self.height)]
+        self.initialise_field(self.cells)
+
+    def initialise_field(self, field):
+        # initialise/draw walls and ground
+        for h in range(self.height):
+            field[h][0] = WALL
+            field[h][-1] = WALL
+
+        for w in range(self.width):
+            field[-1][w] = GROUND
+
+    def to_list(self):
+        return [row[:] for row in self.cells]
+
+    def from_list(self, field):
+        """Replaces the cells with those of a to_list() field."""
+
+        self.cells = [list(row) for row in field]
+
+    def value(self, h, w):
+        return self.cells[h][w]
+
+    def fits(self, cursor_h, cursor_w, tetromino_type, rotation_index):
+        cells = self.cells
+
+        for h, w in ROTATION_TABLE[tetromino_type][rotation_index][1]:
+            h += cursor_h
+            w += cursor_w
+
+            if not (0 <= h < self.height and 0 <= w < self.width) or cells[h][w] != 0:
+                return False
+
+        return True
+
+    def column_tops(self):
+        """Row of the highest occupied cell per column."""
+
+        tops = [self.height - 1] * self.width
+
+        for w in range(self.width):
+            for h in range(self.height):
+                if self.cells[h][w] != 0:
+                    tops[w] = h
+                    break
+
+        return tops
+
+    def drop_row(self, cursor_h, cursor_w, tetromino_type, rotation_index):
+        while self.fits(cursor_h + 1, cursor_w, tetromino_type, rotation_index):
+            cursor_h += 1
+
+        return cursor_h
+
+    def stamp(self, cursor_h, cursor_w, tetromino_type, rotation_index):
+        value = tetromino_type.value
+
+        for h, w in ROTATION_TABLE[tetromino_type][rotation_index][1]:
+            self.cells[cursor_h + h][cursor_w + w] = value
+
+    def complete_lines(self, rows=None):
+        if rows is None:
+            rows = range(self.height - 1)
+
+        complete_lines = []
+
+        for h in sorted(rows, reverse=True):
+            if 0 in self.cells[h]:
+                continue
+
+            complete_lines.append(h)
+
+        return complete_lines
+
+    def remove_lines(self, complete_lines):
+        new_field = [[0] * self.width for i in range(self.height)]
+        self.initialise_field(new_field)
+
+        row_behind = 0
+        for h in reversed(range(self.height - 1)):
+            if h in complete_lines:
+                row_behind += 1
+                continue
+
+            for w in range(1, self.width - 1):
+                new_field[h + row_behind][w] = self.cells[h][w]
+
+        self.cells = new_field
+
+    def add_garbage(self, count, hole_column):
+        """Pushes the field up by count garbage rows with a hole. False if cells were pushed out at the top."""
+
+        topped_out = any(value != 0 for row in self.cells[:count] for value in row[1:-1])
+
+        garbage = [WALL] + [GARBAGE] * (self.width - 2) + [WALL]
+        garbage[hole_column] = 0
+
+        self.cells = self.cells[count:-1] + [garbage[:] for h in range(count)] + self.cells[-1:]
+
+        return not topped_out
+
+
+class BitboardField:
+    """The field as one integer bit mask per row, walls and ground included.
+
+        Collision is an AND of the tetromino's precomputed row masks against
+        the field rows, a line is complete when its mask equals full_row.
+        The cell values (colours) are kept in a side array for rendering.
+    """
+
+    def __init__(self, height, width):
+        self.height = height
+        self.width = width
+        self.full_row = (1 << width) - 1
+        self.empty_row = 1 | (1 << (width - 1))
+
+        self.rows = [self.empty_row] * (height - 1) + [self.full_row]
+        self.colours = ListField(height, width).cells
+        self.shifted_masks = shifted_row_mask_table(width)
+
+    def to_list(self):
+        return [row[:] for row in self.colours]
+
+    def from_list(self, field):
+        """Replaces the cells with those of a to_list() field."""
+
+        self.colours = [list(row) for row in field]
+        self.rows = [sum(1 << w for w, value in enumerate(row) if value != 0) for row in field]
+
+    def value(self, h, w):
+        return self.colours[h][w]
+
+    def fits(self, cursor_h, cursor_w, tetromino_type, rotation_index):
+        row_masks = self.shifted_masks[tetromino_type][rotation_index].get(cursor_w)
+
+        if row_masks is None:
+            return False
+
+        rows = self.rows
+
+        if cursor_h + row_masks[0][0] < 0 or cursor_h + row_masks[-1][0] >= self.height:
+            return False
+
+        for h, mask in row_masks:
+            if rows[cursor_h + h] & mask:
+                return False
+
+        return True
+
+    def column_tops(self):
+        """Row of the highest occupied cell per column."""
+
+        tops = [self.height - 1] * self.width
+        unknown = self.full_row
+
+        for h, row in enumerate(self.rows):
+            found = row & unknown
+
+            while found:
+                bit = found & -found
+                tops[bit.bit_length() - 1] = h
+                found ^= bit
+
+            unknown &= ~row
+
+            if not unknown:
+                break
+
+        return tops
+
+    def drop_row(self, cursor_h, cursor_w, tetromino_type, rotation_index):
+        row_masks = self.shifted_masks[tetromino_type][rotation_index][cursor_w]
+        rows = self.rows
+
+        # the ground row is full, so the loop ends at the latest above it
+        while True:
+            cursor_h += 1
+
+            for h, mask in row_masks:
+                if rows[cursor_h + h] & mask:
+                    return cursor_h - 1
+
+    def stamp(self, cursor_h, cursor_w, tetromino_type, rotation_index):
+        value = tetromino_type.value
+
+        for h, w in ROTATION_TABLE[tetromino_type][rotation_index][1]:
+            self.rows[cursor_h + h] |= 1 << (cursor_w + w)
+            self.colours[cursor_h + h][cursor_w + w] = value
+
+    def complete_lines(self, rows=None):
+        if rows is None:
+            rows = range(self.height - 1)
+
+        full_row = self.full_row
+
+        return [h for h in sorted(rows, reverse=True) if self.rows[h] == full_row]
+
+    def remove_lines(self, complete_lines):
+        removed = set(complete_lines)
+        kept = [h for h in range(self.height - 1) if h not in removed]
+
+        empty_colours = [0] * self.width
+        empty_colours[0] = WALL
+        empty_colours[-1] = WALL
+
+        self.rows = [self.empty_row] * len(removed) + [self.rows[h] for h in kept] + [self.full_row]
+        self.colours = (
+                [empty_colours[:] for h in removed]
+                + [self.colours[h] for h in kept]
+                + [self.colours[-1]]
+        )
+
+    def add_garbage(self, count, hole_column):
+        """Pushes the field up by count garbage rows with a hole. False if cells were pushed out at the top."""
+
+        topped_out = any(row != self.empty_row for row in self.rows[:count])
+
+        garbage_colours = [WALL] + [GARBAGE] * (self.width - 2) + [WALL]
+        garbage_colours[hole_column] = 0
+
+        self.rows = self.rows[count:-1] + [self.full_row ^ (1 << hole_column)] * count + [self.full_row]
+        self.colours = self.colours[count:-1] + [garbage_colours[:] for h in range(count)] + self.colours[-1:]
+
+        return not topped_out
+
+
+class NumpyField:
+    """The field as an int8 2-D NumPy array, walls and ground included.
+
+        Meant for tall boards and batch simulations: complete lines are found
+        with one row-wise all() over the rows of the stamped tetromino and
+        removed with a single array move.
+    """
+
+    def __init__(self, height, width):
+        if numpy is None:
+            raise ImportError("the numpy field backend requires numpy")
+
+        self.height = height
+        self.width = width
+        self.cells = numpy.zeros((height, width), dtype=numpy.int8)
+        self.cells[:, 0] = WALL
+        self.cells[:, -1] = WALL
+        self.cells[-1, :] = GROUND
+
+    def to_list(self):
+        return self.cells.tolist()
+
+    def from_list(self, field):
+        """Replaces the cells with those of a to_list() field."""
+
+        self.cells[:] = numpy.array(field, dtype=numpy.int8)
+
+    def value(self, h, w):
+        return self.cells.item(h, w)
+
+    def fits(self, cursor_h, cursor_w, tetromino_type, rotation_index):
+        item = self.cells.item
+
+        for h, w in ROTATION_TABLE[tetromino_type][rotation_index][1]:
+            h += cursor_h
+            w += cursor_w
+
+            if not (0 <= h < self.height and 0 <= w < self.width) or item(h, w) != 0:
+                return False
+
+        return True
+
+    def column_tops(self):
+        """Row of the highest occupied cell per column."""
+
+        return (self.cells != 0).argmax(axis=0).tolist()
+
+    def drop_row(self, cursor_h, cursor_w, tetromino_type, rotation_index):
+        while self.fits(cursor_h + 1, cursor_w, tetromino_type, rotation_index):
+            cursor_h += 1
+
+        return cursor_h
+
+    def stamp(self, cursor_h, cursor_w, tetromino_type, rotation_index):
+        cells = ROTATION_TABLE[tetromino_type][rotation_index][1]
+        self.cells[
+            [cursor_h + h for h, w in cells],
+            [cursor_w + w for h, w in cells],
+        ] = tetromino_type.value
+
+    def complete_lines(self, rows=None):
+        if rows is None:
+            rows = range(self.height - 1)
+
+        rows = numpy.array(sorted(rows, reverse=True), dtype=numpy.intp)
+        complete = self.cells[rows].all(axis=1)
+
+        return rows[complete].tolist()
+
+    def remove_lines(self, complete_lines):
+        count = len(complete_lines)
+        kept = numpy.delete(self.cells[:-1], complete_lines, axis=0)
+
+        self.cells[count:-1] = kept
+        self.cells[:count, 1:-1] = 0
+
+    def add_garbage(self, count, hole_column):
+        """Pushes the field up by count garbage rows with a hole. False if cells were pushed out at the top."""
+
+        topped_out = bool(self.cells[:count, 1:-1].any())
+
+        self.cells[:-1 - count] = self.cells[count:-1].copy()
+        self.cells[-1 - count:-1, 1:-1] = GARBAGE
+        self.cells[-1 - count:-1, hole_column] = 0
+
+        return not topped_out
+
+
+FIELD_BACKENDS = {
+    "list": ListField,
+    "bitboard": BitboardField,
+    "numpy": NumpyField,
+}
@@ -0,0 +1,48 @@
+import time
+
+from pyTetris.engine import FRAMES_PER_SECOND
+
+
+class FrameClock:
+    """Counts the frames of a fixed timestep on the monotonic, high-resolution time.perf_counter_ns().
+
+        The frame is always computed from the total played time, so timer
+        jitter only delays a frame, it never adds up to drift. Paused time
+        does not count.
+    """
+
+    def __init__(self, frames_per_second=FRAMES_PER_SECOND):
+        # integer math: frames per 100 seconds
+        self.frames_per_100_seconds = round(frames_per_second * 100)
+        self.played_ns = 0
+        self.started_ns = None
+
+    @property
+    def is_running(self) -> bool:
+        return self.started_ns is not None
+
+    def start(self):
+        if self.started_ns is None:
+            self.started_ns = time.perf_counter_ns()
+
+    def pause(self):
+        if self.started_ns is not None:
+            self.played_ns += time.perf_counter_ns() - self.started_ns
+            self.started_ns = None
+
+    def elapsed_ns(self) -> int:
+        if self.started_ns is None:
+            return self.played_ns
+
+        return self.played_ns + time.perf_counter_ns() - self.started_ns
+
+    def frame(self) -> int:
+        return self.elapsed_ns() * self.frames_per_100_seconds // 100_000_000_000
+
+    def frame_start_ns(self, frame) -> int:
+        return frame * 100_000_000_000 // self.frames_per_100_seconds
+
+    def ticks(self, tick_rate) -> int:
+        """Elapsed time in ticks of another rate (ticks per second)."""
+
+        return int(self.elapsed_ns() * tick_rate // 1_000_000_000)
@@ -1,322 +1,163 @@
-import random
-from copy import deepcopy
-from enum import IntEnum, auto
+import time
 from pathlib import Path
-from random import choice
 
 from PyQt5 import QtCore
 from PyQt5.QtCore import pyqtSignal, QObject, QTimer, QUrl
-from PyQt5.QtMultimedia import QMediaContent, QMediaPlayer, QMediaPlaylist, QSound
-
-
-class TetrominoType(IntEnum):
-    I_BRICK = auto()
-    J_BRICK = auto()
-    L_BRICK = auto()
-    O_BRICK = auto()
-    S_BRICK = auto()
-    T_BRICK = auto()
-    Z_BRICK = auto()
-
-
-class Action(IntEnum):
-    LEFT = auto()
-    RIGHT = auto()
-    DOWN = auto()
-    DROP = auto()
-
-
-class RotationType(IntEnum):
-    CLOCKWISE = auto()
-    COUNTER_CLOCKWISE = auto()
-
-
-class GameWindowAction(IntEnum):
-    STAMP = auto()
-    NONSENSE_ROTATION = auto()
-    ROTATION = auto()
-    PAUSE_ACTIVATED = auto()
-    PAUSE_INACTIVATED = auto()
-    GAME_OVER = auto()
-    SINGLE_LINE_CLEAR = auto()
-    DOUBLE_LINE_CLEAR = auto()
-    TRIPLE_LINE_CLEAR = auto()
-    TETRIS_LINE_CLEAR = auto()  # official name for four lines (full)
-    T_SPIN_DOUBLE = auto()
-    LEVEL_UP = auto()
-    HARD_DROP = auto()
-    CLOSE_GAME = auto()
-    DONATE_LINK = auto()
-
-
-class Tetromino:
-    def __init__(self, tetromio_type):
-        self.tetromio_type = tetromio_type
-        self.rotation_index = 0
-        self.brick_matrix = None
-        self.rotate(RotationType.CLOCKWISE, start_index=-1)
-
-    def rotate(self, rotation_type, start_index=None):
-        if start_index:
-            self.rotation_index = start_index
-
-        if self.tetromio_type == TetrominoType.I_BRICK:
-            self.brick_matrix = self.rotate_I_brick(rotation_type)
-        elif self.tetromio_type == TetrominoType.J_BRICK:
-            self.brick_matrix = self.rotate_J_brick(rotation_type)
-        elif self.tetromio_type == TetrominoType.L_BRICK:
-            self.brick_matrix = self.rotate_L_brick(rotation_type)
-        elif self.tetromio_type == TetrominoType.O_BRICK:
-            self.brick_matrix = self.rotate_O_brick(rotation_type)
-        elif self.tetromio_type == TetrominoType.S_BRICK:
-            self.brick_matrix = self.rotate_S_brick(rotation_type)
-        elif self.tetromio_type == TetrominoType.T_BRICK:
-            self.brick_matrix = self.rotate_T_brick(rotation_type)
-        elif self.tetromio_type == TetrominoType.Z_BRICK:
-            self.brick_matrix = self.rotate_Z_brick(rotation_type)
-
-    def rotate_I_brick(self, rotation_type):
-        if rotation_type == RotationType.CLOCKWISE:
-            self.rotation_index = (self.rotation_index + 1) % 2
-        else:
-            self.rotation_index = (self.rotation_index - 1) % 2
-
-        t = TetrominoType.I_BRICK.value
-
-        if self.rotation_index == 0:
-            return [[0, 0, 0, 0], [0, 0, 0, 0], [t, t, t, t], [0, 0, 0, 0]]
-        elif self.rotation_index == 1:
-            return [[0, t, 0, 0], [0, t, 0, 0], [0, t, 0, 0], [0, t, 0, 0]]
-
-    def rotate_J_brick(self, rotation_type):
-        if rotation_type == RotationType.CLOCKWISE:
-            self.rotation_index = (self.rotation_index + 1) % 4
-        else:
-            self.rotation_index = (self.rotation_index - 1) % 4
-
-        t = TetrominoType.J_BRICK.value
-
-        if self.rotation_index == 0:
-            return [[0, 0, 0], [t, t, t], [0, 0, t]]
-        elif self.rotation_index == 1:
-            return [[0, t, 0], [0, t, 0], [t, t, 0]]
-        elif self.rotation_index == 2:
-            return [[t, 0, 0], [t, t, t], [0, 0, 0]]
-        elif self.rotation_index == 3:
-            return [[0, t, t], [0, t, 0], [0, t, 0]]
-
-    def rotate_L_brick(self, rotation_type):
-        if rotation_type == RotationType.CLOCKWISE:
-            self.rotation_index = (self.rotation_index + 1) % 4
-        else:
-            self.rotation_index = (self.rotation_index - 1) % 4
-
-        t = TetrominoType.L_BRICK.value
-
-        if self.rotation_index == 0:
-            return [[0, 0, 0], [t, t, t], [t, 0, 0]]
-        elif self.rotation_index == 1:
-            return [[t, t, 0], [0, t, 0], [0, t, 0]]
-        elif self.rotation_index == 2:
-            return [[0, 0, t], [t, t, t], [0, 0, 0]]
-        elif self.rotation_index == 3:
-            return [[0, t, 0], [0, t, 0], [0, t, t]]
-
-    def rotate_O_brick(self, rotation_type):
-        t = TetrominoType.O_BRICK.value
-
-        return [[0, 0, 0, 0], [0, t, t, 0], [0, t, t, 0], [0, 0, 0, 0]]
-
-    def rotate_S_brick(self, rotation_type):
-        if rotation_type == RotationType.CLOCKWISE:
-            self.rotation_index = (self.rotation_index + 1) % 2
-        else:
-            self.rotation_index = (self.rotation_index - 1) % 2
-
-        t = TetrominoType.S_BRICK.value
-
-        if self.rotation_index == 0:
-            return [[0, 0, 0], [0, t, t], [t, t, 0]]
-        elif self.rotation_index == 1:
-            return [[t, 0, 0], [t, t, 0], [0, t, 0]]
-
-    def rotate_T_brick(self, rotation_type):
-        if rotation_type == RotationType.CLOCKWISE:
-            self.rotation_index = (self.rotation_index + 1) % 4
-        else:
-            self.rotation_index = (self.rotation_index - 1) % 4
-
-        t = TetrominoType.T_BRICK.value
-
-        if self.rotation_index == 0:
-            return [
-                [0, 0, 0],
-                [t, t, t],
-                [0, t, 0]
-            ]
-        elif self.rotation_index == 1:
-            return [[0, t, 0], [t, t, 0], [0, t, 0]]
-        elif self.rotation_index == 2:
-            return [[0, t, 0], [t, t, t], [0, 0, 0]]
-        elif self.rotation_index == 3:
-            return [[0, t, 0], [0, t, t], [0, t, 0]]
-
-    def rotate_Z_brick(self, rotation_type):
-        if rotation_type == RotationType.CLOCKWISE:
-            self.rotation_index = (self.rotation_index + 1) % 2
-        else:
-            self.rotation_index = (self.rotation_index - 1) % 2
-
-        t = TetrominoType.Z_BRICK.value
-
-        if self.rotation_index == 0:
-            return [[0, 0, 0], [t, t, 0], [0, t, t]]
-        elif self.rotation_index == 1:
-            return [[0, t, 0], [t, t, 0], [t, 0, 0]]
-
-
-class SoundManager(QObject):
-    def __init__(self, parent):
-        super(SoundManager, self).__init__(parent)
-
-    def on_game_window_action(
-            self,
-            game_window_action,
-            current_tetromino=None,
-            count_rotations=0,
-            has_minimum_3_occupied_edges=False,
-    ):
-        if game_window_action == GameWindowAction.ROTATION:
-            rand_num = random.randrange(1, 8)  # currently 7 sounds available
-
-            sound = str(Path(__file__).parent / "sounds" / f"rotate_{rand_num}.wav")
-            QSound.play(sound)
-
-            # DEBUG
-            print(f"sounds/rotate_{rand_num}.wav")
-
-        # ROTATION
-        elif game_window_action == GameWindowAction.NONSENSE_ROTATION:
-            rand_num = random.randrange(1, 8)  # currently 7 sounds available
-
-            sound = str(Path(__file__).parent / "sounds" / f"nonsense_rotate_{rand_num}.wav")
-            QSound.play(sound)
-
-            # DEBUG
-            print(f"sounds/nonsense_rotate_{rand_num}.wav")
-
-        # PAUSE
-        elif game_window_action == GameWindowAction.PAUSE_ACTIVATED:
-            sound = str(Path(__file__).parent / "sounds" / "pause_on.wav")
-            QSound.play(sound)
-
-            # DEBUG
-            print(f"sounds/pause_on.wav")
-
-        # PAUSE
-        elif game_window_action == GameWindowAction.PAUSE_INACTIVATED:
-            sound = str(Path(__file__).parent / "sounds" / "pause_off.wav")
-            QSound.play(sound)
-
-            # DEBUG
-            print(f"sounds/pause_off.wav")
-
-        # STAMP
-        elif game_window_action == GameWindowAction.STAMP:
-            rand_num = random.randrange(1, 3)  # currently 2 sounds available
-
-            sound = str(Path(__file__).parent / "sounds" / f"stamp_{rand_num}.wav")
-            QSound.play(sound)
+from PyQt5.QtMultimedia import QMediaContent, QMediaPlayer, QMediaPlaylist
+
+from pyTetris.agent import AgentDriver
+from pyTetris.diagnostics import ENGINE_LOGGER as logger
+from pyTetris.engine import (
+    Action,
+    Engine,
+    EngineListener,
+    FRAMES_PER_SECOND,
+    GameWindowAction,
+    Tetromino,
+)
+from pyTetris.frame_clock import FrameClock
+from pyTetris.protocol import GAME_OVER, START
+from pyTetris.replay import ReplayPlayer, ReplayRecorder
+from pyTetris import snapshot
+from pyTetris.sound_manager import SoundManager
+
+
+# game window actions recorded as events of a game in the stats store
+STATS_EVENTS = {
+    GameWindowAction.STAMP,
+    GameWindowAction.HARD_DROP,
+    GameWindowAction.SINGLE_LINE_CLEAR,
+    GameWindowAction.DOUBLE_LINE_CLEAR,
+    GameWindowAction.TRIPLE_LINE_CLEAR,
+    GameWindowAction.TETRIS_LINE_CLEAR,
+    GameWindowAction.T_SPIN_DOUBLE,
+}
+
+
+class Game(QObject, EngineListener):
+    """Qt adapter of the Engine: timers, music, sounds and signals for the MainWindow.
+
+        A single FrameClock drives the engine: every timeout of frame_timer
+        advances the engine to the clock's current frame, and every input is
+        applied on that frame. A held soft drop moves down every
+        soft_drop_frames frames.
+
+        With agent, the built-in Agent plays instead of the keyboard, one
+        input per frame through the same apply_action as a player.
+
+        A live game records its inputs and saves the replay when it stops.
+        Given a Replay, the game plays the recorded events back at
+        replay_speed instead and ignores every key but P.
+
+        With the main_window's snapshot_path, a live game saves a snapshot
+        after every placed tetromino and when it is quit, and deletes it on
+        game over. Given resume, the (Engine, stats events) restored from
+        such a snapshot, the game continues it instead of starting a new
+        one. A suspended game is written to the stats store once it ends.
+    """
 
-            # DEBUG
-            print(f"sounds/stamp_{rand_num}.wav")
-
-        # LINE CLEAR
-        elif (
-                game_window_action == GameWindowAction.SINGLE_LINE_CLEAR
-                or game_window_action == GameWindowAction.TRIPLE_LINE_CLEAR
-                or game_window_action == GameWindowAction.DOUBLE_LINE_CLEAR
-        ):
-            rand_num = random.randrange(1, 4)  # currently 3 sounds available
-
-            sound = str(Path(__file__).parent / "sounds" / f"clear_line_{rand_num}.wav")
-            QSound.play(sound)
-
-            # DEBUG
-            print(f"sounds/clear_line_{rand_num}.wav")
-
-        # TETRIS CLEAR
-        elif game_window_action == GameWindowAction.TETRIS_LINE_CLEAR:
-            rand_num = random.randrange(1, 4)  # currently 3 sounds available
-
-            sound = str(Path(__file__).parent / "sounds" / f"clear_tetris_{rand_num}.wav")
-            QSound.play(sound)
-
-            # DEBUG
-            print(f"sounds/clear_tetris_{rand_num}.wav")
-
-        # T SPIN DOUBLE
-        elif game_window_action == GameWindowAction.T_SPIN_DOUBLE:
-            sound = str(Path(__file__).parent / "sounds" / "schadenfreude_1.wav")
-            QSound.play(sound)
-
-            # DEBUG
-            print(f"sounds/schadenfreude_1.wav")
-
-        # LEVEL UP
-        elif game_window_action == GameWindowAction.LEVEL_UP:
-            rand_num = random.randrange(1, 3)  # currently 2 sounds available
-
-            sound = str(Path(__file__).parent / "sounds" / f"level_up_{rand_num}.wav")
-            QSound.play(sound)
-
-            # DEBUG
-            print(f"sounds/level_up_{rand_num}.wav")
-
-        # HARD DROP
-        elif game_window_action == GameWindowAction.HARD_DROP:
-            rand_num = random.randrange(1, 3)  # currently 2 sounds available
-
-            sound = str(Path(__file__).parent / "sounds" / f"hard_drop_{rand_num}.wav")
-            QSound.play(sound)
-
-            # DEBUG
-            print(f"sounds/hard_drop_{rand_num}.wav")
-
-        # GAME OVER
-        elif game_window_action == GameWindowAction.GAME_OVER:
-            sound = str(Path(__file__).parent / "sounds" / f"game_over.wav")
-            QSound.play(sound)
-
-            # DEBUG
-            print(f"sounds/game_over.wav")
-
-
-class Game(QObject):
     next_tetromino_updated = pyqtSignal(Tetromino)
     field_updated = pyqtSignal(list)
     score_updated = pyqtSignal(int)
     level_updated = pyqtSignal(int)
     lines_updated = pyqtSignal(int)
-    stamped_tetromino = pyqtSignal()
+    pause_updated = pyqtSignal(bool)
     pre_clear = pyqtSignal(list)
+    game_over = pyqtSignal()
     game_window_action = pyqtSignal(
         [GameWindowAction],
         [GameWindowAction, Tetromino, int, bool],
     )
 
-    def __init__(self, height, width, main_window, start_level=0):
+    key_actions = {
+        QtCore.Qt.Key_Left: Action.LEFT,
+        QtCore.Qt.Key_A: Action.LEFT,
+        QtCore.Qt.Key_Right: Action.RIGHT,
+        QtCore.Qt.Key_D: Action.RIGHT,
+        QtCore.Qt.Key_Down: Action.DOWN,
+        QtCore.Qt.Key_S: Action.DOWN,
+        QtCore.Qt.Key_Space: Action.DROP,
+        QtCore.Qt.Key_K: Action.ROTATE_CLOCKWISE,
+        QtCore.Qt.Key_J: Action.ROTATE_COUNTER_CLOCKWISE,
+    }
+
+    # ms between two catch-ups with the frame clock, well below a frame (16.7 ms)
+    frame_timer_interval = 4
+
+    def __init__(
+            self,
+            height,
+            width,
+            main_window,
+            start_level=0,
+            generator=None,
+            seed=None,
+            replay=None,
+            replay_speed=1,
+            replay_directory=None,
+            agent=False,
+            resume=None,
+    ):
         QObject.__init__(self)
+        self.attach(main_window)
 
-        self.tetromino_type_start_cursors = {
-            TetrominoType.I_BRICK: (0, 4),
-            TetrominoType.J_BRICK: (1, 4),
-            TetrominoType.L_BRICK: (1, 4),
-            TetrominoType.O_BRICK: (1, 4),
-            TetrominoType.S_BRICK: (1, 4),
-            TetrominoType.T_BRICK: (1, 4),
-            TetrominoType.Z_BRICK: (1, 4),
-        }
+        # the engine hands out its first (whole) field while it is built
+        if self.spectator_feed is not None:
+            self.spectator_feed.publish_event(START)
+
+        self.height = height
+        self.width = width
+        self.pause = False
+        self.frame_timer = None
+        self.clock = FrameClock(FRAMES_PER_SECOND)
+
+        # frame the held soft drop started on, None if not held
+        self.soft_drop_frame = None
+
+        self.replay = replay
+        self.replay_speed = replay_speed
+        self.replay_directory = replay_directory
+        self.replay_player = None
+        self.recorder = None
+
+        self.agent = AgentDriver() if agent and not replay else None
+
+        # (tick, kind, piece, column, rotation) of this game for the stats store, None if not recorded
+        self.stats_events = [] if self.stats_store is not None and not replay and not agent else None
+
+        if replay:
+            self.engine = replay.create_engine(listener=self, backend="bitboard")
+            self.replay_player = ReplayPlayer(replay, self.engine)
+        elif resume:
+            # the replay of a resumed game would miss its beginning, it is not recorded
+            self.engine, events = resume
+            self.engine.listener = self
+
+            if self.stats_events is not None:
+                self.stats_events = list(events)
+
+            # the clock goes on from the engine's frame, not from 0
+            self.clock.played_ns = self.clock.frame_start_ns(self.engine.tick)
+        else:
+            self.engine = Engine(
+                height,
+                width,
+                start_level,
+                listener=self,
+                backend="bitboard",
+                generator=generator,
+                seed=seed,
+            )
+            self.recorder = ReplayRecorder(self.engine, FRAMES_PER_SECOND)
+            self.engine.recorder = self.recorder
+
+        self.resumed = resume is not None
+
+        # where the snapshot of this game is kept, None if it has none; set once the engine exists
+        self.snapshot_path = self.main_window.snapshot_path if not replay and not agent else None
+
+    def attach(self, main_window):
+        """Music, sounds and the connections to the main_window's slots."""
 
         self.tetris_music = str(Path(__file__).parent / "sounds" / "Tetris_theme.wav")
 
@@ -329,7 +170,11 @@ class Game(QObject):
         self.player.setVolume(50)
 
         self.main_window = main_window
-        self.sound_manager = SoundManager(self)
+        self.instrumentation = main_window.instrumentation
+        self.spectator_feed = main_window.spectator_feed
+        self.stats_store = main_window.stats_store
+        self.snapshot_path = None
+        self.sound_manager = SoundManager(self, main_window.sound_bank, self.instrumentation)
 
         # Connections
         self.game_window_action.connect(self.sound_manager.on_game_window_action)
@@ -338,427 +183,253 @@ class Game(QObject):
         self.score_updated.connect(self.main_window.on_score_update)
         self.level_updated.connect(self.main_window.on_level_update)
         self.lines_updated.connect(self.main_window.on_lines_update)
-        self.lines_updated.connect(self.update_level)
-        self.stamped_tetromino.connect(self.check_complete_lines)
+        self.pause_updated.connect(self.main_window.on_pause_update)
         self.pre_clear.connect(self.main_window.pre_clear_animation)
 
-        # https://tetris.wiki/Scoring
-        self.line_score_base = [40, 100, 300, 1200]
-
-        # https://tetris.wiki/Tetris_(Game_Boy)
-        self.frames_per_second = 59.73
-        self.level_speed_frames = [
-            53,
-            49,
-            45,
-            41,
-            37,
-            33,
-            28,
-            22,
-            17,
-            11,
-            10,
-            9,
-            8,
-            7,
-            6,
-            6,
-            5,
-            5,
-            4,
-            4,
-            3,
-        ]
-        self.on_hard_dropping = False
-        self.is_running = False
-        self.height = height
-        self.width = width
-        self.playing_cursor = (0, 0)
-        self.current_tetromino = None
-        self.current_tetromino_spin_matrix = None
-        # PROPERTY!
-        self._total_removed_lines = 0
-        self.soft_drops = 0
-        self.level = start_level
-        # PROPERTY!
-        self._score = 0
-        self.field = [[0] * self.width for i in range(self.height)]
-        self.initialise_field(self.field)
-
-        self.pause = False
-        self.move_timer = None
-        self.collision_detected = False
-        self.next_tetromino = Tetromino(tetromio_type=choice(list(TetrominoType)))
-        self.build_next_tetromino()
-
-    def initialise_field(self, field):
-        # initialise/draw walls and ground
-        for h in range(self.height):
-            field[h][0] = -1
-            field[h][-1] = -1
-
-        for w in range(self.width):
-            field[-1][w] = -2
-
-    def update_field(self):
-        final_field = deepcopy(self.field)
-        self.draw_shadow_tetromino(final_field)
-        self.merge_tetromino_with_field(self.current_tetromino, final_field)
-        self.field_updated.emit(final_field)
-
-    def draw_shadow_tetromino(self, final_field):
-        shadow_h, shadow_w = self.playing_cursor
-
-        while self.is_possible((shadow_h, shadow_w), self.current_tetromino):
-            shadow_h += 1
+    @property
+    def is_running(self):
+        return self.engine.is_running
 
-        shadow_h -= 1
+    @is_running.setter
+    def is_running(self, value):
+        self.engine.is_running = value
 
-        shadow_cursor = (shadow_h, shadow_w)
+    def on_field_changed(self, engine):
+        instrumentation = self.instrumentation
 
-        self.merge_tetromino_with_field(self.current_tetromino, final_field, shadow_cursor)
+        if instrumentation is None:
+            changed_cells = engine.changed_cells()
+        else:
+            started = instrumentation.now()
+            changed_cells = engine.changed_cells()
+            instrumentation.since("engine", started)
 
-    def on_game_over(self):
-        self.sound_manager.on_game_window_action(GameWindowAction.GAME_OVER)
+        self.field_updated.emit(changed_cells)
 
-    def handle_input(self, key):
-        # MOVE
-        if (key == QtCore.Qt.Key_Left or key == QtCore.Qt.Key_A) and not self.pause:
-            self.move(Action.LEFT)
-
-        # MOVE
-        elif (key == QtCore.Qt.Key_Right or key == QtCore.Qt.Key_D) and not self.pause:
-            self.move(Action.RIGHT)
-
-        # MOVE
-        elif (key == QtCore.Qt.Key_Down or key == QtCore.Qt.Key_S) and not self.pause:
-            self.move_timer.stop()
-            self.move(Action.DOWN)
-            self.move_timer.setInterval(self.calculate_move_speed())
-            self.move_timer.start()
-            self.soft_drops += 1
-
-        # ROTATION
-        elif key == QtCore.Qt.Key_K and not self.pause:
-            if self.current_tetromino.tetromio_type == TetrominoType.O_BRICK:
-                self.game_window_action.emit(GameWindowAction.NONSENSE_ROTATION)
-            elif self.rotate_clockwise_tetromino():
-                self.game_window_action.emit(GameWindowAction.ROTATION)
-
-        # ROTATION
-        elif key == QtCore.Qt.Key_J and not self.pause:
-            if self.current_tetromino.tetromio_type == TetrominoType.O_BRICK:
-                self.game_window_action.emit(GameWindowAction.NONSENSE_ROTATION)
-            else:
-                if self.rotate_counter_clockwise_tetromino():
-                    self.game_window_action.emit(GameWindowAction.ROTATION)
+        if self.spectator_feed is not None:
+            self.spectator_feed.publish_cells(changed_cells)
 
-        # HARD DROP
-        elif key == QtCore.Qt.Key_Space and not self.pause:
-            self.game_window_action.emit(GameWindowAction.HARD_DROP)
-            self.move_timer.stop()
-            self.move(Action.DROP)
-            self.move_timer.setInterval(self.calculate_move_speed())
-            self.move_timer.start()
+    def on_next_tetromino(self, tetromino):
+        self.next_tetromino_updated.emit(tetromino)
 
-        # PAUSE
-        elif key == QtCore.Qt.Key_P:
-            self.pause_game()
+        if self.spectator_feed is not None:
+            self.spectator_feed.publish_stat("next", tetromino.tetromio_type.value)
 
-        if key != QtCore.Qt.Key_P and not self.pause:
-            self.update_field()
+        # a new tetromino: the last one was placed
+        if self.snapshot_path is not None:
+            self.save_snapshot()
 
-    def pause_game(self, play_sound=True):
-        self.pause = not self.pause
+    def on_score(self, score):
+        self.score_updated.emit(score)
 
-        if self.pause:
-            if play_sound:
-                self.game_window_action.emit(GameWindowAction.PAUSE_ACTIVATED)
+        if self.spectator_feed is not None:
+            self.spectator_feed.publish_stat("score", score)
 
-            self.move_timer.stop()
-            self.main_window.game_timer.stop()
-            self.main_window.write_pause()
+    def on_level(self, level):
+        self.level_updated.emit(level)
 
-            self.player.pause()
-        else:
-            self.player.play()
+        if self.spectator_feed is not None:
+            self.spectator_feed.publish_stat("level", level)
 
-            if play_sound:
-                self.game_window_action.emit(GameWindowAction.PAUSE_INACTIVATED)
+    def on_lines(self, lines):
+        self.lines_updated.emit(lines)
 
-            self.move_timer.start()
-            self.main_window.game_timer.start()
-            self.main_window.clear_pause_label()
+        if self.spectator_feed is not None:
+            self.spectator_feed.publish_stat("lines", lines)
 
-    def rotate_clockwise_tetromino(self):
-        return self._rotate(RotationType.CLOCKWISE)
+    def on_pre_clear(self, rows):
+        self.pre_clear.emit(rows)
 
-    def rotate_counter_clockwise_tetromino(self):
-        return self._rotate(RotationType.COUNTER_CLOCKWISE)
+    def on_game_window_action(self, game_window_action, *args):
+        self.game_window_action.emit(game_window_action)
 
-    def _rotate(self, rotation_type):
-        rotated_tetromino = deepcopy(self.current_tetromino)
-        rotated_tetromino.rotate(rotation_type)
+        if self.stats_events is not None and game_window_action in STATS_EVENTS:
+            tetromino = self.engine.current_tetromino
+            self.stats_events.append(
+                (
+                    self.engine.tick,
+                    game_window_action.value,
+                    tetromino.tetromio_type.value,
+                    self.engine.playing_cursor[1],
+                    tetromino.rotation_index,
+                )
+            )
 
-        if self.is_possible(self.playing_cursor, rotated_tetromino):
-            self.current_tetromino = rotated_tetromino
-            self.current_tetromino_spin_matrix[self.playing_cursor[0]] += 1
-            print("row:", self.playing_cursor[0], "count:", self.current_tetromino_spin_matrix[self.playing_cursor[0]])
-            return True
+    def on_game_over(self):
+        self.stop()
+        self.game_over.emit()
 
-        return False
+        if self.spectator_feed is not None:
+            self.spectator_feed.publish_event(GAME_OVER)
 
-    def move(self, action=Action.DOWN):
-        h, w = self.playing_cursor
+    def play_game_over_sound(self):
+        self.sound_manager.on_game_window_action(GameWindowAction.GAME_OVER)
 
-        if action == Action.DOWN:
-            h += 1
-        elif action == Action.LEFT:
-            w -= 1
-        elif action == Action.RIGHT:
-            w += 1
-        elif action == Action.DROP:
-            self.on_hard_dropping = True
-
-            while self.move(Action.DOWN):
-                pass
-
-            # self.on_hard_dropping = False
+    def handle_input(self, key, auto_repeat=False):
+        # PAUSE
+        if key == QtCore.Qt.Key_P:
+            if not auto_repeat:
+                self.pause_game()
             return
 
-        new_pos = (h, w)
-
-        if self.is_possible(new_pos, self.current_tetromino):
-            self.playing_cursor = new_pos
-
-            if not self.on_hard_dropping:
-                self.update_field()
-
-            return True
-        else:
-            if action != Action.LEFT and action != Action.RIGHT:
-                self.collision_detected = True
-
-            return False
-
-    def calculate_move_speed(self) -> int:
-        level = min(self.level, len(self.level_speed_frames) - 1)
-        speed_frames = self.level_speed_frames[level]
+        action = self.key_actions.get(key)
 
-        return int((speed_frames / self.frames_per_second) * 1000)
-
-    def running(self):
-        if not self.move_timer:
-            self.move_timer = QTimer()
-            self.move_timer.timeout.connect(self.move)
-            self.move_timer.start(self.calculate_move_speed())
-            self.update_field()
+        if action is None or self.pause or self.replay or self.agent:
+            return
 
-            # if first round, start in pause-mode
-            if self.main_window.rounds == 1:
-                self.pause_game()
+        # a held soft drop runs on the frame clock, not on key repeat
+        if action == Action.DOWN and auto_repeat:
+            return
 
-        if self.collision_detected:
-            self.stamp_tetromino()
+        # the input lands on the current frame
+        self.run_frames()
 
-            # spawn next tetomino
-            self.collision_detected = self.build_next_tetromino()
+        if action == Action.DOWN:
+            self.soft_drop_frame = self.engine.tick
 
-            self.is_running = not self.collision_detected
+        self.engine.apply_action(action)
 
-        return self.is_running
+    def handle_release(self, key, auto_repeat=False):
+        if not auto_repeat and self.key_actions.get(key) == Action.DOWN:
+            self.soft_drop_frame = None
 
-    def build_next_tetromino(self):
-        next_tetromino = self.next_tetromino
-        self.next_tetromino = Tetromino(tetromio_type=choice(list(TetrominoType)))
-        if self.spawn(next_tetromino):
-            self.update_field()
-            self.next_tetromino_updated.emit(self.next_tetromino)
-            return False
-        else:
-            # draw collided tetromino in spawn (game over collision)
-            self.update_field()
-            return True
+    def pause_game(self, play_sound=True):
+        self.pause = not self.pause
 
-    def spawn(self, tetromino, pos=None):
-        # https://tetris.fandom.com/wiki/Tetris_Guideline
-        # (last visit 2020-03-14)
-        self.current_tetromino = tetromino
-        self.current_tetromino_spin_matrix = {row: 0 for row in range(self.height)}
+        if self.pause:
+            if play_sound:
+                self.game_window_action.emit(GameWindowAction.PAUSE_ACTIVATED)
 
-        tetromino_type = tetromino.tetromio_type
+            self.frame_timer.stop()
+            self.clock.pause()
+            self.soft_drop_frame = None
+            self.pause_updated.emit(True)
 
-        if pos:
-            self.playing_cursor = pos
+            self.player.pause()
         else:
-            try:
-                self.playing_cursor = self.tetromino_type_start_cursors[tetromino_type]
-            except KeyError:
-                raise ValueError("UNKNOWN TETROMINO")
-
-        return self.is_possible(self.playing_cursor, self.current_tetromino)
-
-    def has_minimum_required_t_spin_occupied_edges(self) -> bool:
-        """The requirement for a t-spin event is that minmum 3 fields of the T Brick edges are occupied.
+            self.player.play()
 
-            If so, return true,
-            if not, retunr false.
-        """
+            if play_sound:
+                self.game_window_action.emit(GameWindowAction.PAUSE_INACTIVATED)
 
-        h, w = self.playing_cursor
-        cnt_occupied_fields = [
-            bool(self.field[h][w]),
-            bool(self.field[h + 2][w]),
-            bool(self.field[h][w + 2]),
-            bool(self.field[h + 2][w + 2]),
-        ].count(True)
+            self.clock.start()
+            self.frame_timer.start()
+            self.pause_updated.emit(False)
 
-        return cnt_occupied_fields >= 3
+    def run_frames(self):
+        """Advances the engine to the current frame of the clock."""
 
-    def is_possible(self, pos, tetromino):
-        future_cursor_h, future_cursor_w = pos
+        if self.replay:
+            self.replay_player.advance_to(self.clock.ticks(self.replay.tick_rate * self.replay_speed))
 
-        tetromino_h = len(tetromino.brick_matrix)
-        tetromino_w = len(tetromino.brick_matrix[0])
+            # a recording that was cut off ends without game over
+            if self.replay_player.finished and self.is_running:
+                self.on_game_over()
 
-        for h in range(tetromino_h):
-            for w in range(tetromino_w):
-                value = tetromino.brick_matrix[h][w]
+            return
 
-                if value != 0:
-                    if (future_cursor_h + h) not in range(self.height) or (
-                            future_cursor_w + w
-                    ) not in range(self.width):
-                        return False
+        engine = self.engine
+        frame = self.clock.frame()
+        instrumentation = self.instrumentation
 
-                    field_value = self.field[future_cursor_h + h][future_cursor_w + w]
+        while engine.is_running and engine.tick < frame:
+            engine.advance_frame()
 
-                    if field_value != 0:
-                        return False
+            # a gravity row just fell: how late is its frame handled
+            if instrumentation is not None and engine.gravity_frames_elapsed == 0:
+                late = self.clock.elapsed_ns() - self.clock.frame_start_ns(engine.tick)
+                instrumentation.record("gravity", late)
 
-        return True
+            if self.soft_drop_frame is not None and (engine.tick - self.soft_drop_frame) % engine.soft_drop_frames == 0:
+                engine.apply_action(Action.DOWN)
 
-    def stamp_tetromino(self):
-        if self.on_hard_dropping:
-            self.on_hard_dropping = False
-        else:
-            self.game_window_action.emit(GameWindowAction.STAMP)
-
-        self.merge_tetromino_with_field(self.current_tetromino, self.field)
-        self.stamped_tetromino.emit()
-        self.score += self.soft_drops
-        self.soft_drops = 0
-
-    def check_complete_lines(self):
-        complete_lines = []
-
-        for h in reversed(range(self.height - 1)):
-            completed_line = True
-
-            for w in range(1, self.width - 1):
-                if self.field[h][w] == 0:
-                    completed_line = False
-                    break
-
-            if completed_line:
-                complete_lines.append(h)
-
-        cnt_complete_lines = len(complete_lines)
-        if cnt_complete_lines > 0:
-            if cnt_complete_lines == 1:
-                self.game_window_action.emit(GameWindowAction.SINGLE_LINE_CLEAR)
-            elif cnt_complete_lines == 2:
-
-                if self.current_tetromino.tetromio_type == TetrominoType.T_BRICK \
-                        and self.current_tetromino_spin_matrix[self.playing_cursor[0]] > 0 \
-                        and self.has_minimum_required_t_spin_occupied_edges():
-                    self.game_window_action.emit(GameWindowAction.T_SPIN_DOUBLE)
-                else:
-                    self.game_window_action.emit(GameWindowAction.DOUBLE_LINE_CLEAR)
-            elif cnt_complete_lines == 3:
-                self.game_window_action.emit(GameWindowAction.TRIPLE_LINE_CLEAR)
-            else:
-                self.game_window_action.emit(GameWindowAction.TETRIS_LINE_CLEAR)
+            if self.agent and engine.is_running:
+                self.agent.step(engine)
 
-            self.remove_complete_lines(complete_lines)
+    def start(self):
+        self.frame_timer = QTimer()
+        self.frame_timer.setTimerType(QtCore.Qt.PreciseTimer)
+        self.frame_timer.timeout.connect(self.run_frames)
+        self.frame_timer.start(self.frame_timer_interval)
 
-    def remove_complete_lines(self, complete_lines):
-        self.main_window.pre_clear_animation(complete_lines)
+        self.clock.start()
+        self.engine.update_field()
 
-        new_field = [[0] * self.width for i in range(self.height)]
-        self.initialise_field(new_field)
+        # a new engine hands these out while it is built, a restored one does not
+        if self.resumed:
+            self.on_score(self.engine.score)
+            self.on_level(self.engine.level)
+            self.on_lines(self.engine.total_removed_lines)
+            self.on_next_tetromino(self.engine.next_tetromino)
 
-        row_behind = 0
-        for h in reversed(range(self.height - 1)):
-            if h in complete_lines:
-                row_behind += 1
-                continue
+        # if first round, start in pause-mode
+        if self.main_window.rounds == 1 and not self.replay:
+            self.pause_game()
 
-            for w in range(1, self.width - 1):
-                new_field[h + row_behind][w] = self.field[h][w]
+    def stop(self):
+        game_over = not self.is_running
+        self.is_running = False
 
-        self.field = new_field
-        calculated_score = self.line_score_base[len(complete_lines) - 1] * (
-                self.level + 1
-        )
+        if self.frame_timer:
+            self.frame_timer.stop()
 
-        self.score += calculated_score
-        self.total_removed_lines += len(complete_lines)
+        self.clock.pause()
+        self.player.stop()
 
-    @property
-    def total_removed_lines(self):
-        return self._total_removed_lines
+        if self.recorder and not self.recorder.finished:
+            self.recorder.finish(self.engine.tick, self.engine.score)
+            path = self.recorder.default_path(self.replay_directory)
 
-    @total_removed_lines.setter
-    def total_removed_lines(self, value):
-        self._total_removed_lines = value
-        self.lines_updated.emit(self._total_removed_lines)
+            try:
+                self.recorder.save(path)
+            except OSError:
+                logger.exception("could not save the replay to %s", path)
+            else:
+                logger.info("saved replay %s", path)
 
-    @property
-    def score(self):
-        return self._score
+        # a suspended game is recorded when it ends, after it is resumed
+        suspended = False
 
-    @score.setter
-    def score(self, value):
-        self._score = value
-        self.score_updated.emit(self._score)
+        if self.snapshot_path is not None:
+            if game_over:
+                snapshot.delete(self.snapshot_path)
+            else:
+                suspended = self.save_snapshot(self.stats_events or ())
 
-    def update_level(self):
-        old_level = self.level
+            self.snapshot_path = None
 
-        self.level = self.total_removed_lines // 10
+        if self.stats_events and not suspended:
+            self.record_stats(game_over)
 
-        if old_level < self.level:
-            self.game_window_action.emit(GameWindowAction.LEVEL_UP)
+        self.stats_events = None
 
-            self.level_updated.emit(self.level)
-            self.update_speed()
+    def save_snapshot(self, events=()) -> bool:
+        """Saves the engine and events to snapshot_path, False (and no more autosaves) if it cannot."""
 
-    def update_speed(self):
-        self.move_timer.setInterval(self.calculate_move_speed())
+        try:
+            snapshot.save(self.snapshot_path, snapshot.snapshot(self.engine, events))
+        except OSError:
+            logger.exception("could not save the snapshot to %s, autosave is off", self.snapshot_path)
+            self.snapshot_path = None
+            return False
 
-    def merge_tetromino_with_field(self, tetromino, field, shadowed_pos=None):
-        if shadowed_pos:
-            cursor_h, cursor_w = shadowed_pos
-        else:
-            cursor_h, cursor_w = self.playing_cursor
+        return True
 
-        tetromino_h = len(tetromino.brick_matrix)
-        tetromino_w = len(tetromino.brick_matrix[0])
+    def record_stats(self, game_over):
+        engine = self.engine
+        game = {
+            "ended_at": time.time(),
+            "day": time.strftime("%Y-%m-%d"),
+            "start_level": engine.start_level,
+            "score": engine.score,
+            "lines": engine.total_removed_lines,
+            "level": engine.level,
+            "seconds": round(engine.tick / FRAMES_PER_SECOND, 3),
+            "pieces": engine.pieces,
+            "generator": engine.generator.name,
+            "seed": engine.generator.seed,
+            "game_over": int(game_over),
+        }
 
-        try:
-            for h in range(tetromino_h):
-                for w in range(tetromino_w):
-                    if (cursor_h + h) in range(self.height) and (cursor_w + w) in range(
-                            self.width
-                    ):
-                        value = tetromino.brick_matrix[h][w]
-
-                        if value != 0:
-                            if shadowed_pos:
-                                field[cursor_h + h][cursor_w + w] = -3
-                            else:
-                                field[cursor_h + h][cursor_w + w] = value
-        except Exception as e:
-            print(e)
+        # the store's writer thread does the inserts
+        self.stats_store.record_game(game, self.stats_events)
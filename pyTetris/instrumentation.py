@@ -0,0 +1,113 @@
+"""Opt-in latency instrumentation (pyTetris --profile).
+
+Hooks in the Game, MainWindow, BoardWidget and SoundManager only check
+`instrumentation is not None` while disabled. Enabled, they add one
+perf_counter_ns() difference per event to a fixed-size ring buffer;
+percentiles are computed from the buffers only for the overlay and the dump.
+"""
+import json
+import time
+from pathlib import Path
+
+# metric name: description
+METRICS = {
+    "input": "key press -> engine applied",
+    "engine": "engine -> field_updated emitted",
+    "render": "on_field_update (set cells)",
+    "paint": "board paint",
+    "gravity": "gravity row jitter (late by)",
+    "sound": "sound dispatch",
+}
+
+
+class RingBuffer:
+    """The last `size` samples; a new sample overwrites the oldest one."""
+
+    __slots__ = ("samples", "size", "count", "position")
+
+    def __init__(self, size):
+        self.samples = [0] * size
+        self.size = size
+        self.count = 0
+        self.position = 0
+
+    def add(self, value):
+        self.samples[self.position] = value
+        self.position = (self.position + 1) % self.size
+
+        if self.count < self.size:
+            self.count += 1
+
+    def values(self):
+        """Samples from the oldest to the newest."""
+
+        if self.count < self.size:
+            return self.samples[:self.count]
+
+        return self.samples[self.position:] + self.samples[:self.position]
+
+    def percentile(self, percent):
+        values = sorted(self.values())
+
+        if not values:
+            return None
+
+        return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+class Instrumentation:
+    def __init__(self, size=4096):
+        self.started = time.strftime("%Y-%m-%d %H:%M:%S")
+        self.buffers = {name: RingBuffer(size) for name in METRICS}
+
+    @staticmethod
+    def now():
+        return time.perf_counter_ns()
+
+    def record(self, name, nanoseconds):
+        self.buffers[name].add(nanoseconds)
+
+    def since(self, name, started_ns):
+        self.buffers[name].add(time.perf_counter_ns() - started_ns)
+
+    def summary(self):
+        """{metric: {count, p50_ms, p99_ms, max_ms}} of the samples in the buffers."""
+
+        summary = {}
+
+        for name, buffer in self.buffers.items():
+            values = buffer.values()
+
+            summary[name] = {
+                "count": buffer.count,
+                "p50_ms": round(buffer.percentile(50) / 1e6, 3) if values else None,
+                "p99_ms": round(buffer.percentile(99) / 1e6, 3) if values else None,
+                "max_ms": round(max(values) / 1e6, 3) if values else None,
+            }
+
+        return summary
+
+    def overlay_text(self):
+        lines = [f"{'ms':7} {'p50':>6} {'p99':>6}"]
+
+        for name, statistics in self.summary().items():
+            if statistics["count"]:
+                lines.append(f"{name:7} {statistics['p50_ms']:6.2f} {statistics['p99_ms']:6.2f}")
+            else:
+                lines.append(f"{name:7} {'-':>6} {'-':>6}")
+
+        return "\n".join(lines)
+
+    def dump(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        data = {
+            "started": self.started,
+            "dumped": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "metrics": METRICS,
+            "summary": self.summary(),
+            # raw samples in ns, oldest first
+            "samples": {name: buffer.values() for name, buffer in self.buffers.items()},
+        }
+        path.write_text(json.dumps(data))
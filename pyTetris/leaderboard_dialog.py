@@ -0,0 +1,60 @@
+import time
+
+from PyQt5.QtWidgets import QComboBox, QDialog, QHeaderView, QLabel, QTableWidget, QTableWidgetItem, QVBoxLayout
+
+from pyTetris.stats import today
+
+HEADERS = ["Score", "Lines", "Level", "Start", "Time", "Date"]
+
+
+class LeaderboardDialog(QDialog):
+    """Top games of a StatsStore: all time, today or per start level. Every view is one indexed query."""
+
+    def __init__(self, stats_store, count=20, parent=None):
+        super(LeaderboardDialog, self).__init__(parent)
+
+        self.stats_store = stats_store
+        self.count = count
+        self.setWindowTitle("Leaderboard")
+
+        self.filter_box = QComboBox()
+        self.filters = [("All time", {}), ("Today", {"day": today()})]
+        self.filters += [(f"Start level {level}", {"start_level": level}) for level in stats_store.start_levels()]
+
+        for name, query in self.filters:
+            self.filter_box.addItem(name)
+
+        self.filter_box.currentIndexChanged.connect(self.show_filter)
+
+        self.table = QTableWidget(0, len(HEADERS))
+        self.table.setHorizontalHeaderLabels(HEADERS)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+
+        self.summary_label = QLabel(f"{stats_store.games_played()} games played")
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.filter_box)
+        layout.addWidget(self.table)
+        layout.addWidget(self.summary_label)
+
+        self.resize(460, 520)
+        self.show_filter(0)
+
+    def show_filter(self, index):
+        games = self.stats_store.top(self.count, **self.filters[index][1])
+        self.table.setRowCount(len(games))
+
+        for row, game in enumerate(games):
+            minutes, seconds = divmod(int(game["seconds"]), 60)
+            values = [
+                game["score"],
+                game["lines"],
+                game["level"],
+                game["start_level"],
+                f"{minutes:02d}:{seconds:02d}",
+                time.strftime("%Y-%m-%d %H:%M", time.localtime(game["ended_at"])),
+            ]
+
+            for column, value in enumerate(values):
+                self.table.setItem(row, column, QTableWidgetItem(str(value)))
@@ -1,16 +1,200 @@
+import argparse
+import sqlite3
 import sys
+from pathlib import Path
 from PyQt5.QtWidgets import QApplication
-from pyTetris.main_window import MainWindow
+from pyTetris.diagnostics import STATS_LOGGER, parse_levels, setup_logging
+from pyTetris.instrumentation import Instrumentation
+from pyTetris.randomizer import GENERATORS
+from pyTetris.replay import Replay
+from pyTetris.snapshot import SNAPSHOT_PATH
+from pyTetris.spectator import DEFAULT_PORT as DEFAULT_SPECTATOR_PORT, SpectatorFeed
+from pyTetris.stats import DEFAULT_PATH as STATS_PATH, StatsStore
+from pyTetris.versus import MAX_BOARDS, MIN_BOARDS
+
+
+def parse_address(address):
+    host, _, port = address.rpartition(":")
+
+    if not host or not port.isdigit():
+        raise argparse.ArgumentTypeError(f"HOST:PORT expected, not {address}")
+
+    return host, int(port)
 
 
 def main():
-    app = QApplication([])
+    parser = argparse.ArgumentParser(prog="pyTetris")
+    parser.add_argument(
+        "--no-animations",
+        action="store_true",
+        help="skip line clear, pause and game over animations (speed runs, bots)",
+    )
+    parser.add_argument(
+        "--generator",
+        choices=sorted(GENERATORS),
+        default="uniform",
+        help="piece generator (default: uniform)",
+    )
+    parser.add_argument("--agent", action="store_true", help="let the built-in AI play")
+    parser.add_argument(
+        "--versus",
+        type=int,
+        choices=range(MIN_BOARDS, MAX_BOARDS + 1),
+        metavar="BOARDS",
+        help=f"versus mode against bots with {MIN_BOARDS} to {MAX_BOARDS} boards (with --agent, bots only)",
+    )
+    parser.add_argument(
+        "--connect",
+        type=parse_address,
+        metavar="HOST:PORT",
+        help="play in a room of a pyTetris.server (python -m pyTetris.server)",
+    )
+    parser.add_argument("--room", default="lobby", help="room to join with --connect (default: lobby)")
+    parser.add_argument(
+        "--broadcast",
+        nargs="?",
+        type=int,
+        const=DEFAULT_SPECTATOR_PORT,
+        metavar="PORT",
+        help=f"publish the game to spectators on localhost (default port: {DEFAULT_SPECTATOR_PORT})",
+    )
+    parser.add_argument(
+        "--spectate",
+        type=parse_address,
+        metavar="HOST:PORT",
+        help="watch a game published with --broadcast",
+    )
+    parser.add_argument("--replay", metavar="FILE", help="play back a recorded .ptr replay")
+    parser.add_argument(
+        "--replay-speed",
+        type=int,
+        choices=[1, 2, 8],
+        default=1,
+        help="playback speed of --replay (default: 1)",
+    )
+    parser.add_argument(
+        "--replay-dir",
+        help="where the replays of played games are saved (default: ~/.pyTetris/replays)",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const=str(Path.home() / ".pyTetris" / "profile.json"),
+        metavar="FILE",
+        help="record latencies (F3 shows p50/p99) and dump them to FILE on exit (default: ~/.pyTetris/profile.json)",
+    )
+    parser.add_argument(
+        "--log-level",
+        default="WARNING",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        type=str.upper,
+        help="level of all log messages (default: WARNING)",
+    )
+    parser.add_argument(
+        "--log",
+        type=parse_levels,
+        default={},
+        metavar="SUBSYSTEM=LEVEL,...",
+        help="levels per subsystem (engine, render, audio, stats), e.g. engine=debug",
+    )
+    parser.add_argument("--log-file", help="write the log to this file instead of stderr")
+    parser.add_argument(
+        "--stats-db",
+        default=str(STATS_PATH),
+        metavar="FILE",
+        help=f"high score and statistics database (default: {STATS_PATH})",
+    )
+    parser.add_argument("--no-stats", action="store_true", help="do not record the played games")
+    parser.add_argument(
+        "--autosave",
+        default=str(SNAPSHOT_PATH),
+        metavar="FILE",
+        help=f"the running game is saved there and resumed on the next start (default: {SNAPSHOT_PATH})",
+    )
+    parser.add_argument("--no-autosave", action="store_true", help="neither save nor resume the running game")
+    args, qt_args = parser.parse_known_args()
+
+    log_listener = setup_logging(args.log_level, args.log_file, args.log)
+
+    replay = Replay.load(args.replay) if args.replay else None
+
+    app = QApplication(sys.argv[:1] + qt_args)
+
+    # imported here: the spawned versus workers import this module, but need no windows
+    if args.versus:
+        from pyTetris.versus_window import VersusWindow
+
+        versus_window = VersusWindow(args.versus, generator=args.generator, human=not args.agent)
+        versus_window.show()
+
+        exit_code = app.exec_() or 0
+        log_listener.stop()
+        sys.exit(exit_code)
+
+    if args.spectate:
+        from pyTetris.spectator_window import SpectatorWindow
 
-    main_window = MainWindow(23, 12)
+        spectator_window = SpectatorWindow(*args.spectate)
+        spectator_window.show()
+
+        exit_code = app.exec_() or 0
+        log_listener.stop()
+        sys.exit(exit_code)
+
+    from pyTetris.main_window import MainWindow
+
+    spectator_feed = None
+
+    if args.broadcast:
+        spectator_feed = SpectatorFeed(
+            23 if replay is None else replay.height,
+            12 if replay is None else replay.width,
+            port=args.broadcast,
+        )
+        spectator_feed.start()
+
+    stats_store = None
+
+    if not args.no_stats:
+        try:
+            stats_store = StatsStore(args.stats_db)
+        except (OSError, sqlite3.Error) as e:
+            STATS_LOGGER.warning("no statistics, %s: %s", args.stats_db, e)
+        else:
+            stats_store.start()
+
+    main_window = MainWindow(
+        23 if replay is None else replay.height,
+        12 if replay is None else replay.width,
+        animations_enabled=not args.no_animations,
+        generator=args.generator,
+        replay=replay,
+        replay_speed=args.replay_speed,
+        replay_directory=args.replay_dir,
+        agent=args.agent,
+        instrumentation=Instrumentation() if args.profile else None,
+        profile_output=args.profile,
+        server=(*args.connect, args.room) if args.connect else None,
+        spectator_feed=spectator_feed,
+        stats_store=stats_store,
+        snapshot_path=None if args.no_autosave else args.autosave,
+    )
     main_window.start_new_game_timer.start()
     main_window.show()
 
-    sys.exit(app.exec_() or 0)
+    exit_code = app.exec_() or 0
+
+    if spectator_feed is not None:
+        spectator_feed.stop()
+
+    # writes the games still queued
+    if stats_store is not None:
+        stats_store.close()
+
+    # flushes the queued records
+    log_listener.stop()
+
+    sys.exit(exit_code)
 
 
 if __name__ == "__main__":
@@ -1,20 +1,80 @@
 import functools
-import time
 from itertools import count
 from pathlib import Path
 from PyQt5 import uic, QtCore
 from PyQt5.QtCore import QTimer, QUrl, pyqtSignal, QSize
 from PyQt5.QtGui import QPixmap, QPalette, QBrush, QImage
-from PyQt5.QtMultimedia import QMediaPlayer, QMediaContent, QSound
-from PyQt5.QtWidgets import QMainWindow, QApplication, QPushButton, QMessageBox
+from PyQt5.QtMultimedia import QMediaPlayer, QMediaContent
+from PyQt5.QtWidgets import QLabel, QMainWindow, QPushButton, QMessageBox
+from pyTetris.animation import AnimationQueue
+from pyTetris.board_widget import BLACK, TILE_GRADIENTS, BoardWidget
+from pyTetris.diagnostics import RENDER_LOGGER as logger
+from pyTetris.client import ClientGame
 from pyTetris.game import Game
+from pyTetris.engine import FRAMES_PER_SECOND
+from pyTetris.leaderboard_dialog import LeaderboardDialog
+from pyTetris import snapshot
+from pyTetris.sound_manager import SoundBank
 import webbrowser
 
+DEFAULT_CELL_STYLESHEET = (
+    "border: 0px; border-top: 1px solid #ccc; border-left: 1px solid #ccc; background-color: white;"
+)
+
+
+def build_cell_stylesheet(cell_value, draw_frame):
+    stylesheet = []
+
+    if cell_value > 0:
+        stylesheet.append("border: 0px")
+        light, dark = TILE_GRADIENTS[cell_value]
+        stylesheet.append(
+            f"background-color: qlineargradient( x1:0 y1:0, x2:1 y2:1, stop:0 {light}, stop:1 {dark})"
+        )
+    elif cell_value == 0:
+        if draw_frame:
+            stylesheet.append(DEFAULT_CELL_STYLESHEET)
+        else:
+            stylesheet.append("border: 0px")
+
+        stylesheet.append("background-color: white")
+    elif cell_value == -3:
+        stylesheet.append("background-color: rgb(220, 220, 220); border: 1px solid #aaa;")
+    else:
+        stylesheet.append("background-color: black")
+
+    return "; ".join(stylesheet)
+
+
+# final stylesheet per (cell value, draw frame)
+CELL_STYLESHEETS = {
+    (cell_value, draw_frame): build_cell_stylesheet(cell_value, draw_frame)
+    for cell_value in range(-3, len(TILE_GRADIENTS) + 1)
+    for draw_frame in (True, False)
+}
+
 
 class MainWindow(QMainWindow):
     game_over_signal = pyqtSignal()
 
-    def __init__(self, field_height, field_width, parent=None):
+    def __init__(
+            self,
+            field_height,
+            field_width,
+            parent=None,
+            animations_enabled=True,
+            generator=None,
+            replay=None,
+            replay_speed=1,
+            replay_directory=None,
+            agent=False,
+            instrumentation=None,
+            profile_output=None,
+            server=None,
+            spectator_feed=None,
+            stats_store=None,
+            snapshot_path=None,
+    ):
         super(MainWindow, self).__init__(parent)
         uic.loadUi(Path(__file__).parent / "ui" / "main_window.ui", self)
 
@@ -23,27 +83,56 @@ class MainWindow(QMainWindow):
         background_image_2 = str(Path(__file__).parent / "ui" / "danatur.tv_tetris_halloween-bg.jpg")
         background_image_3 = str(Path(__file__).parent / "ui" / "danatur.tv_tetris_matrix-bg.jpg")
 
-        self.default_cell_stylesheet = (
-            f"border: 0px; border-top: 1px solid #ccc; border-left: 1px solid #ccc; background-color: white;"
-        )
+        # last (cell value, draw frame) set by update_button, per button
+        self.applied_button_styles = {}
 
         # Connections
         self.actionAbout_Qt.triggered.connect(self.on_about_qt)
         self.action_Controls.triggered.connect(self.on_controls_dialog)
+        self.action_Leaderboard.triggered.connect(self.on_leaderboard_dialog)
         self.action_About_pyTetris.triggered.connect(self.on_about_py_tetris)
         self.action_Support_Tutor_Exilius.triggered.connect(self.open_twitch_support_page)
 
-        for h in range(2, field_height):
-            for w in range(field_width):
-                button = QPushButton()
-                button.setFocusPolicy(QtCore.Qt.NoFocus)
-                button.setFixedSize(20, 20)
-                button.setEnabled(False)
-                button.setStyleSheet(self.default_cell_stylesheet)
-                self.gridLayout_field.addWidget(button, h, w)
+        # the two upper (spawn) rows are not displayed
+        self.board = BoardWidget(field_height, field_width, cell_size=20, first_row=2)
+        self.gridLayout_field.addWidget(self.board, 0, 0)
+        self.board.instrumentation = instrumentation
+
+        self.initialise_next_tetromino_grid()
+
+        # banners and animations, applied at once if disabled (speed runs, bots)
+        self.animations = AnimationQueue(animations_enabled, self)
 
         # TODO: implement setting/options: start with users startlevel
         self.users_start_level = 0
+        self.generator = generator
+
+        # a Replay to play back instead of a live game
+        self.replay = replay
+        self.replay_speed = replay_speed
+        self.replay_directory = replay_directory
+
+        # the built-in Agent plays instead of the keyboard
+        self.agent = agent
+
+        # (host, port, room) of a pyTetris.server to play on instead of a local game
+        self.server = server
+
+        # an Instrumentation (--profile), None if disabled; F3 toggles its overlay
+        self.instrumentation = instrumentation
+        self.profile_output = profile_output
+
+        # a SpectatorFeed (--broadcast) the games publish to, None if disabled
+        self.spectator_feed = spectator_feed
+
+        # a StatsStore every finished game is written to, None if disabled (--no-stats)
+        self.stats_store = stats_store
+        self.action_Leaderboard.setEnabled(stats_store is not None)
+
+        # the local game is saved there and the first round resumes it, None if disabled (--no-autosave)
+        self.snapshot_path = snapshot_path
+        self.profile_label = None
+        self.profile_timer = None
 
         self.rounds = 0
         self.key_input_lock = False
@@ -62,6 +151,9 @@ class MainWindow(QMainWindow):
 
         self.setFixedSize(self.sizeHint())
 
+        # all short sounds, loaded once for every round
+        self.sound_bank = SoundBank(self)
+
         # Media Player - to play bye.wav synchronously
         self.player = QMediaPlayer()
         self.player.setVolume(100)
@@ -77,7 +169,8 @@ class MainWindow(QMainWindow):
         self.setPalette(palette)
 
     def closeEvent(self, event):
-        self.tetris.is_running = False
+        if self.tetris:
+            self.tetris.stop()
 
         # small hack :)
         # DO FIRST: link next close event to self.force_closeEvent(..)
@@ -92,8 +185,7 @@ class MainWindow(QMainWindow):
         event.ignore()
 
     def open_twitch_support_page(self):
-        donate_sound = str(Path(__file__).parent / "sounds" / "donate.wav")
-        QSound.play(donate_sound)
+        self.sound_bank.play("donate")
         webbrowser.open("https://streamlabs.com/tutorexilius")
 
     def on_bye_played(self, state):
@@ -102,12 +194,26 @@ class MainWindow(QMainWindow):
 
     def force_closeEvent(self, event):
         self.tetris = None
+
+        if self.instrumentation is not None and self.profile_output:
+            self.instrumentation.dump(self.profile_output)
+            logger.info("latency samples written to %s", self.profile_output)
+
         event.accept()
 
     def keyPressEvent(self, e):
         if self.key_input_lock:
             return
 
+        if e.key() == QtCore.Qt.Key_F3 and self.instrumentation is not None:
+            self.toggle_profile_overlay()
+            return
+
+        instrumentation = self.instrumentation
+
+        if instrumentation is not None:
+            started = instrumentation.now()
+
         self.key_input_lock = True
 
         # START NEW GAME
@@ -115,10 +221,17 @@ class MainWindow(QMainWindow):
             if self.is_game_over and e.key() == QtCore.Qt.Key_N:
                 self.start_new_game_timer.start()
         else:
-            self.tetris.handle_input(e.key())
+            self.tetris.handle_input(e.key(), e.isAutoRepeat())
 
         self.key_input_lock = False
 
+        if instrumentation is not None:
+            instrumentation.since("input", started)
+
+    def keyReleaseEvent(self, e):
+        if self.tetris:
+            self.tetris.handle_release(e.key(), e.isAutoRepeat())
+
     def on_about_qt(self):
         QMessageBox.aboutQt(self)
 
@@ -135,6 +248,9 @@ class MainWindow(QMainWindow):
 <tr><td>Rotate Right:</td><td>&nbsp;&nbsp;&nbsp;</td><td><b>K</b></td></tr></table>""",
         )
 
+    def on_leaderboard_dialog(self):
+        LeaderboardDialog(self.stats_store, parent=self).exec_()
+
     def on_about_py_tetris(self):
         QMessageBox.about(
             self,
@@ -174,19 +290,63 @@ twitch.tv/danatur<br><br>CC-BY-SA</td></tr>
         self.reset_states()
 
         self.on_level_update(self.users_start_level)
-        self.tetris = Game(field_height, field_width, main_window, self.users_start_level)
 
-        self.game_over_signal.connect(self.tetris.on_game_over)
+        if self.server:
+            self.tetris = ClientGame(field_height, field_width, main_window, *self.server)
+            logger.info("round %d: network game", self.rounds)
+        else:
+            resume = self.load_snapshot(field_height, field_width) if self.rounds == 1 else None
+            self.tetris = Game(
+                field_height,
+                field_width,
+                main_window,
+                self.users_start_level,
+                self.generator,
+                replay=self.replay,
+                replay_speed=self.replay_speed,
+                replay_directory=self.replay_directory,
+                agent=self.agent,
+                resume=resume,
+            )
+            logger.info(
+                "round %d: %s generator, seed %d%s",
+                self.rounds,
+                self.tetris.engine.generator.name,
+                self.tetris.engine.generator.seed,
+                " (replay)" if self.replay else " (resumed)" if resume else "",
+            )
+
+            if resume:
+                self.playing_time_in_seconds = int(self.tetris.engine.tick / FRAMES_PER_SECOND)
+                self.ui_update_game_time()
+            self.tetris.player.play()
+
+        self.game_over_signal.connect(self.tetris.play_game_over_sound)
+
+        self.tetris.game_over.connect(self.on_game_over)
 
         self.game_timer.start()
-        self.tetris.is_running = True
-        self.tetris.player.play()
+        self.tetris.start()
+
+    def load_snapshot(self, field_height, field_width):
+        """(Engine, stats events) of the saved game to resume, None if there is none (or it cannot be resumed)."""
+
+        if self.snapshot_path is None or self.replay or self.agent or not Path(self.snapshot_path).exists():
+            return None
+
+        try:
+            engine, events = snapshot.load(self.snapshot_path)
+        except (OSError, ValueError) as e:
+            logger.warning("not resuming %s: %s", self.snapshot_path, e)
+            return None
+
+        if (engine.height, engine.width) != (field_height, field_width):
+            logger.warning("not resuming %s: a %dx%d field", self.snapshot_path, engine.height, engine.width)
+            return None
 
-        while self.tetris.running():
-            QApplication.processEvents()
-            time.sleep(0.016)  # optimize performance
+        return engine, events
 
-        self.tetris.player.stop()
+    def on_game_over(self):
         self.game_timer.stop()
 
         # fix: avoid gameover animation, if window is closed by user
@@ -194,148 +354,104 @@ twitch.tv/danatur<br><br>CC-BY-SA</td></tr>
             self.game_over_signal.emit()
             self.game_over_animation()
             self.write_press_n()
-            self.is_game_over = True
 
     def game_over_animation(self):
-        speed = 0.005
+        rows = range(2, self.tetris.height - 1)
+        steps = []
 
         # fill
-        for h in reversed(range(2, self.tetris.height - 1)):
-            if h % 2 == 1:
-                _range = range(1, self.tetris.width - 1)
-            else:
-                _range = reversed(range(1, self.tetris.width - 1))
-
-            for w in _range:
-                button = self.gridLayout_field.itemAtPosition(h, w).widget()
-                button.setStyleSheet("background-color: black;")
-                time.sleep(speed)
-
-            QApplication.processEvents()
+        for h in reversed(rows):
+            steps += [functools.partial(self.board.set_overlay, h, w, BLACK) for w in self.snake_columns(h)]
 
         # empty
-        for h in range(2, self.tetris.height - 1):
-            if h % 2 == 1:
-                _range = range(1, self.tetris.width - 1)
-            else:
-                _range = reversed(range(1, self.tetris.width - 1))
+        for h in rows:
+            steps += [functools.partial(self.board.set_overlay, h, w, 0) for w in self.snake_columns(h)]
 
-            for w in _range:
-                button = self.gridLayout_field.itemAtPosition(h, w).widget()
-                button.setStyleSheet(self.default_cell_stylesheet)
-                time.sleep(speed)
+        steps.append(self.write_game_over)
+        self.animations.add(steps, 5)
 
-            QApplication.processEvents()
+    def snake_columns(self, h):
+        if h % 2 == 1:
+            return range(1, self.tetris.width - 1)
 
-        self.write_game_over()
+        return reversed(range(1, self.tetris.width - 1))
 
     def write_game_over(self):
-        font_style = (
-            "font-size: 10pt; font-weight: bold; background-color: black; border: 0px;"
-        )
-
         for row, word in zip([4, 5], ["GAME", "OVER"]):
             for column, letter in zip(count(4), word):
-                rgb = "255, 255, 255"
-                button = self.gridLayout_field.itemAtPosition(row, column).widget()
-                button.setText(letter)
-                button.setStyleSheet(f"{font_style} color: rgb({rgb});")
+                self.board.set_overlay(row, column, BLACK, letter, "white", 10)
 
     def clear_game_over_label(self):
-        for row, word in zip([4, 5], ["GAME", "OVER"]):
-            for column, letter in zip(count(4), word):
-                button = self.gridLayout_field.itemAtPosition(row, column).widget()
-                button.setText("")
-                button.setStyleSheet(
-                    f"{self.default_cell_stylesheet} background-color: white;"
-                )
+        self.animations.finish()
+        self.board.clear_overlays()
+
+    def on_pause_update(self, pause):
+        if pause:
+            self.game_timer.stop()
+            self.write_pause()
+        else:
+            self.game_timer.start()
+            self.clear_pause_label()
 
     def clear_pause_label(self):
         press_p = [" ", " P", "RE", "SS", "  P", " "]
-        for column, letter in reversed(list(zip(count(3), press_p))):
-            button = self.gridLayout_field.itemAtPosition(7, column).widget()
-            button.setText("")
-            button.setStyleSheet(
-                f"{self.default_cell_stylesheet} background-color: white;"
-            )
-            time.sleep(0.015)
-            QApplication.processEvents()
-
-        for column, letter in reversed(list(zip(count(3), "PAUSED"))):
-            button = self.gridLayout_field.itemAtPosition(5, column).widget()
-            button.setStyleSheet(
-                f"{self.default_cell_stylesheet} background-color: white;"
-            )
-            button.setText("")
-            time.sleep(0.015)
-            QApplication.processEvents()
+        steps = [
+            functools.partial(self.board.clear_overlay, 7, column)
+            for column, letter in reversed(list(zip(count(3), press_p)))
+        ]
+        steps += [
+            functools.partial(self.board.clear_overlay, 5, column)
+            for column, letter in reversed(list(zip(count(3), "PAUSED")))
+        ]
+        self.animations.add(steps, 15)
 
     def write_pause(self):
-        font_style = (
-            "font-size: 10pt; font-weight: bold; background-color: black; border: 0px;"
-        )
-
-        for column, letter in zip(count(3), "PAUSED"):
-            rgb = "255, 255, 255"
-            button = self.gridLayout_field.itemAtPosition(5, column).widget()
-            button.setText(letter)
-            button.setStyleSheet(f"{font_style} color: rgb({rgb});")
-
-            time.sleep(0.015)
-            QApplication.processEvents()
+        steps = [
+            functools.partial(self.board.set_overlay, 5, column, BLACK, letter, "white", 10)
+            for column, letter in zip(count(3), "PAUSED")
+        ]
 
         press_p = [" ", " P", "RE", "SS", "  P", " "]
-        for column, letter in zip(count(3), press_p):
-            rgb = "170, 240, 60"
-            button = self.gridLayout_field.itemAtPosition(7, column).widget()
-            button.setText(letter)
-            button.setStyleSheet(f"{font_style} color: rgb({rgb}); font-size: 12pt;")
-
-            time.sleep(0.015)
-            QApplication.processEvents()
+        steps += [
+            functools.partial(self.board.set_overlay, 7, column, BLACK, letter, "#aaf03c", 12)
+            for column, letter in zip(count(3), press_p)
+        ]
+        self.animations.add(steps, 15)
 
     def clear_press_n_label(self):
         press_p = [" ", " P", "RE", "SS", "  N", " "]
-        for column, letter in reversed(list(zip(count(3), press_p))):
-            button = self.gridLayout_field.itemAtPosition(7, column).widget()
-            button.setText("")
-            button.setStyleSheet(
-                f"{self.default_cell_stylesheet} background-color: white;"
-            )
-            time.sleep(0.015)
-            QApplication.processEvents()
+        steps = [
+            functools.partial(self.board.clear_overlay, 7, column)
+            for column, letter in reversed(list(zip(count(3), press_p)))
+        ]
+        self.animations.add(steps, 15)
 
     def write_press_n(self):
-        font_style = (
-            "font-size: 10pt; font-weight: bold; background-color: black; border: 0px;"
-        )
-
         press_p = [" ", " P", "RE", "SS", "  N", " "]
-        for column, letter in zip(count(3), press_p):
-            rgb = "170, 240, 60"
-            button = self.gridLayout_field.itemAtPosition(7, column).widget()
-            button.setText(letter)
-            button.setStyleSheet(f"{font_style} color: rgb({rgb}); font-size: 12pt;")
+        steps = [
+            functools.partial(self.board.set_overlay, 7, column, BLACK, letter, "#aaf03c", 12)
+            for column, letter in zip(count(3), press_p)
+        ]
+        self.animations.add(steps, 15, self.on_game_over_animated)
 
-            time.sleep(0.015)
-            QApplication.processEvents()
+    def on_game_over_animated(self):
+        self.is_game_over = True
 
     def pre_clear_animation(self, rows):
-        speed = 0.025 - len(rows) * (0.01 / 4.0)
+        # the engine has removed the rows already, the sweep is painted over their place: it covers
+        # live cells, so it lasts at most one gravity row (several steps per frame at high levels)
+        steps_count = 2 * len(rows) * (self.tetris.width - 2)
+        gravity_row_ms = 1000 * self.tetris.engine.gravity_frames() / FRAMES_PER_SECOND
+        speed = min(25 - len(rows) * (10 / 4.0), gravity_row_ms / steps_count)
+        steps = []
 
         for h in rows:
-            if h % 2 == 1:
-                range_ = range(1, self.tetris.width - 1)
-            else:
-                range_ = reversed(range(1, self.tetris.width - 1))
+            steps += [functools.partial(self.board.set_overlay, h, w, BLACK) for w in self.snake_columns(h)]
 
-            for w in range_:
-                button = self.gridLayout_field.itemAtPosition(h, w).widget()
+        for h in rows:
+            steps += [functools.partial(self.board.clear_overlay, h, w) for w in range(1, self.tetris.width - 1)]
 
-                if button:
-                    button.setStyleSheet("background-color: black;")
-                    time.sleep(speed)
-                    QApplication.processEvents()
+        self.animations.add(steps, speed)
 
     def update_game_time(self):
         self.playing_time_in_seconds += 1
@@ -347,30 +463,54 @@ twitch.tv/danatur<br><br>CC-BY-SA</td></tr>
         self.label_game_time.setText("Time: {:02d}:{:02d}".format(minutes, seconds))
 
     def on_next_tetromino_update(self, tetromino):
-        self.initialise_next_tetromino_grid(tetromino)
-
-        for h, line in enumerate(tetromino.brick_matrix):
-            for w, cell in enumerate(line):
-                try:
-                    button = self.gridLayout_next_tetromino.itemAtPosition(
-                        h, w
-                    ).widget()
-
-                    self.update_button(button, cell, False)
-                except Exception as e:
-                    print(e)
-
-    def on_field_update(self, field):
-        for h, rows in enumerate(field):
-            for w, cell in enumerate(rows):
-                try:
-                    item = self.gridLayout_field.itemAtPosition(h, w)
-                    if item is not None:
-                        button = item.widget()
-                        if button is not None:
-                            self.update_button(button, cell)
-                except Exception as e:
-                    print("here:", e)
+        brick_matrix = tetromino.brick_matrix
+
+        # hide the cells outside of the brick matrix to keep the brick centered
+        for h, line in enumerate(self.next_tetromino_buttons):
+            for w, button in enumerate(line):
+                visible = h < len(brick_matrix) and w < len(brick_matrix[0])
+                button.setVisible(visible)
+
+                if visible:
+                    self.update_button(button, brick_matrix[h][w], False)
+
+    def on_field_update(self, changed_cells):
+        logger.debug("%d changed cells", len(changed_cells))
+
+        instrumentation = self.instrumentation
+
+        if instrumentation is None:
+            self.board.set_cells(changed_cells)
+            return
+
+        started = instrumentation.now()
+        self.board.set_cells(changed_cells)
+        instrumentation.since("render", started)
+
+    def toggle_profile_overlay(self):
+        if self.profile_label is None:
+            self.profile_label = QLabel(self.board)
+            self.profile_label.setStyleSheet(
+                "background-color: rgba(0, 0, 0, 180); color: #aaf03c;"
+                "font-family: monospace; font-size: 10px; padding: 4px;"
+            )
+            self.profile_label.setAttribute(QtCore.Qt.WA_TransparentForMouseEvents)
+
+            self.profile_timer = QTimer(self)
+            self.profile_timer.setInterval(500)
+            self.profile_timer.timeout.connect(self.update_profile_overlay)
+
+        if self.profile_label.isVisible():
+            self.profile_timer.stop()
+            self.profile_label.hide()
+        else:
+            self.update_profile_overlay()
+            self.profile_label.show()
+            self.profile_timer.start()
+
+    def update_profile_overlay(self):
+        self.profile_label.setText(self.instrumentation.overlay_text())
+        self.profile_label.adjustSize()
 
     def on_score_update(self, value):
         self.label_score_value.setText(str(value))
@@ -381,77 +521,29 @@ twitch.tv/danatur<br><br>CC-BY-SA</td></tr>
     def on_lines_update(self, value):
         self.label_lines_value.setText(str(value))
 
-    def initialise_next_tetromino_grid(self, tetromino):
-        # the widget is deleted when its parent is deleted.
-        # Important note: You need to loop backwards because removing
-        # things from the beginning shifts items and changes the order of items in the layout.
-        while self.gridLayout_next_tetromino.count():
-            button = self.gridLayout_next_tetromino.takeAt(0).widget()
-            self.gridLayout_next_tetromino.removeWidget(button)
-            button.setParent(None)
-            button.deleteLater()
-
-        tetromino_h = len(tetromino.brick_matrix)
-        tetromino_w = len(tetromino.brick_matrix[0])
-
-        for h in range(tetromino_h):
-            for w in range(tetromino_w):
+    def initialise_next_tetromino_grid(self):
+        self.next_tetromino_buttons = []
+
+        for h in range(4):
+            self.next_tetromino_buttons.append([])
+
+            for w in range(4):
                 button = QPushButton()
                 button.setFocusPolicy(QtCore.Qt.NoFocus)
                 button.setFixedSize(17, 17)
                 button.setEnabled(True)
                 button.setStyleSheet("border: 0px;")
+                button.setVisible(False)
                 self.gridLayout_next_tetromino.addWidget(button, h, w)
+                self.next_tetromino_buttons[h].append(button)
 
         self.frame_next_tetromino.setStyleSheet("background-color: white; border: 3px double black;")
 
     def update_button(self, button, cell_value, draw_frame=True):
-        stylesheet = []
+        style = (cell_value, draw_frame)
 
-        if cell_value > 0:
-            stylesheet.append("border: 0px")
-        elif cell_value == 0:
-            if draw_frame:
-                stylesheet.append(self.default_cell_stylesheet)
-            else:
-                stylesheet.append("border: 0px")
-
-        if cell_value == -3:
-            stylesheet.append("background-color: rgb(220, 220, 220); border: 1px solid #aaa;")
-        if cell_value == -2:
-            stylesheet.append("background-color: black")
-        if cell_value == -1:
-            stylesheet.append("background-color: black")
-        if cell_value == 0:
-            stylesheet.append("background-color: white")
-        if cell_value == 1:
-            stylesheet.append(
-                "background-color: qlineargradient( x1:0 y1:0, x2:1 y2:1, stop:0 red, stop:1 #750000)"
-            )
-        elif cell_value == 2:
-            stylesheet.append(
-                "background-color: qlineargradient( x1:0 y1:0, x2:1 y2:1, stop:0 orange, stop:1 #755500)"
-            )
-        elif cell_value == 3:
-            stylesheet.append(
-                "background-color: qlineargradient( x1:0 y1:0, x2:1 y2:1, stop:0 #5555ff, stop:1 #222285)"
-            )
-        elif cell_value == 4:
-            stylesheet.append("background-color: green")
-            stylesheet.append(
-                "background-color: qlineargradient( x1:0 y1:0, x2:1 y2:1, stop:0 #55ff55, stop:1 #228522)"
-            )
-        elif cell_value == 5:
-            stylesheet.append(
-                "background-color: qlineargradient( x1:0 y1:0, x2:1 y2:1, stop:0 magenta, stop:1 #750075)"
-            )
-        elif cell_value == 6:
-            stylesheet.append(
-                "background-color: qlineargradient( x1:0 y1:0, x2:1 y2:1, stop:0 yellow, stop:1 #757500)"
-            )
-        elif cell_value == 7:
-            stylesheet.append(
-                "background-color: qlineargradient( x1:0 y1:0, x2:1 y2:1, stop:0 #00b6be, stop:1 #006d84)"
-            )
+        if self.applied_button_styles.get(button) == style:
+            return
 
-        button.setStyleSheet("; ".join(stylesheet))
+        self.applied_button_styles[button] = style
+        button.setStyleSheet(CELL_STYLESHEETS[style])
@@ -0,0 +1,76 @@
+"""Binary framing of the network game (pyTetris.server) and of the versus workers' cell diffs.
+
+A frame is a 1 byte kind, a 2 byte payload length (network order) and the
+payload. Fields are never sent whole: CELLS carries only the changed cells,
+3 bytes each (row, column, value as signed byte).
+"""
+import struct
+
+HEADER = struct.Struct("!BH")
+MAX_PAYLOAD = 0xFFFF
+
+# client -> server
+JOIN = 1  # room name (utf-8)
+INPUT = 2  # Action value
+RELEASE = 3  # soft drop released
+
+# server -> client
+WELCOME = 10  # WELCOME_FORMAT
+START = 11
+CELLS = 12  # player, packed cells
+STATS = 13  # STATS_FORMAT
+GAME_OVER = 14  # player
+WINNER = 15  # player
+ERROR = 16  # message (utf-8)
+
+# player, players in the room, field height, field width, seed
+WELCOME_FORMAT = struct.Struct("!BBBBI")
+# player, score, lines, level, pending garbage rows, next tetromino type
+STATS_FORMAT = struct.Struct("!BIHBBB")
+
+
+def pack_cells(changed_cells) -> bytes:
+    """[(h, w, value), ...] -> 3 bytes per cell, the value as signed byte."""
+
+    return bytes(byte for h, w, value in changed_cells for byte in (h, w, value & 0xFF))
+
+
+def unpack_cells(data):
+    return [
+        (data[i], data[i + 1], data[i + 2] - 256 if data[i + 2] > 127 else data[i + 2])
+        for i in range(0, len(data), 3)
+    ]
+
+
+def encode_frame(kind, payload=b"") -> bytes:
+    if len(payload) > MAX_PAYLOAD:
+        raise ValueError("FRAME PAYLOAD TOO LARGE")
+
+    return HEADER.pack(kind, len(payload)) + payload
+
+
+def encode_player_frame(kind, player, payload=b"") -> bytes:
+    return encode_frame(kind, bytes((player,)) + payload)
+
+
+class FrameReader:
+    """Splits a byte stream that arrives in arbitrary chunks into (kind, payload) frames."""
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def feed(self, data):
+        self.buffer += data
+        frames = []
+
+        while len(self.buffer) >= HEADER.size:
+            kind, length = HEADER.unpack_from(self.buffer)
+            end = HEADER.size + length
+
+            if len(self.buffer) < end:
+                break
+
+            frames.append((kind, bytes(self.buffer[HEADER.size:end])))
+            del self.buffer[:end]
+
+        return frames
@@ -0,0 +1,118 @@
+import abc
+import random
+import secrets
+
+from pyTetris.tetromino import TetrominoType
+
+TETROMINO_TYPES = tuple(TetrominoType)
+
+
+class PieceGenerator(abc.ABC):
+    """Sequence of tetromino types from a per-game seeded random.Random.
+
+        The same seed and generator always give the same sequence. Pieces are
+        produced in batches into a queue that is only extended when peek() or
+        next() reach its end.
+    """
+
+    name = None
+
+    def __init__(self, seed=None):
+        if seed is None:
+            seed = secrets.randbits(32)
+
+        self.seed = seed
+        self.random = random.Random(seed)
+        self.queue = []
+        self.position = 0
+        # pieces handed out by next(), restores the sequence from the seed (snapshots)
+        self.drawn = 0
+
+    @abc.abstractmethod
+    def generate(self):
+        """Returns the next batch of tetromino types."""
+
+    def peek(self, count=1):
+        while self.position + count > len(self.queue):
+            # drop the consumed part before it grows without bounds
+            if self.position > 1024:
+                del self.queue[:self.position]
+                self.position = 0
+
+            self.queue.extend(self.generate())
+
+        return self.queue[self.position:self.position + count]
+
+    def next(self):
+        tetromino_type = self.peek()[0]
+        self.position += 1
+        self.drawn += 1
+
+        return tetromino_type
+
+
+class UniformGenerator(PieceGenerator):
+    """Every type with the same probability, no streak protection (the classic pyTetris behaviour)."""
+
+    name = "uniform"
+    batch_size = 64
+
+    def generate(self):
+        return self.random.choices(TETROMINO_TYPES, k=self.batch_size)
+
+
+class BagGenerator(PieceGenerator):
+    """7-bag: every type once per shuffled bag of seven."""
+
+    name = "bag"
+
+    def generate(self):
+        bag = list(TETROMINO_TYPES)
+        self.random.shuffle(bag)
+
+        return bag
+
+
+class NesGenerator(PieceGenerator):
+    """NES style: a roll that repeats the previous piece (or hits the 8th, unused slot) is rolled again once."""
+
+    name = "nes"
+    batch_size = 64
+
+    def __init__(self, seed=None):
+        super(NesGenerator, self).__init__(seed)
+
+        self.previous = None
+
+    def generate(self):
+        batch = []
+
+        for i in range(self.batch_size):
+            roll = self.random.randrange(len(TETROMINO_TYPES) + 1)
+
+            if roll == len(TETROMINO_TYPES) or TETROMINO_TYPES[roll] == self.previous:
+                roll = self.random.randrange(len(TETROMINO_TYPES))
+
+            self.previous = TETROMINO_TYPES[roll]
+            batch.append(self.previous)
+
+        return batch
+
+
+GENERATORS = {
+    "uniform": UniformGenerator,
+    "bag": BagGenerator,
+    "nes": NesGenerator,
+}
+
+
+def make_generator(generator=None, seed=None):
+    """A generator instance from a name of GENERATORS (default: uniform) or an instance."""
+
+    if isinstance(generator, PieceGenerator):
+        return generator
+
+    try:
+        return GENERATORS[generator or "uniform"](seed)
+    except KeyError:
+        raise ValueError(f"UNKNOWN GENERATOR: {generator}")
@@ -0,0 +1,274 @@
+"""Compact input-log replays: python -m pyTetris.replay FILE [FILE ...]
+
+File layout (all integers unsigned LEB128 varints):
+
+    b"PTRP", version
+    seed, len(generator name), generator name (utf-8), height, width, start level,
+    tick rate (ticks per second * 100)
+    events: (tick delta << 3) | code       code 1-6 = Action (version 1: 0 = gravity)
+    end:    (tick delta << 3) | 7, final score
+
+Version 2 ticks are engine frames. Gravity follows from the frames, so only
+the inputs are stored and playback advances the engine frame by frame.
+Version 1 (ms ticks, explicit gravity events) is still played back.
+
+A typical event is one or two bytes, so a whole game fits in a few kilobytes.
+Run as a module, every file is re-simulated at full speed and checked against
+its recorded score.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from pyTetris.engine import Action, Engine
+
+MAGIC = b"PTRP"
+VERSION = 2
+SUPPORTED_VERSIONS = (1, 2)
+
+GRAVITY = 0
+END = 7
+
+REPLAY_DIRECTORY = Path.home() / ".pyTetris" / "replays"
+
+
+def write_varint(buffer, value):
+    while value > 0x7F:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+
+    buffer.append(value)
+
+
+def read_varint(data, position):
+    value = 0
+    shift = 0
+
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+
+        if byte < 0x80:
+            return value, position
+
+        shift += 7
+
+
+class ReplayRecorder:
+    """Appends the inputs of an Engine, at the frame they happened, to a varint-delta log."""
+
+    def __init__(self, engine, tick_rate):
+        self.buffer = bytearray(MAGIC)
+        self.buffer.append(VERSION)
+        self.last_tick = 0
+        self.finished = False
+
+        self.seed = engine.generator.seed
+        generator_name = engine.generator.name.encode("utf-8")
+
+        write_varint(self.buffer, engine.generator.seed)
+        write_varint(self.buffer, len(generator_name))
+        self.buffer += generator_name
+
+        for value in (engine.height, engine.width, engine.start_level, round(tick_rate * 100)):
+            write_varint(self.buffer, value)
+
+    def record_action(self, tick, action):
+        self.record(tick, int(action))
+
+    def record(self, tick, code):
+        # ticks never run backwards in a log
+        delta = max(0, tick - self.last_tick)
+        self.last_tick += delta
+
+        write_varint(self.buffer, (delta << 3) | code)
+
+    def finish(self, tick, score):
+        if not self.finished:
+            self.record(tick, END)
+            write_varint(self.buffer, score)
+            self.finished = True
+
+    def to_bytes(self):
+        return bytes(self.buffer)
+
+    def default_path(self, directory=None):
+        return Path(directory or REPLAY_DIRECTORY) / f"{time.strftime('%Y%m%d-%H%M%S')}_{self.seed}.ptr"
+
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(self.to_bytes())
+
+
+class Replay:
+    def __init__(
+            self,
+            seed,
+            generator,
+            height,
+            width,
+            start_level,
+            tick_rate,
+            events,
+            score=None,
+            end_tick=None,
+            version=VERSION,
+    ):
+        self.version = version
+        self.seed = seed
+        self.generator = generator
+        self.height = height
+        self.width = width
+        self.start_level = start_level
+        self.tick_rate = tick_rate
+        # [(tick, code), ...]
+        self.events = events
+        # final score and tick, None if the recording was cut off
+        self.score = score
+        self.end_tick = end_tick
+
+    @classmethod
+    def from_bytes(cls, data):
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError("NOT A PYTETRIS REPLAY")
+
+        version = data[len(MAGIC)]
+
+        if version not in SUPPORTED_VERSIONS:
+            raise ValueError(f"UNSUPPORTED REPLAY VERSION: {version}")
+
+        position = len(MAGIC) + 1
+        seed, position = read_varint(data, position)
+        name_length, position = read_varint(data, position)
+        generator = data[position:position + name_length].decode("utf-8")
+        position += name_length
+
+        header = []
+        for i in range(4):
+            value, position = read_varint(data, position)
+            header.append(value)
+
+        height, width, start_level, tick_rate = header
+
+        events = []
+        score = None
+        end_tick = None
+        tick = 0
+
+        while position < len(data):
+            value, position = read_varint(data, position)
+            tick += value >> 3
+            code = value & 0x07
+
+            if code == END:
+                score, position = read_varint(data, position)
+                end_tick = tick
+                break
+
+            events.append((tick, code))
+
+        return cls(seed, generator, height, width, start_level, tick_rate / 100, events, score, end_tick, version)
+
+    @classmethod
+    def load(cls, path):
+        return cls.from_bytes(Path(path).read_bytes())
+
+    def create_engine(self, listener=None, backend="bitboard"):
+        return Engine(
+            self.height,
+            self.width,
+            self.start_level,
+            listener=listener,
+            backend=backend,
+            generator=self.generator,
+            seed=self.seed,
+        )
+
+
+def apply_event(engine, code):
+    if code == GRAVITY:
+        engine.step()
+    else:
+        engine.apply_action(Action(code))
+
+
+class ReplayPlayer:
+    """Feeds the events of a Replay into an engine, up to a tick."""
+
+    def __init__(self, replay, engine):
+        self.replay = replay
+        self.engine = engine
+        self.position = 0
+
+        # the tick the player stops at, the end of the recording
+        if replay.end_tick is not None:
+            self.last_tick = replay.end_tick
+        else:
+            self.last_tick = replay.events[-1][0] if replay.events else 0
+
+    @property
+    def finished(self):
+        if self.position < len(self.replay.events):
+            return False
+
+        return self.replay.version == 1 or self.engine.tick >= self.last_tick or not self.engine.is_running
+
+    def advance_to(self, tick):
+        events = self.replay.events
+        frames = self.replay.version > 1
+
+        while self.position < len(events) and events[self.position][0] <= tick:
+            event_tick, code = events[self.position]
+
+            if frames:
+                self.engine.run_to(event_tick)
+
+            apply_event(self.engine, code)
+            self.position += 1
+
+        if frames:
+            self.engine.run_to(min(tick, self.last_tick))
+
+
+def simulate(replay, backend="bitboard"):
+    """Re-simulates a replay headlessly at full speed and returns the final engine."""
+
+    engine = replay.create_engine(backend=backend)
+    player = ReplayPlayer(replay, engine)
+    player.advance_to(player.last_tick)
+
+    return engine
+
+
+def verify(replay):
+    """True if re-simulating the inputs reproduces the recorded final score."""
+
+    return replay.score is not None and simulate(replay).score == replay.score
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m pyTetris.replay", description=__doc__.splitlines()[0])
+    parser.add_argument("files", nargs="+", help="recorded .ptr files")
+    args = parser.parse_args(argv)
+
+    valid = True
+
+    for path in args.files:
+        replay = Replay.load(path)
+        engine = simulate(replay)
+        ok = replay.score is not None and engine.score == replay.score
+        valid = valid and ok
+
+        print(
+            f"{path}: {'OK' if ok else 'MISMATCH'} score={engine.score} recorded={replay.score} "
+            f"lines={engine.total_removed_lines} level={engine.level} events={len(replay.events)}"
+        )
+
+    return 0 if valid else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
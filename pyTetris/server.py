@@ -0,0 +1,518 @@
+"""Network game server: python -m pyTetris.server --port 7373 --room-size 2
+
+Players join a room by name over TCP (pyTetris --connect HOST:PORT --room
+NAME). A room starts once room_size players joined, every player gets the
+same pieces, and line clears send garbage to the next player still alive
+(the rules of pyTetris.versus). The server's engines are authoritative:
+clients only send inputs, the server applies them on its own boards and
+sends back the changed cells and counters (pyTetris.protocol).
+
+All rooms run on one asyncio loop with a single frame ticker. With --bots N
+the server plays N scripted bot clients against itself over local sockets
+and reports the tick times, a load test without a GUI.
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+
+from pyTetris.diagnostics import ENGINE_LOGGER as logger
+from pyTetris.engine import Action
+from pyTetris.frame_clock import FrameClock
+from pyTetris.instrumentation import RingBuffer
+from pyTetris.protocol import (
+    CELLS,
+    ERROR,
+    GAME_OVER,
+    HEADER,
+    INPUT,
+    JOIN,
+    RELEASE,
+    START,
+    STATS,
+    STATS_FORMAT,
+    WELCOME,
+    WELCOME_FORMAT,
+    WINNER,
+    encode_frame,
+    encode_player_frame,
+    unpack_cells,
+)
+from pyTetris.versus import MAX_BOARDS, Board, garbage_target
+
+DEFAULT_PORT = 7373
+
+# a client's frames are tiny, anything larger is not a pyTetris client
+MAX_CLIENT_PAYLOAD = 64
+MAX_ROOM_NAME = 32
+JOIN_TIMEOUT = 10
+
+# inputs of one player applied per frame, the rest is dropped
+MAX_INPUTS_PER_FRAME = 4
+
+# bytes queued for a client that does not read; beyond it is disconnected
+MAX_WRITE_BUFFER = 256 * 1024
+
+ACTIONS = {action.value: action for action in Action}
+
+
+class Player:
+    __slots__ = ("writer", "name", "index", "input_frame", "inputs")
+
+    def __init__(self, writer, index):
+        self.writer = writer
+        self.name = writer.get_extra_info("peername")
+        self.index = index
+        self.input_frame = -1
+        self.inputs = 0
+
+
+class Room:
+    """The boards of one game. Every player's board shares the seed and the room's FrameClock."""
+
+    def __init__(self, name, size, config, seed):
+        self.name = name
+        self.size = size
+        self.config = dict(config, seed=seed)
+        self.seed = seed
+        self.random = random.Random(seed)
+        self.clock = FrameClock()
+        self.players = []
+        self.boards = []
+        self.alive = []
+        self.started = False
+        self.finished = False
+
+    @property
+    def is_full(self) -> bool:
+        return len(self.players) >= self.size
+
+    def join(self, writer):
+        player = Player(writer, len(self.players))
+        self.players.append(player)
+        self.welcome(player)
+
+        return player
+
+    def welcome(self, player):
+        config = self.config
+        welcome = WELCOME_FORMAT.pack(player.index, self.size, config["height"], config["width"], self.seed)
+        self.send_to(player, encode_frame(WELCOME, welcome))
+
+    def start(self):
+        self.boards = [Board(self.config) for player in self.players]
+        self.alive = [True] * len(self.boards)
+        self.started = True
+        self.clock.start()
+        self.broadcast(encode_frame(START))
+
+        logger.info("room %s started, %d players, seed %d", self.name, self.size, self.seed)
+
+    def leave(self, player):
+        if not self.started:
+            # a waiting room just gets the seat back, the players behind move up
+            self.players.remove(player)
+
+            for index, other in enumerate(self.players):
+                if other.index != index:
+                    other.index = index
+                    self.welcome(other)
+
+            return
+
+        self.players[player.index] = None
+        self.boards[player.index].knock_out()
+        self.flush()
+
+    def handle_input(self, player, kind, payload):
+        """Applies one client frame on the player's board, raises ValueError for anything a client must not send."""
+
+        if kind == INPUT:
+            if len(payload) != 1 or payload[0] not in ACTIONS:
+                raise ValueError("INVALID INPUT")
+
+            command = ("input", ACTIONS[payload[0]])
+        elif kind == RELEASE:
+            command = ("soft_drop", False)
+        else:
+            raise ValueError(f"UNEXPECTED FRAME KIND: {kind}")
+
+        if not self.started or self.finished:
+            return
+
+        frame = self.clock.frame()
+
+        if player.input_frame != frame:
+            player.input_frame = frame
+            player.inputs = 0
+
+        player.inputs += 1
+
+        if player.inputs > MAX_INPUTS_PER_FRAME:
+            return
+
+        # the input lands on the current frame
+        board = self.boards[player.index]
+        board.advance(frame)
+        board.handle(command)
+        self.flush()
+
+    def advance(self):
+        frame = self.clock.frame()
+
+        for board in self.boards:
+            board.advance(frame)
+
+        self.flush()
+
+    def flush(self):
+        """Sends the updates of all boards to all players, routes the garbage and ends the room."""
+
+        frames = []
+
+        for index, board in enumerate(self.boards):
+            update = board.update()
+
+            if update is None:
+                continue
+
+            if "cells" in update:
+                frames.append(encode_player_frame(CELLS, index, update["cells"]))
+
+            if update.keys() & {"score", "lines", "level", "pending", "next"}:
+                engine = board.engine
+                stats = STATS_FORMAT.pack(
+                    index,
+                    engine.score,
+                    min(engine.total_removed_lines, 0xFFFF),
+                    min(engine.level, 0xFF),
+                    min(board.reported["pending"], 0xFF),
+                    board.reported["next"],
+                )
+                frames.append(encode_frame(STATS, stats))
+
+            if update.get("sent"):
+                target = garbage_target(self.alive, index)
+
+                if target is not None:
+                    hole_column = self.random.randint(1, self.config["width"] - 2)
+                    self.boards[target].handle(("garbage", update["sent"], hole_column))
+
+            if update.get("game_over") and self.alive[index]:
+                self.alive[index] = False
+                frames.append(encode_player_frame(GAME_OVER, index))
+
+        alive = [index for index, is_alive in enumerate(self.alive) if is_alive]
+
+        if len(alive) == 0 or (self.size > 1 and len(alive) == 1):
+            winner = alive[0] if alive else 0xFF
+            frames.append(encode_player_frame(WINNER, winner))
+            self.finished = True
+
+            logger.info("room %s finished, winner %s", self.name, alive[0] if alive else None)
+
+        if frames:
+            self.broadcast(b"".join(frames))
+
+    def broadcast(self, data):
+        for player in self.players:
+            if player is not None:
+                self.send_to(player, data)
+
+    def send_to(self, player, data):
+        writer = player.writer
+
+        if writer.is_closing():
+            return
+
+        # never wait for a slow client: the frames queue in its transport, up to a limit
+        if writer.transport.get_write_buffer_size() > MAX_WRITE_BUFFER:
+            logger.warning("disconnecting %s: not reading", player.name)
+            writer.close()
+            return
+
+        writer.write(data)
+
+
+class Server:
+    def __init__(self, room_size=2, config=None, seed=None):
+        if not 1 <= room_size <= MAX_BOARDS:
+            raise ValueError(f"ROOM SIZE MUST BE 1 TO {MAX_BOARDS}")
+
+        self.room_size = room_size
+        self.config = dict({"height": 23, "width": 12, "generator": "bag"}, **(config or {}))
+        self.random = random.Random(seed)
+        self.rooms = {}
+        self.rooms_played = 0
+        self.server = None
+        self.ticker = None
+        self.tick_times = RingBuffer(4096)
+
+        # {room name: boards} of the closed rooms, kept to check the clients against when a dict (run_bots)
+        self.closed_boards = None
+
+    async def start(self, host="127.0.0.1", port=DEFAULT_PORT):
+        self.server = await asyncio.start_server(self.handle_client, host, port)
+        self.ticker = asyncio.get_running_loop().create_task(self.run_frames())
+
+        return self.server
+
+    @property
+    def port(self) -> int:
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.ticker.cancel()
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def run_frames(self):
+        """Advances every running room to the current frame, once per frame."""
+
+        clock = FrameClock()
+        clock.start()
+
+        while True:
+            started = time.perf_counter_ns()
+
+            for name, room in list(self.rooms.items()):
+                if room.started and not room.finished:
+                    room.advance()
+
+                if room.finished:
+                    self.close_room(name)
+
+            self.tick_times.add(time.perf_counter_ns() - started)
+
+            delay = clock.frame_start_ns(clock.frame() + 1) - clock.elapsed_ns()
+            await asyncio.sleep(delay / 1e9)
+
+    def close_room(self, name):
+        room = self.rooms.pop(name)
+        self.rooms_played += 1
+
+        if self.closed_boards is not None:
+            self.closed_boards[name] = room.boards
+
+        for player in room.players:
+            if player is not None:
+                player.writer.close()
+
+    async def handle_client(self, reader, writer):
+        room = player = None
+
+        try:
+            kind, payload = await asyncio.wait_for(read_frame(reader), JOIN_TIMEOUT)
+
+            if kind != JOIN:
+                raise ValueError("JOIN FIRST")
+
+            name = payload.decode("utf-8")[:MAX_ROOM_NAME]
+            room = self.rooms.get(name)
+
+            if room is None:
+                room = self.rooms[name] = Room(name, self.room_size, self.config, self.random.getrandbits(32))
+            elif room.started:
+                raise ValueError("ROOM IS ALREADY PLAYING")
+
+            player = room.join(writer)
+
+            if room.is_full:
+                room.start()
+
+            while not room.finished:
+                kind, payload = await read_frame(reader)
+                room.handle_input(player, kind, payload)
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+            pass
+        except (ValueError, UnicodeDecodeError) as e:
+            logger.warning("dropping %s: %s", writer.get_extra_info("peername"), e)
+
+            if not writer.is_closing():
+                writer.write(encode_frame(ERROR, str(e).encode("utf-8")))
+        finally:
+            if player is not None and not room.finished:
+                room.leave(player)
+
+                if not room.players and self.rooms.get(room.name) is room:
+                    del self.rooms[room.name]
+
+            writer.close()
+
+
+async def read_frame(reader):
+    kind, length = HEADER.unpack(await reader.readexactly(HEADER.size))
+
+    if length > MAX_CLIENT_PAYLOAD:
+        raise ValueError("FRAME TOO LARGE")
+
+    return kind, await reader.readexactly(length)
+
+
+# inputs of the scripted bots, as weights
+BOT_ACTIONS = {
+    Action.LEFT: 4,
+    Action.RIGHT: 4,
+    Action.ROTATE_CLOCKWISE: 3,
+    Action.ROTATE_COUNTER_CLOCKWISE: 1,
+    Action.DOWN: 2,
+    Action.DROP: 1,
+}
+
+
+async def bot_client(host, port, room, seed, inputs_per_second=10):
+    """Scripted client: joins room, sends seeded random inputs until its room ends.
+
+        Returns its index and the field it rebuilt from the CELLS frames of
+        its own board, plus the counters and the bytes it received.
+    """
+
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(encode_frame(JOIN, room.encode("utf-8")))
+
+    rng = random.Random(seed)
+    actions = list(BOT_ACTIONS)
+    weights = list(BOT_ACTIONS.values())
+
+    result = {"index": None, "cells": {}, "stats": None, "frames": 0, "bytes": 0, "winner": None, "error": None}
+    started = asyncio.Event()
+    over = asyncio.Event()
+
+    async def send_inputs():
+        await started.wait()
+
+        while not over.is_set():
+            writer.write(encode_frame(INPUT, bytes((rng.choices(actions, weights)[0].value,))))
+            await asyncio.sleep(rng.expovariate(inputs_per_second))
+
+    sender = asyncio.get_running_loop().create_task(send_inputs())
+
+    try:
+        while True:
+            header = await reader.readexactly(HEADER.size)
+            kind, length = HEADER.unpack(header)
+            payload = await reader.readexactly(length)
+            result["frames"] += 1
+            result["bytes"] += HEADER.size + length
+
+            if kind == WELCOME:
+                result["index"] = WELCOME_FORMAT.unpack(payload)[0]
+            elif kind == START:
+                started.set()
+            elif kind == CELLS and payload[0] == result["index"]:
+                for h, w, value in unpack_cells(payload[1:]):
+                    result["cells"][h, w] = value
+            elif kind == STATS and payload[0] == result["index"]:
+                result["stats"] = STATS_FORMAT.unpack(payload)[1:]
+            elif kind == GAME_OVER and payload[0] == result["index"]:
+                over.set()
+            elif kind == WINNER:
+                result["winner"] = payload[0]
+                break
+            elif kind == ERROR:
+                result["error"] = payload.decode("utf-8")
+                break
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        over.set()
+        sender.cancel()
+        writer.close()
+
+    return result
+
+
+def board_cells(engine):
+    """What a client shows of engine's board: its field with the falling tetromino and shadow last sent."""
+
+    cells = engine.field.to_list()
+
+    for (h, w), value in engine.frame_overlay.items():
+        cells[h][w] = value
+
+    return cells
+
+
+async def run_bots(server, bots, inputs_per_second):
+    """Plays bots scripted clients in rooms of the server's size, returns the report.
+
+        Once its room ended, the field every bot rebuilt from the CELLS
+        frames is compared with the server's engine; the ones that differ
+        are counted as desynced.
+    """
+
+    started = time.perf_counter()
+    rooms = [f"bots-{i // server.room_size}" for i in range(bots)]
+    server.closed_boards = {}
+
+    results = await asyncio.gather(
+        *(bot_client("127.0.0.1", server.port, room, i, inputs_per_second) for i, room in enumerate(rooms))
+    )
+
+    desynced = 0
+
+    for room, result in zip(rooms, results):
+        boards = server.closed_boards.get(room)
+
+        if boards is None or result["index"] is None:
+            continue
+
+        engine = boards[result["index"]].engine
+        rebuilt = [[result["cells"].get((h, w)) for w in range(engine.width)] for h in range(engine.height)]
+
+        if rebuilt != board_cells(engine):
+            logger.error("bot %d of room %s does not show the board of the server", result["index"], room)
+            desynced += 1
+
+    tick_times = server.tick_times
+
+    return {
+        "bots": bots,
+        "rooms": len(set(rooms)),
+        "duration_s": round(time.perf_counter() - started, 3),
+        "errors": sum(1 for result in results if result["error"]),
+        "desynced": desynced,
+        "frames_received": sum(result["frames"] for result in results),
+        "bytes_received": sum(result["bytes"] for result in results),
+        "tick_p50_ms": round(tick_times.percentile(50) / 1e6, 3),
+        "tick_p99_ms": round(tick_times.percentile(99) / 1e6, 3),
+        "tick_max_ms": round(max(tick_times.values()) / 1e6, 3),
+    }
+
+
+async def serve(args):
+    server = Server(args.room_size, {"generator": args.generator})
+    await server.start(args.host, 0 if args.bots else args.port)
+
+    if args.bots:
+        report = await run_bots(server, args.bots, args.bot_inputs)
+        await server.stop()
+        print(json.dumps(report))
+        return 1 if report["errors"] or report["desynced"] else 0
+
+    print(f"pyTetris server on {args.host}:{server.port}, rooms of {args.room_size}", file=sys.stderr)
+
+    async with server.server:
+        await server.server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m pyTetris.server", description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (0.0.0.0 for the LAN)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--room-size", type=int, default=2, help=f"players per room, 1 to {MAX_BOARDS}")
+    parser.add_argument("--generator", default="bag", help="piece generator: uniform, bag or nes")
+    parser.add_argument("--bots", type=int, help="load test: play this many scripted bots against the server and exit")
+    parser.add_argument("--bot-inputs", type=float, default=10, help="inputs per second of every bot")
+    args = parser.parse_args(argv)
+
+    try:
+        return asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+"""Headless batch simulation: python -m pyTetris.simulate --games 10000 --policy random
+
+Runs seeded games on all cores and streams one result per game (seed, score,
+lines, level, pieces, ticks (frames), duration) as JSONL or CSV. The games run on
+the engine's fixed timestep: a policy gets one input every frames_per_action
+frames, so the higher the level, the fewer inputs per gravity row.
+"""
+import argparse
+import csv
+import functools
+import importlib
+import json
+import os
+import random
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import cycle
+
+from pyTetris.agent import AgentPolicy
+from pyTetris.engine import Action, Engine
+
+RESULT_FIELDS = ["seed", "score", "lines", "level", "pieces", "ticks", "duration"]
+
+
+class RandomPolicy:
+    """Presses one random key per input."""
+
+    def __init__(self, seed):
+        self.random = random.Random(seed)
+        self.actions = list(Action)
+
+    def __call__(self, engine):
+        return [self.random.choice(self.actions)]
+
+
+class ScriptedPolicy:
+    """Repeats a fixed list of actions, one list entry per input."""
+
+    def __init__(self, script):
+        self.script = cycle(script)
+
+    def __call__(self, engine):
+        return [next(self.script)]
+
+
+def parse_script(script):
+    return [Action[name.strip().upper()] for name in script.split(",") if name.strip()]
+
+
+def make_policy(name, seed, script=None):
+    """random, scripted, agent or 'package.module:factory' where factory(seed) returns a policy.
+
+        A policy is called with the engine whenever an input is due and the
+        actions it returned last are applied, and returns the actions to
+        apply next, one per input.
+    """
+
+    if name == "random":
+        return RandomPolicy(seed)
+
+    if name == "scripted":
+        return ScriptedPolicy(parse_script(script or "DROP"))
+
+    if name == "agent":
+        return AgentPolicy(seed)
+
+    module_name, _, factory_name = name.partition(":")
+
+    if not factory_name:
+        raise ValueError(f"UNKNOWN POLICY: {name}")
+
+    return getattr(importlib.import_module(module_name), factory_name)(seed)
+
+
+def make_engine(config, seed):
+    engine = Engine(
+        config["height"],
+        config["width"],
+        config["start_level"],
+        backend=config["backend"],
+        generator=config["generator"],
+        seed=seed,
+    )
+
+    if config.get("line_score_base"):
+        engine.line_score_base = config["line_score_base"]
+
+    if config.get("level_speed_frames"):
+        engine.level_speed_frames = config["level_speed_frames"]
+
+    return engine
+
+
+def play(engine, policy, max_pieces, frames_per_action=1):
+    """Runs policy and gravity frame by frame until game over or max_pieces, returns the number of frames.
+
+        One input is applied every frames_per_action frames. The actions
+        left of a tetromino that locked are dropped.
+    """
+
+    started = engine.tick
+    actions = deque()
+    piece = None
+
+    while engine.is_running and engine.pieces < max_pieces:
+        if engine.pieces != piece:
+            piece = engine.pieces
+            actions.clear()
+
+        if (engine.tick - started) % frames_per_action == 0:
+            if not actions:
+                actions.extend(policy(engine))
+
+            if actions:
+                engine.apply_action(actions.popleft())
+
+        engine.advance_frame()
+
+    return engine.tick - started
+
+
+def run_game(config, seed):
+    policy = make_policy(config["policy"], seed, config["script"])
+
+    started = time.perf_counter()
+    engine = make_engine(config, seed)
+    ticks = play(engine, policy, config["max_pieces"], config.get("frames_per_action", 1))
+
+    return {
+        "seed": seed,
+        "score": engine.score,
+        "lines": engine.total_removed_lines,
+        "level": engine.level,
+        "pieces": engine.pieces,
+        "ticks": ticks,
+        "duration": round(time.perf_counter() - started, 6),
+    }
+
+
+def simulate(config, seeds, workers=None):
+    """Yields the results of all seeds in order, computed on a process pool."""
+
+    seeds = list(seeds)
+    chunksize = max(1, len(seeds) // ((workers or os.cpu_count() or 1) * 16))
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(functools.partial(run_game, config), seeds, chunksize=chunksize)
+
+
+def write_results(results, output, output_format):
+    if output_format == "csv":
+        writer = csv.DictWriter(output, fieldnames=RESULT_FIELDS)
+        writer.writeheader()
+
+        for result in results:
+            writer.writerow(result)
+            output.flush()
+    else:
+        for result in results:
+            output.write(json.dumps(result) + "\n")
+            output.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m pyTetris.simulate", description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game, the others count up")
+    parser.add_argument("--policy", default="random", help="random, scripted, agent or package.module:factory")
+    parser.add_argument("--script", help="comma separated actions of the scripted policy, e.g. LEFT,LEFT,DROP")
+    parser.add_argument("--workers", type=int, help="worker processes (default: all cores)")
+    parser.add_argument("--format", choices=["jsonl", "csv"], default="jsonl")
+    parser.add_argument("--output", help="result file (default: stdout)")
+    parser.add_argument("--height", type=int, default=23)
+    parser.add_argument("--width", type=int, default=12)
+    parser.add_argument("--start-level", type=int, default=0)
+    parser.add_argument("--max-pieces", type=int, default=100000)
+    parser.add_argument("--backend", default="bitboard", help="field backend: list, bitboard or numpy")
+    parser.add_argument("--generator", default="uniform", help="piece generator: uniform, bag or nes")
+    parser.add_argument("--line-score-base", help="scores of 1 to 4 cleared lines, e.g. 40,100,300,1200")
+    parser.add_argument(
+        "--level-speed-frames",
+        help="frames per gravity row from level 0 on, the last one for all higher levels, e.g. 48,43,38,...,1",
+    )
+    parser.add_argument("--frames-per-action", type=int, default=1, help="frames between two inputs (default: 1)")
+    args = parser.parse_args(argv)
+
+    config = {
+        "policy": args.policy,
+        "script": args.script,
+        "height": args.height,
+        "width": args.width,
+        "start_level": args.start_level,
+        "max_pieces": args.max_pieces,
+        "backend": args.backend,
+        "generator": args.generator,
+        "line_score_base": [int(score) for score in args.line_score_base.split(",")] if args.line_score_base else None,
+        "level_speed_frames": (
+            [int(frames) for frames in args.level_speed_frames.split(",")] if args.level_speed_frames else None
+        ),
+        "frames_per_action": args.frames_per_action,
+    }
+    results = simulate(config, range(args.seed, args.seed + args.games), args.workers)
+
+    if args.output:
+        with open(args.output, "w", newline="") as output:
+            write_results(results, output, args.format)
+    else:
+        write_results(results, sys.stdout, args.format)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""Snapshots of a running game, to suspend it and resume it after a restart.
+
+File layout (integers are unsigned LEB128 varints, as in pyTetris.replay):
+
+    b"PTSN", version
+    seed, len(generator name), generator name (utf-8), pieces drawn from the generator,
+    height, width, start level, level, score, lines, pieces, tick,
+    gravity frames elapsed, soft drops, lock delay frames, lock frames elapsed + 1 (0: not landed),
+    current type, rotation, cursor row + CURSOR_OFFSET, cursor column, next type,
+    number of rows with spins, (row, spins) per row
+    occupancy: one bit per inner cell (rows above the ground, columns between the walls), row by row
+    colours: one nibble per occupied cell, two cells per byte
+    number of stats events, (tick delta, kind, piece, column + CURSOR_OFFSET, rotation) per event
+    CRC-32 of everything before (4 bytes, big endian)
+
+The generator is not stored: it is re-created from its seed and advanced by
+the pieces drawn. The stats events (pyTetris.game) are only stored when a
+game is suspended, so that it is recorded once, when it really ends; the
+snapshots written while it is played have none and are 60-150 bytes.
+"""
+import os
+import zlib
+from pathlib import Path
+
+from pyTetris.engine import Engine
+from pyTetris.field import GROUND, WALL
+from pyTetris.randomizer import make_generator
+from pyTetris.replay import read_varint, write_varint
+from pyTetris.tetromino import Tetromino, TetrominoType
+
+MAGIC = b"PTSN"
+VERSION = 1
+
+SNAPSHOT_PATH = Path.home() / ".pyTetris" / "autosave.pts"
+
+# garbage may push the cursor above the field, up to a tetromino's height
+CURSOR_OFFSET = 4
+
+
+def snapshot(engine, events=()):
+    """The state of engine and the stats events of its game as bytes, see the module docstring."""
+
+    generator = engine.generator
+
+    if generator.name is None:
+        raise ValueError("UNNAMED GENERATOR")
+
+    buffer = bytearray(MAGIC)
+    buffer.append(VERSION)
+
+    generator_name = generator.name.encode("utf-8")
+    write_varint(buffer, generator.seed)
+    write_varint(buffer, len(generator_name))
+    buffer += generator_name
+
+    h, w = engine.playing_cursor
+    tetromino = engine.current_tetromino
+    lock_frames_elapsed = engine.lock_frames_elapsed
+    spins = [(row, count) for row, count in engine.current_tetromino_spin_matrix.items() if count]
+
+    values = [
+        generator.drawn,
+        engine.height,
+        engine.width,
+        engine.start_level,
+        engine.level,
+        engine.score,
+        engine.total_removed_lines,
+        engine.pieces,
+        engine.tick,
+        engine.gravity_frames_elapsed,
+        engine.soft_drops,
+        engine.lock_delay_frames,
+        0 if lock_frames_elapsed is None else lock_frames_elapsed + 1,
+        tetromino.tetromio_type.value,
+        tetromino.rotation_index,
+        h + CURSOR_OFFSET,
+        w,
+        engine.next_tetromino.tetromio_type.value,
+        len(spins),
+    ]
+
+    for row, count in spins:
+        values += [row, count]
+
+    for value in values:
+        write_varint(buffer, value)
+
+    occupied = 0
+    colours = []
+
+    for row in engine.field.to_list()[:-1]:
+        for value in row[1:-1]:
+            occupied <<= 1
+
+            if value:
+                occupied |= 1
+                colours.append(value)
+
+    cell_count = (engine.height - 1) * (engine.width - 2)
+    buffer += occupied.to_bytes((cell_count + 7) // 8, "big")
+
+    if len(colours) % 2:
+        colours.append(0)
+
+    buffer += bytes((colours[i] << 4) | colours[i + 1] for i in range(0, len(colours), 2))
+
+    write_varint(buffer, len(events))
+    last_tick = 0
+
+    for tick, kind, piece, column, rotation in events:
+        for value in (tick - last_tick, kind, piece, column + CURSOR_OFFSET, rotation):
+            write_varint(buffer, value)
+
+        last_tick = tick
+
+    buffer += zlib.crc32(buffer).to_bytes(4, "big")
+
+    return bytes(buffer)
+
+
+def restore(data, listener=None, backend="bitboard"):
+    """(running Engine, stats events) of a snapshot(). The listener gets no events while the engine is built."""
+
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError("NOT A PYTETRIS SNAPSHOT")
+
+    if len(data) < len(MAGIC) + 5:
+        raise ValueError("DAMAGED SNAPSHOT")
+
+    version = data[len(MAGIC)]
+
+    if version != VERSION:
+        raise ValueError(f"UNSUPPORTED SNAPSHOT VERSION: {version}")
+
+    if zlib.crc32(data[:-4]) != int.from_bytes(data[-4:], "big"):
+        raise ValueError("DAMAGED SNAPSHOT")
+
+    position = len(MAGIC) + 1
+    seed, position = read_varint(data, position)
+    name_length, position = read_varint(data, position)
+    generator_name = data[position:position + name_length].decode("utf-8")
+    position += name_length
+
+    values = []
+    for i in range(19):
+        value, position = read_varint(data, position)
+        values.append(value)
+
+    (
+        drawn,
+        height,
+        width,
+        start_level,
+        level,
+        score,
+        lines,
+        pieces,
+        tick,
+        gravity_frames_elapsed,
+        soft_drops,
+        lock_delay_frames,
+        lock_frames_elapsed,
+        current_type,
+        rotation_index,
+        cursor_h,
+        cursor_w,
+        next_type,
+        spin_rows,
+    ) = values
+
+    spin_matrix = {row: 0 for row in range(height)}
+
+    for i in range(spin_rows):
+        row, position = read_varint(data, position)
+        spin_matrix[row], position = read_varint(data, position)
+
+    cell_count = (height - 1) * (width - 2)
+    occupancy_length = (cell_count + 7) // 8
+    occupied = int.from_bytes(data[position:position + occupancy_length], "big")
+    position += occupancy_length
+
+    colours_length = (bin(occupied).count("1") + 1) // 2
+    colours = []
+
+    for byte in data[position:position + colours_length]:
+        colours += [byte >> 4, byte & 0x0F]
+
+    position += colours_length
+
+    event_count, position = read_varint(data, position)
+    events = []
+    event_tick = 0
+
+    for i in range(event_count):
+        event = []
+        for j in range(5):
+            value, position = read_varint(data, position)
+            event.append(value)
+
+        event_tick += event[0]
+        events.append((event_tick, event[1], event[2], event[3] - CURSOR_OFFSET, event[4]))
+
+    field = []
+    bit = cell_count - 1
+    colour = 0
+
+    for h in range(height - 1):
+        row = [WALL] + [0] * (width - 2) + [WALL]
+
+        for w in range(1, width - 1):
+            if occupied >> bit & 1:
+                row[w] = colours[colour]
+                colour += 1
+
+            bit -= 1
+
+        field.append(row)
+
+    field.append([GROUND] * width)
+
+    engine = Engine(height, width, start_level, backend=backend, generator=generator_name, seed=seed)
+
+    # the same sequence as before, continued where it was left
+    engine.generator = make_generator(generator_name, seed)
+
+    for i in range(drawn):
+        engine.generator.next()
+
+    engine.field.from_list(field)
+    engine.field_changed()
+
+    engine.level = level
+    engine.score = score
+    engine.total_removed_lines = lines
+    engine.pieces = pieces
+    engine.tick = tick
+    engine.gravity_frames_elapsed = gravity_frames_elapsed
+    engine.soft_drops = soft_drops
+    engine.lock_delay_frames = lock_delay_frames
+    engine.lock_frames_elapsed = lock_frames_elapsed - 1 if lock_frames_elapsed else None
+    engine.current_tetromino = Tetromino(TetrominoType(current_type), rotation_index)
+    engine.current_tetromino_spin_matrix = spin_matrix
+    engine.playing_cursor = (cursor_h - CURSOR_OFFSET, cursor_w)
+    engine.next_tetromino = Tetromino(TetrominoType(next_type))
+
+    # the next changed_cells() hands out the whole field
+    engine.invalidate_frame()
+
+    if listener is not None:
+        engine.listener = listener
+
+    return engine, events
+
+
+def save(path, data):
+    """Replaces path with data at once: a crash leaves the old or the new snapshot, never a mix."""
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary_path = path.with_name(path.name + ".tmp")
+    temporary_path.write_bytes(data)
+    os.replace(temporary_path, path)
+
+
+def load(path, listener=None, backend="bitboard"):
+    return restore(Path(path).read_bytes(), listener, backend)
+
+
+def delete(path):
+    Path(path).unlink(missing_ok=True)
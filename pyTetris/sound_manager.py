@@ -0,0 +1,108 @@
+import random
+from pathlib import Path
+
+from PyQt5.QtCore import QObject, QUrl
+from PyQt5.QtMultimedia import QSoundEffect
+
+from pyTetris.diagnostics import AUDIO_LOGGER as logger
+from pyTetris.engine import GameWindowAction
+
+SOUNDS_DIRECTORY = Path(__file__).parent / "sounds"
+
+
+def numbered(name, count):
+    return tuple(f"{name}_{number}" for number in range(1, count + 1))
+
+
+# sounds of a game window action, one of them is picked at random
+ACTION_SOUNDS = {
+    GameWindowAction.ROTATION: numbered("rotate", 7),
+    GameWindowAction.NONSENSE_ROTATION: numbered("nonsense_rotate", 7),
+    GameWindowAction.PAUSE_ACTIVATED: ("pause_on",),
+    GameWindowAction.PAUSE_INACTIVATED: ("pause_off",),
+    GameWindowAction.STAMP: numbered("stamp", 2),
+    GameWindowAction.SINGLE_LINE_CLEAR: numbered("clear_line", 3),
+    GameWindowAction.DOUBLE_LINE_CLEAR: numbered("clear_line", 3),
+    GameWindowAction.TRIPLE_LINE_CLEAR: numbered("clear_line", 3),
+    GameWindowAction.TETRIS_LINE_CLEAR: numbered("clear_tetris", 3),
+    GameWindowAction.T_SPIN_DOUBLE: ("schadenfreude_1",),
+    GameWindowAction.LEVEL_UP: numbered("level_up", 2),
+    GameWindowAction.HARD_DROP: numbered("hard_drop", 2),
+    GameWindowAction.GAME_OVER: ("game_over",),
+    GameWindowAction.DONATE_LINK: ("donate",),
+}
+
+
+class SoundBank(QObject):
+    """All sounds/*.wav, loaded once into small round-robin pools of QSoundEffect voices.
+
+        A sound that is triggered again while it still plays uses the next
+        voice of its pool instead of restarting (or re-reading) the file.
+    """
+
+    def __init__(self, parent=None, voices=3):
+        super(SoundBank, self).__init__(parent)
+
+        self.pools = {}
+        self.next_voice = {}
+
+        for path in sorted(SOUNDS_DIRECTORY.glob("*.wav")):
+            pool = []
+
+            for voice in range(voices):
+                effect = QSoundEffect(self)
+                effect.setSource(QUrl.fromLocalFile(str(path)))
+                pool.append(effect)
+
+            self.pools[path.stem] = pool
+            self.next_voice[path.stem] = 0
+
+        if not self.pools:
+            logger.warning("no sounds found in %s", SOUNDS_DIRECTORY)
+        else:
+            logger.debug("loaded %d sounds with %d voices each", len(self.pools), voices)
+
+    def play(self, name):
+        pool = self.pools.get(name)
+
+        if pool is None:
+            logger.warning("unknown sound %s", name)
+            return
+
+        voice = self.next_voice[name]
+        self.next_voice[name] = (voice + 1) % len(pool)
+
+        pool[voice].play()
+
+
+class SoundManager(QObject):
+    def __init__(self, parent, sound_bank, instrumentation=None):
+        super(SoundManager, self).__init__(parent)
+
+        self.sound_bank = sound_bank
+        self.instrumentation = instrumentation
+
+        # own generator, picking sounds must not shift the piece sequence
+        self.random = random.Random()
+
+    def on_game_window_action(
+            self,
+            game_window_action,
+            current_tetromino=None,
+            count_rotations=0,
+            has_minimum_3_occupied_edges=False,
+    ):
+        instrumentation = self.instrumentation
+
+        if instrumentation is not None:
+            started = instrumentation.now()
+
+        sounds = ACTION_SOUNDS.get(game_window_action)
+
+        if sounds:
+            sound = self.random.choice(sounds)
+            logger.debug("%s: %s", game_window_action.name, sound)
+            self.sound_bank.play(sound)
+
+        if instrumentation is not None:
+            instrumentation.since("sound", started)
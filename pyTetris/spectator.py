@@ -0,0 +1,255 @@
+"""Spectator feed (pyTetris --broadcast): read-only viewers of the local game over localhost TCP.
+
+The game only appends its events to a deque; the feed's own thread (an
+asyncio loop) takes them once per frame, so publishing neither waits for a
+viewer nor wakes the feed thread. Every viewer has pending changes
+instead of a message queue: a new change of a cell overwrites an unsent
+one, so a viewer that reads slowly gets fewer, merged frames, and one that
+stops reading is dropped after DROP_AFTER seconds. A new viewer first gets
+the whole field. The frames are those of pyTetris.protocol, as player 0.
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+
+from pyTetris.diagnostics import RENDER_LOGGER as logger
+from pyTetris.protocol import (
+    CELLS,
+    GAME_OVER,
+    START,
+    STATS,
+    STATS_FORMAT,
+    WELCOME,
+    WELCOME_FORMAT,
+    encode_frame,
+    encode_player_frame,
+    pack_cells,
+)
+
+DEFAULT_PORT = 7374
+
+# a viewer with more bytes unsent than this gets no new frames, its changes are merged
+MAX_WRITE_BUFFER = 64 * 1024
+# seconds a viewer may stay above MAX_WRITE_BUFFER before it is dropped
+DROP_AFTER = 5.0
+# seconds between two batches of published events
+FLUSH_INTERVAL = 1 / 60
+
+# cells per CELLS frame, below the 64 KiB payload limit
+CELLS_PER_FRAME = 20000
+
+
+class Subscriber(asyncio.Protocol):
+    def __init__(self, feed):
+        self.feed = feed
+        self.transport = None
+        self.pending_cells = {}
+        self.stats_dirty = False
+        self.round_started = False
+        self.game_over = False
+        self.slow_since = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.feed.subscribe(self)
+
+    def connection_lost(self, exc):
+        self.feed.subscribers.discard(self)
+
+    def data_received(self, data):
+        # viewers are read-only
+        pass
+
+
+class SpectatorFeed:
+    def __init__(self, height, width, host="127.0.0.1", port=DEFAULT_PORT):
+        self.height = height
+        self.width = width
+        self.host = host
+        self.port = port
+
+        # the feed's view of the game, owned by the feed thread
+        self.field = {}
+        self.stats = {"score": 0, "lines": 0, "level": 0, "next": 0}
+        self.subscribers = set()
+        # (merge method, args) appended by the game thread
+        self.inbox = deque()
+        self.behind = False
+
+        self.loop = None
+        self.server = None
+        self.thread = None
+
+    def start(self):
+        """Starts the feed thread, returns once it listens (self.port is the bound port)."""
+
+        ready = threading.Event()
+        errors = []
+
+        def run():
+            self.loop = asyncio.new_event_loop()
+
+            try:
+                self.server = self.loop.run_until_complete(
+                    self.loop.create_server(lambda: Subscriber(self), self.host, self.port)
+                )
+            except OSError as e:
+                errors.append(e)
+                ready.set()
+                return
+
+            self.port = self.server.sockets[0].getsockname()[1]
+            ready.set()
+
+            self.loop.call_soon(self.flush_all)
+
+            self.loop.run_forever()
+
+            self.server.close()
+
+            for subscriber in list(self.subscribers):
+                subscriber.transport.abort()
+
+            self.loop.run_until_complete(self.server.wait_closed())
+            self.loop.close()
+
+        self.thread = threading.Thread(target=run, name="pyTetris-spectator", daemon=True)
+        self.thread.start()
+        ready.wait()
+
+        if errors:
+            raise errors[0]
+
+        logger.info("spectator feed on %s:%d", self.host, self.port)
+
+    def stop(self):
+        if self.thread and self.thread.is_alive():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(2)
+
+    # called by the game, from its thread
+
+    def publish_cells(self, changed_cells):
+        self.inbox.append((self.merge_cells, changed_cells))
+
+    def publish_stat(self, name, value):
+        self.inbox.append((self.merge_stat, name, value))
+
+    def publish_event(self, kind):
+        """START (a new round) or GAME_OVER."""
+
+        self.inbox.append((self.merge_event, kind))
+
+    # feed thread
+
+    def subscribe(self, subscriber):
+        subscriber.transport.write(encode_frame(WELCOME, WELCOME_FORMAT.pack(0, 1, self.height, self.width, 0)))
+        subscriber.pending_cells = dict(self.field)
+        subscriber.stats_dirty = True
+        self.subscribers.add(subscriber)
+        self.flush(subscriber, time.monotonic())
+
+        logger.info("spectator %s joined, %d watching", subscriber.transport.get_extra_info("peername"), len(self.subscribers))
+
+    def merge_cells(self, changed_cells):
+        changes = {(h, w): value for h, w, value in changed_cells}
+        self.field.update(changes)
+
+        for subscriber in self.subscribers:
+            subscriber.pending_cells.update(changes)
+
+    def merge_stat(self, name, value):
+        self.stats[name] = value
+
+        for subscriber in self.subscribers:
+            subscriber.stats_dirty = True
+
+    def merge_event(self, kind):
+        if kind == START:
+            self.stats = {"score": 0, "lines": 0, "level": 0, "next": 0}
+
+        for subscriber in self.subscribers:
+            if kind == START:
+                # what the viewer has not got of the last round is obsolete, the new field follows
+                subscriber.pending_cells.clear()
+                subscriber.round_started = True
+                subscriber.stats_dirty = True
+                subscriber.game_over = False
+            elif kind == GAME_OVER:
+                subscriber.game_over = True
+
+    def flush_all(self):
+        """Merges the events published since the last call and writes them to the viewers, once per frame."""
+
+        self.loop.call_later(FLUSH_INTERVAL, self.flush_all)
+
+        inbox = self.inbox
+
+        if not inbox and not self.behind:
+            return
+
+        while inbox:
+            merge, *args = inbox.popleft()
+            merge(*args)
+
+        now = time.monotonic()
+        self.behind = False
+
+        for subscriber in list(self.subscribers):
+            if not self.flush(subscriber, now):
+                self.behind = True
+
+    def flush(self, subscriber, now):
+        """Writes the pending changes of subscriber, False if it is too far behind to take them now."""
+
+        transport = subscriber.transport
+
+        if transport.get_write_buffer_size() > MAX_WRITE_BUFFER:
+            if subscriber.slow_since is None:
+                subscriber.slow_since = now
+            elif now - subscriber.slow_since > DROP_AFTER:
+                logger.warning("dropping spectator %s: not reading", transport.get_extra_info("peername"))
+                transport.abort()
+                return True
+
+            return False
+
+        subscriber.slow_since = None
+        frames = []
+
+        if subscriber.round_started:
+            subscriber.round_started = False
+            frames.append(encode_frame(START))
+
+        cells = [(h, w, value) for (h, w), value in subscriber.pending_cells.items()]
+        subscriber.pending_cells = {}
+
+        for first in range(0, len(cells), CELLS_PER_FRAME):
+            frames.append(encode_player_frame(CELLS, 0, pack_cells(cells[first:first + CELLS_PER_FRAME])))
+
+        if subscriber.stats_dirty:
+            subscriber.stats_dirty = False
+            stats = self.stats
+            frames.append(
+                encode_frame(
+                    STATS,
+                    STATS_FORMAT.pack(
+                        0,
+                        stats["score"],
+                        min(stats["lines"], 0xFFFF),
+                        min(stats["level"], 0xFF),
+                        0,
+                        stats["next"],
+                    ),
+                )
+            )
+
+        if subscriber.game_over:
+            subscriber.game_over = False
+            frames.append(encode_player_frame(GAME_OVER, 0))
+
+        if frames:
+            transport.write(b"".join(frames))
+
+        return True
@@ -0,0 +1,73 @@
+from PyQt5.QtNetwork import QTcpSocket
+from PyQt5.QtWidgets import QLabel, QVBoxLayout, QWidget
+
+from pyTetris.board_widget import BoardWidget
+from pyTetris.diagnostics import RENDER_LOGGER as logger
+from pyTetris.engine import TetrominoType
+from pyTetris.protocol import (
+    CELLS,
+    GAME_OVER,
+    START,
+    STATS,
+    STATS_FORMAT,
+    WELCOME,
+    WELCOME_FORMAT,
+    FrameReader,
+    unpack_cells,
+)
+
+
+class SpectatorWindow(QWidget):
+    """Read-only viewer of a game broadcast with pyTetris --broadcast (pyTetris.spectator)."""
+
+    def __init__(self, host, port, parent=None):
+        super(SpectatorWindow, self).__init__(parent)
+
+        self.host = host
+        self.port = port
+        self.setWindowTitle(f"pyTetris - watching {host}:{port}")
+
+        self.column = QVBoxLayout(self)
+        self.status_label = QLabel("connecting ...")
+        self.stats_label = QLabel()
+        self.column.addWidget(self.status_label)
+        self.column.addWidget(self.stats_label)
+        self.board = None
+
+        self.reader = FrameReader()
+        self.socket = QTcpSocket(self)
+        self.socket.readyRead.connect(self.on_ready_read)
+        self.socket.disconnected.connect(self.on_disconnected)
+        self.socket.errorOccurred.connect(self.on_socket_error)
+        self.socket.connectToHost(host, port)
+
+    def on_ready_read(self):
+        for kind, payload in self.reader.feed(bytes(self.socket.readAll())):
+            self.handle_frame(kind, payload)
+
+    def handle_frame(self, kind, payload):
+        if kind == WELCOME:
+            index, players, height, width, seed = WELCOME_FORMAT.unpack(payload)
+
+            if self.board is None:
+                self.board = BoardWidget(height, width, cell_size=20, first_row=2)
+                self.column.insertWidget(1, self.board)
+
+            self.status_label.setText("watching")
+        elif kind == START:
+            self.status_label.setText("watching")
+        elif kind == CELLS and self.board is not None:
+            self.board.set_cells(unpack_cells(payload[1:]))
+        elif kind == STATS:
+            player, score, lines, level, pending, next_type = STATS_FORMAT.unpack(payload)
+            next_name = TetrominoType(next_type).name.split("_")[0] if next_type else "-"
+            self.stats_label.setText(f"score {score}  lines {lines}  level {level}  next {next_name}")
+        elif kind == GAME_OVER:
+            self.status_label.setText("game over")
+
+    def on_disconnected(self):
+        self.status_label.setText("disconnected")
+
+    def on_socket_error(self, error):
+        logger.error("spectating %s:%d: %s", self.host, self.port, self.socket.errorString())
+        self.status_label.setText(self.socket.errorString())
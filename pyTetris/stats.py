@@ -0,0 +1,231 @@
+"""High scores and statistics of the played games: python -m pyTetris.stats --top 10 [--today] [--start-level N]
+
+Every finished live game is one row of `games`, its placements, line
+clears, T-spins and hard drops are rows of `events`. The GUI thread only
+puts finished games on a queue; a writer thread inserts them in batches,
+one transaction per batch. The leaderboard queries read through their own
+connection (WAL: reads never wait for the writer) and are answered from the
+score indexes, without sorting the whole table.
+"""
+import argparse
+import queue
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from pyTetris.diagnostics import STATS_LOGGER as logger
+
+DEFAULT_PATH = Path.home() / ".pyTetris" / "stats.sqlite3"
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    ended_at REAL NOT NULL,
+    day TEXT NOT NULL,
+    start_level INTEGER NOT NULL,
+    score INTEGER NOT NULL,
+    lines INTEGER NOT NULL,
+    level INTEGER NOT NULL,
+    seconds REAL NOT NULL,
+    pieces INTEGER NOT NULL,
+    generator TEXT,
+    seed INTEGER,
+    game_over INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS events (
+    game_id INTEGER NOT NULL REFERENCES games(id),
+    tick INTEGER NOT NULL,
+    kind INTEGER NOT NULL,
+    piece INTEGER,
+    column INTEGER,
+    rotation INTEGER
+);
+CREATE INDEX IF NOT EXISTS games_score ON games(score DESC);
+CREATE INDEX IF NOT EXISTS games_day_score ON games(day, score DESC);
+CREATE INDEX IF NOT EXISTS games_start_level_score ON games(start_level, score DESC);
+CREATE INDEX IF NOT EXISTS events_game ON events(game_id);
+"""
+
+GAME_COLUMNS = (
+    "ended_at",
+    "day",
+    "start_level",
+    "score",
+    "lines",
+    "level",
+    "seconds",
+    "pieces",
+    "generator",
+    "seed",
+    "game_over",
+)
+
+INSERT_GAME = f"INSERT INTO games ({', '.join(GAME_COLUMNS)}) VALUES ({', '.join('?' * len(GAME_COLUMNS))})"
+INSERT_EVENT = "INSERT INTO events (game_id, tick, kind, piece, column, rotation) VALUES (?, ?, ?, ?, ?, ?)"
+
+LEADERBOARD_COLUMNS = ("id", "score", "lines", "level", "start_level", "seconds", "ended_at")
+
+
+def connect(path):
+    connection = sqlite3.connect(str(path), timeout=10)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+
+    return connection
+
+
+class StatsStore:
+    """The stats database of path: record_game() from any thread, the queries from the thread that made the store."""
+
+    def __init__(self, path=DEFAULT_PATH, batch_size=256):
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.queue = queue.SimpleQueue()
+        self.writer = None
+        self.written = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = connect(self.path)
+
+        with self.connection:
+            self.connection.executescript(SCHEMA)
+            version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+
+            if version > SCHEMA_VERSION:
+                raise ValueError(f"UNSUPPORTED STATS SCHEMA VERSION: {version}")
+
+            self.connection.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    def start(self):
+        self.writer = threading.Thread(target=self.write_batches, name="pyTetris-stats", daemon=True)
+        self.writer.start()
+
+    def close(self):
+        """Writes what is queued and stops the writer."""
+
+        if self.writer is not None:
+            self.queue.put(None)
+            self.writer.join()
+            self.writer = None
+
+        self.connection.close()
+
+    def record_game(self, game, events):
+        """game: {column: value} of GAME_COLUMNS, events: [(tick, kind, piece, column, rotation), ...]. Never blocks."""
+
+        self.queue.put((game, events))
+
+    def write_batches(self):
+        connection = connect(self.path)
+
+        try:
+            while True:
+                batch = [self.queue.get()]
+
+                while batch[-1] is not None and len(batch) < self.batch_size:
+                    try:
+                        batch.append(self.queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+                stop = batch[-1] is None
+                games = [item for item in batch if item is not None]
+
+                try:
+                    self.insert(connection, games)
+                except sqlite3.Error:
+                    logger.exception("could not write %d games to %s", len(games), self.path)
+
+                if stop:
+                    return
+        finally:
+            connection.close()
+
+    def insert(self, connection, games):
+        with connection:
+            for game, events in games:
+                game_id = connection.execute(INSERT_GAME, [game[column] for column in GAME_COLUMNS]).lastrowid
+                connection.executemany(INSERT_EVENT, [(game_id, *event) for event in events])
+
+        self.written += len(games)
+        logger.debug("wrote %d games", len(games))
+
+    def top(self, count=10, day=None, start_level=None):
+        """The count best games of all time, of a day ('YYYY-MM-DD') or of a start level, as dicts."""
+
+        conditions = []
+        parameters = []
+
+        if day is not None:
+            conditions.append("day = ?")
+            parameters.append(day)
+
+        if start_level is not None:
+            conditions.append("start_level = ?")
+            parameters.append(start_level)
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self.connection.execute(
+            f"SELECT {', '.join(LEADERBOARD_COLUMNS)} FROM games {where} ORDER BY score DESC LIMIT ?",
+            parameters + [count],
+        )
+
+        return [dict(zip(LEADERBOARD_COLUMNS, row)) for row in rows]
+
+    def start_levels(self):
+        """The start levels that have games (a skip scan of the start level index)."""
+
+        levels = []
+        row = self.connection.execute("SELECT MIN(start_level) FROM games").fetchone()
+
+        while row[0] is not None:
+            levels.append(row[0])
+            row = self.connection.execute("SELECT MIN(start_level) FROM games WHERE start_level > ?", (row[0],)).fetchone()
+
+        return levels
+
+    def games_played(self) -> int:
+        return self.connection.execute("SELECT MAX(id) FROM games").fetchone()[0] or 0
+
+    def event_counts(self, game_id):
+        """{kind: count} of one game's events."""
+
+        rows = self.connection.execute("SELECT kind, COUNT(*) FROM events WHERE game_id = ? GROUP BY kind", (game_id,))
+
+        return dict(rows.fetchall())
+
+
+def today():
+    return time.strftime("%Y-%m-%d")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m pyTetris.stats", description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=str(DEFAULT_PATH), help=f"stats database (default: {DEFAULT_PATH})")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--today", action="store_true", help="only the games of today")
+    parser.add_argument("--day", help="only the games of this day (YYYY-MM-DD)")
+    parser.add_argument("--start-level", type=int)
+    args = parser.parse_args(argv)
+
+    store = StatsStore(args.db)
+    day = today() if args.today else args.day
+
+    print(f"{'#':>3} {'score':>8} {'lines':>6} {'level':>5} {'start':>5} {'time':>7}  ended")
+
+    for rank, game in enumerate(store.top(args.top, day, args.start_level), 1):
+        minutes, seconds = divmod(int(game["seconds"]), 60)
+        ended = time.strftime("%Y-%m-%d %H:%M", time.localtime(game["ended_at"]))
+        print(
+            f"{rank:>3} {game['score']:>8} {game['lines']:>6} {game['level']:>5} "
+            f"{game['start_level']:>5} {minutes:>4}:{seconds:02d}  {ended}"
+        )
+
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
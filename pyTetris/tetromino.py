@@ -0,0 +1,119 @@
+from enum import IntEnum, auto
+
+
+class TetrominoType(IntEnum):
+    I_BRICK = auto()
+    J_BRICK = auto()
+    L_BRICK = auto()
+    O_BRICK = auto()
+    S_BRICK = auto()
+    T_BRICK = auto()
+    Z_BRICK = auto()
+
+
+class RotationType(IntEnum):
+    CLOCKWISE = auto()
+    COUNTER_CLOCKWISE = auto()
+
+
+def _rotation_states(t, *matrices):
+    states = []
+
+    for matrix in matrices:
+        brick_matrix = tuple(tuple(t if cell else 0 for cell in line) for line in matrix)
+        cells = tuple(
+            (h, w) for h, line in enumerate(brick_matrix) for w, cell in enumerate(line) if cell
+        )
+        states.append((brick_matrix, cells))
+
+    return tuple(states)
+
+
+# all rotation states of every tetromino: (brick_matrix, occupied (h, w) offsets)
+ROTATION_TABLE = {
+    TetrominoType.I_BRICK: _rotation_states(
+        TetrominoType.I_BRICK.value,
+        [[0, 0, 0, 0], [0, 0, 0, 0], [1, 1, 1, 1], [0, 0, 0, 0]],
+        [[0, 1, 0, 0], [0, 1, 0, 0], [0, 1, 0, 0], [0, 1, 0, 0]],
+    ),
+    TetrominoType.J_BRICK: _rotation_states(
+        TetrominoType.J_BRICK.value,
+        [[0, 0, 0], [1, 1, 1], [0, 0, 1]],
+        [[0, 1, 0], [0, 1, 0], [1, 1, 0]],
+        [[1, 0, 0], [1, 1, 1], [0, 0, 0]],
+        [[0, 1, 1], [0, 1, 0], [0, 1, 0]],
+    ),
+    TetrominoType.L_BRICK: _rotation_states(
+        TetrominoType.L_BRICK.value,
+        [[0, 0, 0], [1, 1, 1], [1, 0, 0]],
+        [[1, 1, 0], [0, 1, 0], [0, 1, 0]],
+        [[0, 0, 1], [1, 1, 1], [0, 0, 0]],
+        [[0, 1, 0], [0, 1, 0], [0, 1, 1]],
+    ),
+    TetrominoType.O_BRICK: _rotation_states(
+        TetrominoType.O_BRICK.value,
+        [[0, 0, 0, 0], [0, 1, 1, 0], [0, 1, 1, 0], [0, 0, 0, 0]],
+    ),
+    TetrominoType.S_BRICK: _rotation_states(
+        TetrominoType.S_BRICK.value,
+        [[0, 0, 0], [0, 1, 1], [1, 1, 0]],
+        [[1, 0, 0], [1, 1, 0], [0, 1, 0]],
+    ),
+    TetrominoType.T_BRICK: _rotation_states(
+        TetrominoType.T_BRICK.value,
+        [[0, 0, 0], [1, 1, 1], [0, 1, 0]],
+        [[0, 1, 0], [1, 1, 0], [0, 1, 0]],
+        [[0, 1, 0], [1, 1, 1], [0, 0, 0]],
+        [[0, 1, 0], [0, 1, 1], [0, 1, 0]],
+    ),
+    TetrominoType.Z_BRICK: _rotation_states(
+        TetrominoType.Z_BRICK.value,
+        [[0, 0, 0], [1, 1, 0], [0, 1, 1]],
+        [[0, 1, 0], [1, 1, 0], [1, 0, 0]],
+    ),
+}
+
+
+class Tetromino:
+    __slots__ = ("tetromio_type", "rotation_index")
+
+    def __init__(self, tetromio_type, rotation_index=0):
+        self.tetromio_type = tetromio_type
+        self.rotation_index = rotation_index
+
+    @property
+    def rotations(self):
+        return ROTATION_TABLE[self.tetromio_type]
+
+    @property
+    def brick_matrix(self):
+        return ROTATION_TABLE[self.tetromio_type][self.rotation_index][0]
+
+    @property
+    def cells(self):
+        return ROTATION_TABLE[self.tetromio_type][self.rotation_index][1]
+
+    def rotated_index(self, rotation_type):
+        if rotation_type == RotationType.CLOCKWISE:
+            return (self.rotation_index + 1) % len(ROTATION_TABLE[self.tetromio_type])
+
+        return (self.rotation_index - 1) % len(ROTATION_TABLE[self.tetromio_type])
+
+    def rotate(self, rotation_type):
+        self.rotation_index = self.rotated_index(rotation_type)
+
+
+def _column_bottoms(cells):
+    bottoms = {}
+
+    for h, w in cells:
+        bottoms[w] = max(h, bottoms.get(w, h))
+
+    return tuple(sorted(bottoms.items()))
+
+
+# per rotation state: ((column offset, lowest row offset in that column), ...)
+COLUMN_BOTTOM_TABLE = {
+    tetromino_type: tuple(_column_bottoms(cells) for brick_matrix, cells in states)
+    for tetromino_type, states in ROTATION_TABLE.items()
+}
@@ -0,0 +1,234 @@
+"""Agent weight tuner: python -m pyTetris.tune --generations 30 --population 64 --checkpoint tune.json
+
+Cross-entropy search over the heuristic weights of the Agent. Every
+generation samples a population of weight vectors around the current mean,
+plays the same seeded games with each of them on a pool of worker processes
+and moves the mean and spread to the elite. Progress is checkpointed as JSON
+after every generation and an existing checkpoint is resumed.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from pyTetris.agent import Agent, AgentPolicy, DEFAULT_WEIGHTS
+from pyTetris.simulate import make_engine, play
+
+WEIGHT_NAMES = list(DEFAULT_WEIGHTS)
+
+CHECKPOINT_VERSION = 1
+
+# config of the worker process, set once by init_worker
+worker_config = None
+
+
+def init_worker(config):
+    global worker_config
+    worker_config = config
+
+
+def evaluate(task):
+    """Plays one game with one weight vector (in a worker), returns its fitness."""
+
+    weights, seed = task
+    config = worker_config
+
+    engine = make_engine(config, seed)
+    agent = Agent(dict(zip(WEIGHT_NAMES, weights)), config["beam_width"])
+    play(engine, AgentPolicy(seed, agent), config["max_pieces"])
+
+    if config["metric"] == "score":
+        return engine.score
+
+    return engine.total_removed_lines
+
+
+def normalised(vector):
+    """The heuristic only ranks boards, so a weight vector and its multiples play the same."""
+
+    length = math.sqrt(sum(value * value for value in vector)) or 1.0
+
+    return [value / length for value in vector]
+
+
+class CrossEntropyTuner:
+    def __init__(self, config, population=64, elite_fraction=0.2, sigma=0.5, noise=0.1, seed=0):
+        self.config = config
+        self.population = population
+        self.elite_count = max(2, round(population * elite_fraction))
+        self.noise = noise
+        self.seed = seed
+
+        self.generation = 0
+        self.mean = normalised([DEFAULT_WEIGHTS[name] for name in WEIGHT_NAMES])
+        self.std = [sigma] * len(WEIGHT_NAMES)
+        self.best_weights = list(self.mean)
+        self.best_fitness = None
+        self.history = []
+
+    def sample(self):
+        # every generation has its own stream, a resumed run samples what the uninterrupted run would have
+        rng = random.Random(self.seed * 1000003 + self.generation)
+
+        return [
+            normalised([rng.gauss(mean, std) for mean, std in zip(self.mean, self.std)])
+            for i in range(self.population)
+        ]
+
+    def game_seeds(self, games):
+        first = self.seed * 1000003 + self.generation * games
+
+        return range(first, first + games)
+
+    def step(self, executor, generations, chunksize=1):
+        """Evaluates one generation and updates mean and spread, returns the generation's report."""
+
+        started = time.perf_counter()
+        games = self.config["games"]
+        candidates = self.sample()
+        seeds = self.game_seeds(games)
+        tasks = [(candidate, seed) for candidate in candidates for seed in seeds]
+
+        results = list(executor.map(evaluate, tasks, chunksize=chunksize))
+        fitnesses = [sum(results[i * games:(i + 1) * games]) / games for i in range(len(candidates))]
+
+        ranked = sorted(zip(fitnesses, range(len(candidates))), reverse=True)
+        elite = [candidates[i] for fitness, i in ranked[:self.elite_count]]
+
+        # decreasing extra noise keeps the spread from collapsing too early
+        extra = self.noise * max(0.0, 1.0 - self.generation / max(1, generations))
+
+        for w in range(len(WEIGHT_NAMES)):
+            values = [weights[w] for weights in elite]
+            mean = sum(values) / len(values)
+            variance = sum((value - mean) ** 2 for value in values) / len(values)
+            self.mean[w] = mean
+            self.std[w] = math.sqrt(variance) + extra
+
+        self.mean = normalised(self.mean)
+
+        if self.best_fitness is None or ranked[0][0] > self.best_fitness:
+            self.best_fitness = ranked[0][0]
+            self.best_weights = candidates[ranked[0][1]]
+
+        report = {
+            "generation": self.generation,
+            "mean_fitness": round(sum(fitnesses) / len(fitnesses), 3),
+            "elite_fitness": round(sum(fitness for fitness, i in ranked[:self.elite_count]) / self.elite_count, 3),
+            "best_fitness": ranked[0][0],
+            "mean": self.weights(self.mean),
+            "duration": round(time.perf_counter() - started, 3),
+        }
+        self.history.append(report)
+        self.generation += 1
+
+        return report
+
+    def weights(self, vector):
+        return {name: round(value, 6) for name, value in zip(WEIGHT_NAMES, vector)}
+
+    def to_json(self):
+        return {
+            "version": CHECKPOINT_VERSION,
+            "config": self.config,
+            "population": self.population,
+            "elite_count": self.elite_count,
+            "noise": self.noise,
+            "seed": self.seed,
+            "generation": self.generation,
+            "mean": self.mean,
+            "std": self.std,
+            "best_weights": self.best_weights,
+            "best_fitness": self.best_fitness,
+            "history": self.history,
+        }
+
+    def save(self, path):
+        path = Path(path)
+        temporary = path.with_name(path.name + ".tmp")
+        temporary.write_text(json.dumps(self.to_json(), indent=2))
+
+        # a run killed while writing keeps the previous checkpoint
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path):
+        data = json.loads(Path(path).read_text())
+
+        if data.get("version") != CHECKPOINT_VERSION:
+            raise ValueError(f"UNSUPPORTED CHECKPOINT VERSION: {data.get('version')}")
+
+        tuner = cls(data["config"], data["population"], noise=data["noise"], seed=data["seed"])
+        tuner.elite_count = data["elite_count"]
+        tuner.generation = data["generation"]
+        tuner.mean = data["mean"]
+        tuner.std = data["std"]
+        tuner.best_weights = data["best_weights"]
+        tuner.best_fitness = data["best_fitness"]
+        tuner.history = data["history"]
+
+        return tuner
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m pyTetris.tune", description=__doc__.splitlines()[0])
+    parser.add_argument("--generations", type=int, default=30, help="generations in total, resumed ones included")
+    parser.add_argument("--population", type=int, default=64, help="weight vectors per generation")
+    parser.add_argument("--elite", type=float, default=0.2, help="fraction of the population the next mean is fit to")
+    parser.add_argument("--games", type=int, default=8, help="seeded games per weight vector (new runs)")
+    parser.add_argument("--sigma", type=float, default=0.5, help="initial spread of every weight")
+    parser.add_argument("--noise", type=float, default=0.1, help="extra spread, decreasing to 0 over the generations")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, help="worker processes (default: all cores)")
+    parser.add_argument("--checkpoint", default="tune.json", help="checkpoint file, resumed if it exists")
+    parser.add_argument("--metric", choices=["lines", "score"], default="lines")
+    parser.add_argument("--beam-width", type=int, default=4)
+    parser.add_argument("--max-pieces", type=int, default=500)
+    parser.add_argument("--height", type=int, default=23)
+    parser.add_argument("--width", type=int, default=12)
+    parser.add_argument("--start-level", type=int, default=0)
+    parser.add_argument("--backend", default="bitboard", help="field backend: list, bitboard or numpy")
+    parser.add_argument("--generator", default="uniform", help="piece generator: uniform, bag or nes")
+    args = parser.parse_args(argv)
+
+    if Path(args.checkpoint).exists():
+        tuner = CrossEntropyTuner.load(args.checkpoint)
+        print(f"resuming {args.checkpoint} at generation {tuner.generation}", file=sys.stderr)
+    else:
+        config = {
+            "height": args.height,
+            "width": args.width,
+            "start_level": args.start_level,
+            "games": args.games,
+            "max_pieces": args.max_pieces,
+            "backend": args.backend,
+            "generator": args.generator,
+            "beam_width": args.beam_width,
+            "metric": args.metric,
+        }
+        tuner = CrossEntropyTuner(config, args.population, args.elite, args.sigma, args.noise, args.seed)
+
+    workers = args.workers or os.cpu_count() or 1
+
+    # small chunks: games end after very different numbers of pieces
+    chunksize = max(1, tuner.population * tuner.config["games"] // (workers * 8))
+
+    # one pool for the whole run: workers import the engine once and are reused for every game
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(tuner.config,)) as executor:
+        while tuner.generation < args.generations:
+            report = tuner.step(executor, args.generations, chunksize)
+            tuner.save(args.checkpoint)
+
+            print(json.dumps(report))
+            sys.stdout.flush()
+
+    print(json.dumps({"best_fitness": tuner.best_fitness, "best_weights": tuner.weights(tuner.best_weights)}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""Versus mode: 2 to 8 boards, line clears send garbage rows to an opponent.
+
+Every board's Engine runs in a worker process (run_board) on its own
+FrameClock, so the boards do not share one interpreter. The GUI process
+only routes inputs and garbage to the workers and gets back one small
+update per worker iteration: the changed cells packed as bytes and the
+counters that changed since the last update.
+"""
+from pyTetris.agent import Agent, AgentDriver
+from pyTetris.engine import Action, Engine, EngineListener, GameWindowAction
+from pyTetris.frame_clock import FrameClock
+from pyTetris.protocol import pack_cells
+
+MIN_BOARDS = 2
+MAX_BOARDS = 8
+
+# garbage rows sent per line clear
+GARBAGE_LINES = {
+    GameWindowAction.DOUBLE_LINE_CLEAR: 1,
+    GameWindowAction.TRIPLE_LINE_CLEAR: 2,
+    GameWindowAction.TETRIS_LINE_CLEAR: 4,
+    GameWindowAction.T_SPIN_DOUBLE: 4,
+}
+
+
+def garbage_target(alive, attacker):
+    """The board the garbage of attacker goes to: the next one still alive, None if there is none."""
+
+    boards = len(alive)
+
+    for offset in range(1, boards):
+        target = (attacker + offset) % boards
+
+        if alive[target]:
+            return target
+
+    return None
+
+
+class BoardListener(EngineListener):
+    def __init__(self):
+        self.field_dirty = False
+        self.sent = 0
+        self.game_over = False
+        self.next_type = 0
+
+    def on_field_changed(self, engine):
+        self.field_dirty = True
+
+    def on_next_tetromino(self, tetromino):
+        self.next_type = tetromino.tetromio_type.value
+
+    def on_game_window_action(self, game_window_action, *args):
+        self.sent += GARBAGE_LINES.get(game_window_action, 0)
+
+    def on_game_over(self):
+        self.game_over = True
+
+
+class Board:
+    """The engine of one versus board and what it owes the GUI, inside a worker.
+
+        Garbage received is pending until the next tetromino locks: lines
+        cleared by that lock cancel pending rows first, the rest is sent on.
+    """
+
+    def __init__(self, config):
+        self.listener = BoardListener()
+        self.engine = Engine(
+            config["height"],
+            config["width"],
+            config.get("start_level", 0),
+            listener=self.listener,
+            backend=config.get("backend", "bitboard"),
+            generator=config.get("generator"),
+            seed=config.get("seed"),
+        )
+
+        self.driver = None
+
+        if config.get("bot"):
+            self.driver = AgentDriver(Agent(beam_width=config.get("beam_width", 4)), config.get("frames_per_action", 1))
+
+        self.soft_drop_frame = None
+        self.listener.next_type = self.engine.next_tetromino.tetromio_type.value
+        self.piece = self.engine.pieces
+        # [count, hole column] batches in arrival order
+        self.pending_garbage = []
+        self.outgoing = 0
+        self.reported = {}
+
+    def handle(self, command):
+        kind = command[0]
+        engine = self.engine
+
+        if not engine.is_running:
+            return
+
+        if kind == "input":
+            if command[1] == Action.DOWN:
+                self.soft_drop_frame = engine.tick
+
+            engine.apply_action(command[1])
+            self.check_lock()
+        elif kind == "soft_drop":
+            self.soft_drop_frame = engine.tick if command[1] else None
+        elif kind == "garbage":
+            self.pending_garbage.append([command[1], command[2]])
+        else:
+            raise ValueError(f"UNKNOWN VERSUS COMMAND: {kind}")
+
+    def knock_out(self):
+        if self.engine.is_running:
+            self.engine.game_over()
+
+    def advance(self, frame):
+        engine = self.engine
+
+        while engine.is_running and engine.tick < frame:
+            engine.advance_frame()
+
+            if self.soft_drop_frame is not None and (engine.tick - self.soft_drop_frame) % engine.soft_drop_frames == 0:
+                engine.apply_action(Action.DOWN)
+
+            if self.driver and engine.is_running:
+                self.driver.step(engine)
+
+            self.check_lock()
+
+    def check_lock(self):
+        if self.engine.pieces == self.piece:
+            return
+
+        self.piece = self.engine.pieces
+        sent = self.listener.sent
+        self.listener.sent = 0
+
+        while sent and self.pending_garbage:
+            cancelled = min(sent, self.pending_garbage[0][0])
+            sent -= cancelled
+            self.pending_garbage[0][0] -= cancelled
+
+            if not self.pending_garbage[0][0]:
+                self.pending_garbage.pop(0)
+
+        self.outgoing += sent
+
+        for count, hole_column in self.pending_garbage:
+            if not self.engine.add_garbage(count, hole_column):
+                break
+
+        self.pending_garbage = []
+
+    def update(self):
+        """The changes since the last update as a dict, None if nothing changed."""
+
+        engine = self.engine
+        update = {}
+
+        if self.listener.field_dirty:
+            self.listener.field_dirty = False
+            changed_cells = engine.changed_cells()
+
+            if changed_cells:
+                update["cells"] = pack_cells(changed_cells)
+
+        counters = {
+            "score": engine.score,
+            "lines": engine.total_removed_lines,
+            "level": engine.level,
+            "pending": sum(count for count, hole_column in self.pending_garbage),
+            "next": self.listener.next_type,
+            "game_over": self.listener.game_over,
+        }
+
+        for name, value in counters.items():
+            if self.reported.get(name) != value:
+                update[name] = self.reported[name] = value
+
+        if self.outgoing:
+            update["sent"] = self.outgoing
+            self.outgoing = 0
+
+        return update or None
+
+
+def run_board(index, config, commands, updates):
+    """Worker process of one board: reads commands from the commands pipe, puts (index, update) on updates.
+
+        Commands: ("input", action), ("soft_drop", held), ("garbage", count,
+        hole_column), ("pause", paused) and ("stop",).
+    """
+
+    board = Board(config)
+    clock = FrameClock()
+    clock.start()
+
+    while True:
+        if clock.is_running and board.engine.is_running:
+            frame = clock.frame()
+            timeout = max(0, clock.frame_start_ns(frame + 1) - clock.elapsed_ns()) / 1e9
+        else:
+            # paused or over: nothing to do until the next command
+            timeout = None
+
+        if commands.poll(timeout):
+            while commands.poll():
+                command = commands.recv()
+
+                if command[0] == "stop":
+                    return
+
+                if command[0] == "pause":
+                    if command[1]:
+                        clock.pause()
+                    else:
+                        clock.start()
+                else:
+                    # the command lands on the current frame
+                    if clock.is_running:
+                        board.advance(clock.frame())
+
+                    board.handle(command)
+
+        if clock.is_running:
+            board.advance(clock.frame())
+
+        update = board.update()
+
+        if update:
+            updates.put((index, update))
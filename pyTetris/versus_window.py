@@ -0,0 +1,238 @@
+import multiprocessing
+import queue
+import random
+import secrets
+
+from PyQt5 import QtCore
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import QGridLayout, QLabel, QVBoxLayout, QWidget
+
+from pyTetris.board_widget import BoardWidget
+from pyTetris.diagnostics import RENDER_LOGGER as logger
+from pyTetris.engine import Action
+from pyTetris.game import Game
+from pyTetris.protocol import unpack_cells
+from pyTetris.versus import MAX_BOARDS, MIN_BOARDS, garbage_target, run_board
+
+# cell size in pixels per number of boards
+CELL_SIZES = {2: 20, 3: 18, 4: 16}
+
+
+class VersusWindow(QWidget):
+    """2 to 8 boards side by side, every engine in its own worker process (pyTetris.versus).
+
+        Board 0 is played with the keyboard unless all boards are bots. The
+        window only paints the updates of the workers and routes inputs and
+        garbage: the garbage of a board goes to the next board still alive,
+        with a seeded random hole. P pauses all boards.
+    """
+
+    # ms between two reads of the update queue
+    poll_interval = 8
+
+    def __init__(
+            self,
+            boards,
+            field_height=23,
+            field_width=12,
+            generator=None,
+            seed=None,
+            human=True,
+            bot_frames_per_action=4,
+            parent=None,
+    ):
+        super(VersusWindow, self).__init__(parent)
+
+        if not MIN_BOARDS <= boards <= MAX_BOARDS:
+            raise ValueError(f"VERSUS NEEDS {MIN_BOARDS} TO {MAX_BOARDS} BOARDS")
+
+        self.setWindowTitle("pyTetris - versus")
+
+        self.field_width = field_width
+        self.human = human
+        self.pause = False
+        self.finished = False
+        self.alive = [True] * boards
+
+        # every board gets the same pieces
+        seed = seed if seed is not None else secrets.randbits(32)
+        self.random = random.Random(seed)
+
+        # spawn: the workers do not inherit the Qt state of this process
+        context = multiprocessing.get_context("spawn")
+        self.updates = context.Queue()
+        self.commands = []
+        self.processes = []
+
+        for index in range(boards):
+            config = {
+                "height": field_height,
+                "width": field_width,
+                "generator": generator,
+                "seed": seed,
+                "bot": not (human and index == 0),
+                "frames_per_action": bot_frames_per_action,
+            }
+            receiver, sender = context.Pipe(duplex=False)
+            process = context.Process(
+                target=run_board,
+                args=(index, config, receiver, self.updates),
+                name=f"pyTetris-board-{index}",
+                daemon=True,
+            )
+            process.start()
+
+            self.commands.append(sender)
+            self.processes.append(process)
+
+        logger.info("versus with %d boards, seed %d", boards, seed)
+
+        cell_size = CELL_SIZES.get(boards, 12)
+        columns = boards if boards <= 4 else (boards + 1) // 2
+        layout = QGridLayout(self)
+
+        self.boards = []
+        self.name_labels = []
+        self.stats_labels = []
+
+        for index in range(boards):
+            name_label = QLabel("YOU" if human and index == 0 else f"BOT {index}")
+            board = BoardWidget(field_height, field_width, cell_size=cell_size, first_row=2)
+            stats_label = QLabel()
+
+            column = QVBoxLayout()
+            column.addWidget(name_label)
+            column.addWidget(board)
+            column.addWidget(stats_label)
+            layout.addLayout(column, index // columns, index % columns)
+
+            self.boards.append(board)
+            self.name_labels.append(name_label)
+            self.stats_labels.append(stats_label)
+
+        self.stats = [{"score": 0, "lines": 0, "level": 0, "pending": 0} for index in range(boards)]
+
+        for index in range(boards):
+            self.update_stats_label(index)
+
+        self.poll_timer = QTimer(self)
+        self.poll_timer.setTimerType(QtCore.Qt.PreciseTimer)
+        self.poll_timer.timeout.connect(self.poll_updates)
+        self.poll_timer.start(self.poll_interval)
+
+    def poll_updates(self):
+        while True:
+            try:
+                index, update = self.updates.get_nowait()
+            except queue.Empty:
+                return
+
+            self.apply_update(index, update)
+
+    def apply_update(self, index, update):
+        cells = update.get("cells")
+
+        if cells:
+            self.boards[index].set_cells(unpack_cells(cells))
+
+        stats = self.stats[index]
+        changed = False
+
+        for name in stats:
+            if name in update:
+                stats[name] = update[name]
+                changed = True
+
+        if changed:
+            self.update_stats_label(index)
+
+        if update.get("sent"):
+            self.send_garbage(index, update["sent"])
+
+        if update.get("game_over"):
+            self.knock_out(index)
+
+    def update_stats_label(self, index):
+        stats = self.stats[index]
+        text = f"score {stats['score']}  lines {stats['lines']}  level {stats['level']}"
+
+        if stats["pending"]:
+            text += f"  +{stats['pending']}"
+
+        self.stats_labels[index].setText(text)
+
+    def send_garbage(self, attacker, count):
+        target = garbage_target(self.alive, attacker)
+
+        if target is None:
+            return
+
+        hole_column = self.random.randint(1, self.field_width - 2)
+        self.commands[target].send(("garbage", count, hole_column))
+
+    def knock_out(self, index):
+        if not self.alive[index]:
+            return
+
+        self.alive[index] = False
+        self.name_labels[index].setText(self.name_labels[index].text() + " - KO")
+        logger.info("board %d knocked out", index)
+
+        alive = [index for index, is_alive in enumerate(self.alive) if is_alive]
+
+        if len(alive) == 1:
+            self.finished = True
+            winner = alive[0]
+            self.commands[winner].send(("pause", True))
+            self.name_labels[winner].setText(self.name_labels[winner].text() + " - WINNER")
+            logger.info("board %d wins", winner)
+
+    def keyPressEvent(self, e):
+        if self.finished:
+            return
+
+        if e.key() == QtCore.Qt.Key_P and not e.isAutoRepeat():
+            self.pause = not self.pause
+
+            for index, commands in enumerate(self.commands):
+                if self.alive[index]:
+                    commands.send(("pause", self.pause))
+
+            return
+
+        action = Game.key_actions.get(e.key())
+
+        if action is None or not self.human or self.pause or not self.alive[0]:
+            return
+
+        # a held soft drop runs on the worker's frame clock, not on key repeat
+        if action == Action.DOWN and e.isAutoRepeat():
+            return
+
+        self.commands[0].send(("input", action))
+
+    def keyReleaseEvent(self, e):
+        if self.human and not e.isAutoRepeat() and Game.key_actions.get(e.key()) == Action.DOWN:
+            self.commands[0].send(("soft_drop", False))
+
+    def closeEvent(self, event):
+        self.stop()
+        event.accept()
+
+    def stop(self):
+        self.poll_timer.stop()
+
+        for commands in self.commands:
+            try:
+                commands.send(("stop",))
+            except OSError:
+                pass
+
+        for process in self.processes:
+            process.join(1)
+
+            if process.is_alive():
+                process.terminate()
+
+        self.commands = []
+        self.processes = []
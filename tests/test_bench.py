@@ -0,0 +1,32 @@
+import unittest
+
+from benchmarks import bench
+from pyTetris.field import FIELD_BACKENDS
+
+
+class BenchmarkSmokeTest(unittest.TestCase):
+    """Every benchmark case for one call: an engine or window API change must not break the suite."""
+
+    def run_cases(self, benchmarks):
+        for name, (run, number, prepare) in benchmarks.items():
+            with self.subTest(name):
+                bench.timed(run, 1, prepare)
+
+    def test_engine_benchmarks(self):
+        for backend in sorted(FIELD_BACKENDS):
+            with self.subTest(backend):
+                try:
+                    benchmarks = bench.engine_benchmarks(backend)
+                except ImportError as e:
+                    self.skipTest(f"{backend} backend: {e}")
+
+                self.assertTrue(benchmarks)
+                self.run_cases(benchmarks)
+
+    def test_qt_benchmarks(self):
+        # empty if PyQt5 (or QtMultimedia) cannot be imported
+        self.run_cases(bench.qt_benchmarks())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+import asyncio
+import unittest
+
+from pyTetris.protocol import ERROR, JOIN, WELCOME, FrameReader, encode_frame
+from pyTetris.server import Server, run_bots
+
+
+class ServerTest(unittest.IsolatedAsyncioTestCase):
+    """A server on a free localhost port, played by the scripted bot clients."""
+
+    async def asyncSetUp(self):
+        self.server = Server(2, seed=1)
+        await self.server.start("127.0.0.1", 0)
+
+    async def asyncTearDown(self):
+        await self.server.stop()
+
+    async def test_bots_play_rooms_in_sync(self):
+        report = await asyncio.wait_for(run_bots(self.server, 4, 40), 60)
+
+        self.assertEqual(report["rooms"], 2)
+        self.assertEqual(report["errors"], 0)
+        self.assertEqual(report["desynced"], 0)
+        self.assertEqual(self.server.rooms_played, 2)
+        self.assertEqual(len(self.server.closed_boards), 2)
+
+    async def test_second_join_is_an_error(self):
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.server.port)
+        writer.write(encode_frame(JOIN, b"room") + encode_frame(JOIN, b"again"))
+
+        frames = FrameReader().feed(await asyncio.wait_for(reader.read(1000), 5))
+        writer.close()
+
+        self.assertEqual([kind for kind, payload in frames], [WELCOME, ERROR])
+
+
+if __name__ == "__main__":
+    unittest.main()